@@ -3,6 +3,7 @@ from typing import Dict, Any, List, Optional
 import uuid
 from datetime import datetime
 from llm import llm_manager, ChatMessage
+from runtime.telemetry import caller_scope
 
 class Task:
     def __init__(self, description: str, task_type: str = "general", context: Optional[Dict[str, Any]] = None):
@@ -17,6 +18,9 @@ class Task:
         self.error: Optional[str] = None
 
 class BaseAgent(ABC):
+    # Aufrufstelle für die Wahl der Modell-Stufe (siehe CALL_SITE_TIERS)
+    call_site: Optional[str] = None
+
     def __init__(self, name: str, role: str):
         self.name = name
         self.role = role
@@ -64,15 +68,29 @@ class BaseAgent(ABC):
         self.tasks.append(task)
         return task
     
-    def get_llm_response(self, prompt: str, context: Optional[List[ChatMessage]] = None) -> str:
+    def get_llm_response(self, prompt: str, context: Optional[List[ChatMessage]] = None,
+                         call_site: Optional[str] = None) -> str:
         """Hole Antwort vom LLM"""
         # Der llm_manager erwartet möglicherweise ein spezifisches Format, aber für die
         # interne Typisierung ist dies korrekt. Wir übergeben den Kontext einfach weiter.
-        return llm_manager.generate_response(
-            system_prompt=self.system_prompt(),
-            user_prompt=prompt,
-            context=context
-        )
+        with caller_scope(self.name):
+            return llm_manager.generate_response(
+                system_prompt=self.system_prompt(),
+                user_prompt=prompt,
+                context=context,
+                call_site=call_site or self.call_site
+            )
+
+    async def aget_llm_response(self, prompt: str, context: Optional[List[ChatMessage]] = None,
+                                call_site: Optional[str] = None) -> str:
+        """Hole Antwort vom LLM (asynchron, für parallele Anfragen)"""
+        with caller_scope(self.name):
+            return await llm_manager.agenerate_response(
+                system_prompt=self.system_prompt(),
+                user_prompt=prompt,
+                context=context,
+                call_site=call_site or self.call_site
+            )
     
     def get_task_status(self) -> Dict[str, int]:
         """Zeige Task-Status"""
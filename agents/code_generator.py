@@ -2,10 +2,13 @@ import json
 import re
 from typing import Dict, Any, List
 from agents.base_agent import BaseAgent, Task
+from llm import is_error_response
 from tools.file_tools import file_manager
 from tools.code_executor import code_executor
 
 class CodeGenerator(BaseAgent):
+    call_site = "code_generation"
+
     def __init__(self):
         super().__init__("CodeGenerator", "Code Implementation")
         self.current_language = "python"
@@ -144,6 +147,9 @@ Sei autonom, gründlich und erstelle vollständige, lauffähige Lösungen!
         """
         
         raw_code = self.get_llm_response(prompt)
+        if is_error_response(raw_code):
+            # API-Fehler nicht als Dateiinhalt speichern
+            return {"success": False, "error": raw_code}
         code = self._clean_code_output(raw_code) # Code bereinigen
         
         # Speichere Datei
@@ -197,7 +203,10 @@ Sei autonom, gründlich und erstelle vollständige, lauffähige Lösungen!
         """
         
         response = self.get_llm_response(prompt)
-        
+        if is_error_response(response):
+            # API-Fehler nicht als Dateiinhalt speichern
+            return {"success": False, "error": response}
+
         try:
             # Versuche JSON zu parsen
             files_data = json.loads(response)
@@ -247,7 +256,10 @@ Sei autonom, gründlich und erstelle vollständige, lauffähige Lösungen!
         """
         
         response = self.get_llm_response(prompt)
-        
+        if is_error_response(response):
+            # API-Fehler nicht als Dateiinhalt speichern
+            return {"success": False, "error": response}
+
         # Parse und erstelle Modul-Dateien
         project_path = context.get('project_path', 'projects/temp')
         module_path = f"{project_path}/{module_name}"
@@ -297,7 +309,10 @@ Sei autonom, gründlich und erstelle vollständige, lauffähige Lösungen!
         """
         
         refactored_code = self.get_llm_response(prompt)
-        
+        if is_error_response(refactored_code):
+            # API-Fehler dürfen den vorhandenen Code nicht überschreiben
+            return {"success": False, "error": refactored_code}
+
         # Erstelle Backup
         backup_path = f"{file_path}.backup"
         file_manager.copy_file(file_path, backup_path)
@@ -329,7 +344,10 @@ Sei autonom, gründlich und erstelle vollständige, lauffähige Lösungen!
         """
         
         code = self.get_llm_response(prompt)
-        
+        if is_error_response(code):
+            # API-Fehler nicht als Dateiinhalt speichern
+            return {"success": False, "error": code}
+
         # Generiere zufälligen Dateinamen falls nicht spezifiziert
         filename = context.get('filename', f"generated_{hash(description) % 10000}.py")
         
@@ -369,12 +387,15 @@ Sei autonom, gründlich und erstelle vollständige, lauffähige Lösungen!
         """
         
         code = self.get_llm_response(prompt)
-        
+        if is_error_response(code):
+            # API-Fehler nicht als Dateiinhalt speichern
+            return {"success": False, "error": code}
+
         project_path = context.get('project_path', 'projects/temp')
         file_path = f"{project_path}/{filename}"
-        
+
         success = file_manager.write_file(file_path, code)
-        
+
         return {
             "feature_name": "fallback",
             "files_created": [file_path],
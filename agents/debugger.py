@@ -13,11 +13,13 @@ from rich.markdown import Markdown
 from agents.base_agent import BaseAgent, Task
 from tools.file_tools import file_manager
 from tools.code_executor import code_executor
-from llm import llm_manager
+from llm import llm_manager, is_error_response
 
 console = Console()
 
 class Debugger(BaseAgent):
+    call_site = "debugging"
+
     def __init__(self):
         super().__init__("Debugger", "Error Analysis and Fix Generation")
         self.debug_history = []
@@ -449,6 +451,9 @@ Sei autonom, gründlich und löse Debugging-Probleme komplett!
         """
         
         response = self.get_llm_response(prompt)
+        if is_error_response(response):
+            # API-Fehler nicht als Fix anwenden
+            return {"success": False, "error": response}
         
         try:
             debug_result = self._parse_debug_response(response)
@@ -507,6 +512,9 @@ Sei autonom, gründlich und löse Debugging-Probleme komplett!
         """
         
         response = self.get_llm_response(prompt)
+        if is_error_response(response):
+            # API-Fehler nicht als Fix anwenden
+            return {"success": False, "error": response}
         
         # Extrahiere und wende Fix an
         fix_result = self._extract_fix_from_response(response, target_file)
@@ -553,6 +561,9 @@ Sei autonom, gründlich und löse Debugging-Probleme komplett!
         """
         
         response = self.get_llm_response(prompt)
+        if is_error_response(response):
+            # API-Fehler nicht als Fix anwenden
+            return {"success": False, "error": response}
         
         fix_result = self._parse_logic_fix_response(response)
         
@@ -596,6 +607,9 @@ Sei autonom, gründlich und löse Debugging-Probleme komplett!
         """
         
         response = self.get_llm_response(prompt)
+        if is_error_response(response):
+            # API-Fehler nicht als Fix anwenden
+            return {"success": False, "error": response}
         
         optimization_result = self._parse_optimization_response(response)
         
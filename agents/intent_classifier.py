@@ -0,0 +1,58 @@
+"""
+Lokale Intent-Erkennung ohne Netzwerkzugriff.
+Entscheidet anhand von Schlüsselwörtern, ob eine Eingabe eine Projektanforderung ("PROJEKT")
+oder eine normale Frage ("FRAGE") ist. Bei Unsicherheit wird None geliefert, damit der
+Aufrufer auf die LLM-basierte Erkennung zurückfallen kann.
+"""
+
+import re
+from typing import Optional
+
+PROJECT = "PROJEKT"
+QUESTION = "FRAGE"
+
+# Wortanfänge von Aufforderungen, etwas zu bauen (deutsch und englisch)
+_BUILD_VERBS = re.compile(
+    r"\b(erstell|bau|mach|programmier|entwick|schreib|generier|implementier|code|"
+    r"create|build|make|develop|write|generate|implement|scaffold)\w*",
+    re.IGNORECASE,
+)
+# Typische Artefakte einer Projektanforderung
+_ARTIFACTS = re.compile(
+    r"\b(app|apps|anwendung|applikation|website|webseite|webapp|homepage|seite|api|rest|tool|programm|"
+    r"skript|script|spiel|game|bot|dashboard|server|backend|frontend|cli|projekt|project|"
+    r"rechner|calculator|plugin|bibliothek|library|service|dienst|shop|blog|todo|chat)\w*",
+    re.IGNORECASE,
+)
+# Fragewörter am Satzanfang
+_QUESTION_START = re.compile(
+    r"^\s*(was|wie|warum|wieso|weshalb|wer|wo|wann|welche[rsmn]?|erkläre?|erklär|ist|sind|gibt|kann man|"
+    r"what|how|why|who|where|when|which|is|are|does|do|explain|tell me)\b",
+    re.IGNORECASE,
+)
+
+# Begrüßungen und Dank sind eindeutig keine Projektanforderung
+_SMALL_TALK = re.compile(
+    r"^\s*(hallo|hi|hey|moin|servus|guten (morgen|tag|abend)|danke|vielen dank|hello|thanks|thank you)\b",
+    re.IGNORECASE,
+)
+
+
+def classify_intent(user_input: str) -> Optional[str]:
+    """Klassifiziert eine Eingabe als PROJEKT oder FRAGE; None, wenn die Heuristik unsicher ist."""
+    text = user_input.strip()
+    if not text:
+        return QUESTION
+
+    wants_build = bool(_BUILD_VERBS.search(text))
+    names_artifact = bool(_ARTIFACTS.search(text))
+    asks = text.endswith("?") or bool(_QUESTION_START.match(text))
+
+    if wants_build and names_artifact and not asks:
+        return PROJECT
+    if asks and not wants_build:
+        return QUESTION
+    # Ohne Frage-Merkmal kann auch eine knappe Anforderung wie "Taschenrechner in Python bitte" gemeint sein
+    if not wants_build and not names_artifact and _SMALL_TALK.match(text):
+        return QUESTION
+    return None
@@ -5,6 +5,8 @@ from agents.base_agent import BaseAgent, Task
 from tools.file_tools import file_manager
 
 class ProjectManager(BaseAgent):
+    call_site = "planning"
+
     def __init__(self):
         super().__init__("ProjectManager", "Project Planning and Coordination")
         self.current_project = None
@@ -51,7 +53,7 @@ Your output must be a plan that a junior developer could follow to produce an el
 
         **Project Name:**
         """
-        response = self.get_llm_response(prompt)
+        response = self.get_llm_response(prompt, call_site="project_name")
 
         # Bereinige den Namen, um sicherzustellen, dass er valide ist
         # Nimm nur die erste Zeile der Antwort, falls das LLM doch mehr schreibt
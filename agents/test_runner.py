@@ -4,10 +4,13 @@ import re
 import sys
 from typing import Dict, Any, List
 from agents.base_agent import BaseAgent, Task
+from llm import is_error_response
 from tools.code_executor import code_executor
 from tools.file_tools import file_manager
 
 class TestRunner(BaseAgent):
+    call_site = "testing"
+
     def __init__(self):
         super().__init__("TestRunner", "Automated Testing and Quality Assurance")
         self.test_results = []
@@ -60,7 +63,7 @@ Sei autonom, gründlich und löse Test-Probleme komplett!
 
         # Parse the result to provide a structured response
         output = result.get("stdout", "")
-        success = result.get("exit_code") == 0
+        success = result.get("return_code") == 0
         
         return {
             "success": success,
@@ -183,6 +186,9 @@ Sei autonom, gründlich und löse Test-Probleme komplett!
         """
         
         response = self.get_llm_response(prompt)
+        if is_error_response(response):
+            # API-Fehler nicht als Testdatei speichern
+            return {"success": False, "error": response}
         
         try:
             # Parse JSON-Antwort
@@ -298,6 +304,9 @@ Sei autonom, gründlich und löse Test-Probleme komplett!
         """
         
         response = self.get_llm_response(prompt)
+        if is_error_response(response):
+            # API-Fehler nicht als Testdatei speichern
+            return {"success": False, "error": response}
         
         try:
             test_data = json.loads(response) if response.strip().startswith('{') else {"data": response}
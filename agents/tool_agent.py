@@ -1,25 +1,71 @@
-from typing import Dict, Any, List, cast
+from typing import Dict, Any, List, Callable, Optional, cast
 import json
 import sys
+import time
 import os
 import yaml
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from openai.types.chat import ChatCompletionMessage, ChatCompletionMessageParam, ChatCompletionToolParam
 
 from agents.base_agent import BaseAgent, Task
-from tools.tool_definitions import get_tool_definitions
+from tools.tool_definitions import get_tool_definitions, CHAT_SAFE_TOOL_NAMES
 from tools.file_tools import file_manager
 from tools.code_executor import code_executor
+from tools.tool_cache import ToolResultCache
+from tools.result_pager import ResultPager
+from tools.prefetch import file_warm_cache, prefetcher
+from tools.search_index import mark_indexes_stale, search_index_for
+from tools.scanner import scanner, python_outline, SearchLimits
+from tools.bm25_index import bm25_index_for
 from llm import llm_manager
+from config.settings import MAX_TOKENS, TOOL_MAX_WORKERS, CHAT_HISTORY_SHARE, CHAT_KEEP_TURNS
+from runtime.budget import AgentBudget, BudgetTracker
+from runtime.context_window import ContextWindowManager, compact_history
+from runtime.scheduler import deadline_scope, DeadlineExceeded
+from runtime.telemetry import caller_scope
+from runtime.trace import trace_sink
 from rich.console import Console
 from rich.panel import Panel
 
 console = Console()
 
+# Tools ohne Seiteneffekte, die innerhalb eines Schritts parallel ausgeführt werden dürfen
+READ_ONLY_TOOLS = frozenset({
+    "read_file", "view_file", "list_directory", "list_dir", "view_code_item",
+    "codebase_search", "grep_search", "find_by_name",
+    "read_url_content", "view_web_document_content_chunk", "search_web",
+    "analyze_code_complexity", "detect_security_vulnerabilities",
+    "validate_architecture", "read_deployment_config", "check_deploy_status", "command_status",
+    "fetch_result_page",
+})
+
+# Hinweis für den letzten Schritt, wenn das Budget keine weiteren Tool-Aufrufe erlaubt
+FINAL_STEP_NOTE = (
+    "Das Budget dieser Aufgabe ist fast erschöpft. Rufe keine Tools mehr auf und antworte jetzt "
+    "mit dem bisher gesammelten Stand; nenne offene Punkte ausdrücklich."
+)
+
+# Gemeinsamer Thread-Pool für lesende Tools aller Agenten
+_tool_pool = ThreadPoolExecutor(max_workers=TOOL_MAX_WORKERS, thread_name_prefix="tool")
+
+
 class ToolAgent(BaseAgent):
-    def __init__(self, chat_mode: bool = False):
+    call_site = "tool_agent"
+
+    def __init__(self, chat_mode: bool = False, on_stream_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 persistent: bool = False):
         super().__init__("ToolAgent", "Ein Agent, der Tools zur Projekterstellung verwendet.")
         self.chat_mode = chat_mode
-        self.tools = self.get_chat_safe_tools() if chat_mode else get_tool_definitions()
+        # Persistente Agenten führen den Verlauf über mehrere Aufgaben fort (eine Chat-Sitzung)
+        self.conversation: Optional[List[Dict[str, Any]]] = [] if persistent else None
+        # Wenn gesetzt, werden Antworten gestreamt und jedes Ereignis an diesen Callback übergeben
+        self.on_stream_event = on_stream_event
+        self.tools = get_tool_definitions(chat_safe=chat_mode)
+        # Ergebnisse lesender Tools gelten für die gesamte Sitzung dieses Agenten
+        self.tool_cache = ToolResultCache()
+        # Übergroße Tool-Ausgaben werden seitenweise an das Modell gegeben
+        self.result_pager = ResultPager()
         
         # Definiere alle verfügbaren Funktionen
         all_functions = {
@@ -56,6 +102,7 @@ class ToolAgent(BaseAgent):
             "read_url_content": self.read_url_content,
             "view_web_document_content_chunk": self.view_web_document_content_chunk,
             "search_web": self.search_web,
+            "fetch_result_page": self.fetch_result_page,
             
             # Memory and interaction
             "create_memory": self.create_memory,
@@ -76,15 +123,7 @@ class ToolAgent(BaseAgent):
         
         # Im Chat-Modus nur Chat-sichere Funktionen verfügbar machen
         if chat_mode:
-            chat_safe_function_names = {
-                "list_directory", "read_file", "view_file", "list_dir", "view_code_item",
-                "codebase_search", "grep_search", "find_by_name",
-                "read_url_content", "view_web_document_content_chunk", "search_web",
-                "analyze_code_complexity", "detect_security_vulnerabilities", 
-                "analyze_dependencies", "profile_performance", "validate_architecture",
-                "create_memory", "suggested_responses", "ask_user_clarification"
-            }
-            self.available_functions = {k: v for k, v in all_functions.items() if k in chat_safe_function_names}
+            self.available_functions = {k: v for k, v in all_functions.items() if k in CHAT_SAFE_TOOL_NAMES}
         else:
             self.available_functions = all_functions
 
@@ -234,76 +273,209 @@ Sei proaktiv, gründlich und autonom. Löse Probleme komplett mit deinen erweite
 """
 
     def process_task(self, task: Task) -> Dict[str, Any]:
-        """Verarbeitet eine komplexe Aufgabe durch den Einsatz von Tools."""
+        """Verarbeitet eine komplexe Aufgabe durch den Einsatz von Tools.
+
+        Schritte, Laufzeit, Tokens und Tool-Laufzeit sind durch task.context["budget"] begrenzt
+        (AgentBudget oder Dict, Standardwerte aus den AGENT_*-Einstellungen); der Verbrauch samt
+        Zeiten pro Schritt steht im Ergebnis unter "budget".
+        """
+        tracker = BudgetTracker(AgentBudget.from_context(task.context.get("budget")))
+        # Alle LLM-Aufrufe dieser Aufgabe teilen sich eine gemeinsame Deadline
+        with deadline_scope(tracker.budget.max_seconds), caller_scope(self.name):
+            try:
+                result = self._run_agent_loop(task, tracker)
+            except DeadlineExceeded as e:
+                console.print(f"[red]Zeitlimit überschritten: {e}[/red]")
+                tracker.exhausted = "max_seconds"
+                result = {"status": "timeout", "final_response": f"Zeitlimit von {tracker.budget.max_seconds}s überschritten."}
+            finally:
+                if self.conversation is not None:
+                    self._compact_conversation()
+        result["budget"] = tracker.report()
+        return result
+
+    def add_to_conversation(self, message: Dict[str, Any]):
+        """Übernimmt eine außerhalb des Agenten erzeugte Nachricht (z.B. eine Fallback-Antwort) in den Verlauf."""
+        if self.conversation is not None:
+            self.conversation.append(message)
+
+    def _compact_conversation(self):
+        """Hält den Sitzungsverlauf unter einem Anteil des Kontextbudgets; die letzten Runden bleiben vollständig."""
+        window = ContextWindowManager(llm_manager.provider, llm_manager.model_for(self.call_site))
+        compact_history(self.conversation, int(window.budget(self.tools) * CHAT_HISTORY_SHARE), keep_turns=CHAT_KEEP_TURNS)
+
+    def _run_agent_loop(self, task: Task, tracker: BudgetTracker) -> Dict[str, Any]:
         user_request = task.description
-        messages: List[Dict[str, Any]] = [
-            {"role": "system", "content": self.system_prompt()},
-            {"role": "user", "content": user_request}
-        ]
+        if self.conversation is None:
+            messages: List[Dict[str, Any]] = [{"role": "system", "content": self.system_prompt()}]
+        else:
+            messages = self.conversation
+            if not messages:
+                messages.append({"role": "system", "content": self.system_prompt()})
+        messages.append({"role": "user", "content": user_request})
 
         console.print(Panel(f"Starte Aufgabenbearbeitung für: [bold]{user_request}[/bold]", title="🤖 ToolAgent", border_style="blue"))
-
-        # Schleife für mehrere Tool-Aufrufe
-        for i in range(10): # Maximal 10 Schritte, um Endlosschleifen zu vermeiden
-            response = llm_manager.client.chat.completions.create(
-                model=llm_manager.model,
-                messages=cast(List[ChatCompletionMessageParam], messages),
-                tools=cast(List[ChatCompletionToolParam], self.tools),
-                tool_choice="auto",
-            )
-            response_message = response.choices[0].message
-            tool_calls = response_message.tool_calls
+        # Im DEBUG_MODE werden pro Schritt nur die neuen Nachrichten protokolliert (Ansicht: main.py trace)
+        trace = trace_sink.start(self.name, user_request, written=len(messages) - 1)
+
+        # Schleife für mehrere Tool-Aufrufe, begrenzt durch das Budget der Aufgabe
+        i = 0
+        response_message: Dict[str, Any] = {}
+        while not tracker.check():
+            # Im letzten erlaubten Schritt muss das Modell ohne weitere Tools antworten
+            pending_limit = tracker.final_step()
+            final = pending_limit is not None
+            response_message = self._complete(messages, step=i, tracker=tracker, final=final)
+            tool_calls = response_message.get("tool_calls")
 
             if not tool_calls:
                 console.print("[green]Agent hat die Aufgabe abgeschlossen.[/green]")
-                return {"status": "completed", "final_response": response_message.content}
+                if self.conversation is not None:
+                    messages.append(response_message)
+                if trace:
+                    trace.record_step(i, messages if self.conversation is not None else messages + [response_message])
+                    trace.finish("completed")
+                return {"status": "completed", "final_response": response_message.get("content")}
+
+            if final:
+                # Das Modell hat trotz tool_choice="none" Tools angefordert; ohne Tool-Antworten nicht in den Verlauf
+                tracker.exhausted = pending_limit
+                break
+            messages.append(response_message)
+            started = time.monotonic()
+            messages.extend(self._execute_tool_calls(tool_calls))
+            tracker.record_tools(time.monotonic() - started, len(tool_calls))
+            if trace:
+                trace.record_step(i, messages)
+            i += 1
+
+        # Das Schrittlimit behält seinen bisherigen Status; alle übrigen Limits melden budget_exceeded
+        status = "max_steps_reached" if tracker.exhausted == "max_steps" else "budget_exceeded"
+        if trace:
+            trace.record_step(i, messages)
+            trace.finish(status)
+        console.print(f"[yellow]Budget erschöpft ({tracker.exhausted}).[/yellow]")
+        return {
+            "status": status,
+            "final_response": response_message.get("content") or f"Budget der Aufgabe erschöpft ({tracker.exhausted}).",
+        }
 
-            # Wandle die Antwortnachricht in ein Wörterbuch um, bevor sie angehängt wird
-            messages.append(response_message.model_dump())
-            
-            for tool_call in tool_calls:
-                function_name = tool_call.function.name
-                function_to_call = self.available_functions.get(function_name)
-                
-                if not function_to_call:
-                    console.print(f"[red]Fehler: Unbekannte Funktion '{function_name}'[/red]")
-                    continue
+    def _execute_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Führt die Tool-Aufrufe eines Schritts aus und liefert die Tool-Nachrichten in Aufrufreihenfolge.
+
+        Aufeinanderfolgende lesende Tools laufen parallel im Thread-Pool; schreibende Tools und
+        Befehle laufen einzeln und erst, nachdem alle vorherigen Aufrufe abgeschlossen sind.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(tool_calls)
+        batch: List[int] = []
+
+        def flush():
+            if len(batch) == 1:
+                results[batch[0]] = self._run_tool_call(tool_calls[batch[0]])
+            elif batch:
+                # Jeder Thread erhält eine Kopie des Kontexts (Deadline, Aufrufer der Telemetrie)
+                futures = {i: _tool_pool.submit(contextvars.copy_context().run, self._run_tool_call, tool_calls[i]) for i in batch}
+                for i, future in futures.items():
+                    results[i] = future.result()
+            batch.clear()
+
+        for i, tool_call in enumerate(tool_calls):
+            if tool_call["function"]["name"] in READ_ONLY_TOOLS:
+                batch.append(i)
+                continue
+            flush()
+            results[i] = self._run_tool_call(tool_call)
+        flush()
+        return [message for message in results if message is not None]
+
+    def _run_tool_call(self, tool_call: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Führt einen einzelnen Tool-Aufruf aus und liefert die Tool-Nachricht (None bei unbekannter Funktion)."""
+        function_name = tool_call["function"]["name"]
+        function_to_call = self.available_functions.get(function_name)
+        
+        if not function_to_call:
+            console.print(f"[red]Fehler: Unbekannte Funktion '{function_name}'[/red]")
+            return None
 
+        try:
+            function_args = json.loads(tool_call["function"]["arguments"])
+            # Fingerprint vor dem Aufruf, damit Änderungen während des Aufrufs den Eintrag ungültig machen
+            function_response, fingerprint = self.tool_cache.lookup(function_name, function_args)
+            if function_response is not None:
+                console.print(f"♻️  Tool-Ergebnis aus Cache: [bold]{function_name}[/bold] mit Argumenten: {function_args}")
+            else:
+                console.print(f"🔩 Rufe Tool auf: [bold]{function_name}[/bold] mit Argumenten: {function_args}")
                 try:
-                    function_args = json.loads(tool_call.function.arguments)
-                    console.print(f"🔩 Rufe Tool auf: [bold]{function_name}[/bold] mit Argumenten: {function_args}")
-                    
                     function_response = function_to_call(**function_args)
-                    
-                    # Stelle sicher, dass die Tool-Nachricht dem richtigen Format entspricht
-                    tool_message = {
-                        "tool_call_id": tool_call.id,
-                        "role": "tool",
-                        "name": function_name,
-                        "content": json.dumps(function_response),
-                    }
-                    messages.append(tool_message)
-                except Exception as e:
-                    console.print(f"[red]Fehler bei der Ausführung von '{function_name}': {e}[/red]")
-                    error_message = {
-                        "tool_call_id": tool_call.id,
-                        "role": "tool",
-                        "name": function_name,
-                        "content": f'{{"error": "Ausführung fehlgeschlagen", "details": "{str(e)}"}}',
-                    }
-                    messages.append(error_message)
-
-            # --- DEBUGGING PRINT ---
-            import sys
-            import json
-            try:
-                print("DEBUG: Messages sent to LLM for next step:", file=sys.stderr)
-                print(json.dumps(messages, indent=2), file=sys.stderr)
-            except Exception as debug_error:
-                print(f"DEBUG ERROR: {debug_error}", file=sys.stderr)
-            # --- END DEBUGGING ---
+                finally:
+                    # Auch fehlgeschlagene Schreibvorgänge können Dateien verändert haben
+                    self.tool_cache.after_call(function_name, function_args)
+                    if function_name not in READ_ONLY_TOOLS:
+                        mark_indexes_stale()
+                self.tool_cache.set(function_name, function_args, function_response, fingerprint)
+            # Während der nächste LLM-Schritt läuft, die wahrscheinlich als Nächstes gelesenen Dateien vorladen
+            prefetcher.schedule(function_name, function_args, function_response)
+            
+            # Stelle sicher, dass die Tool-Nachricht dem richtigen Format entspricht
+            return {
+                "tool_call_id": tool_call["id"],
+                "role": "tool",
+                "name": function_name,
+                "content": json.dumps(self.result_pager.paginate(function_response)),
+            }
+        except Exception as e:
+            console.print(f"[red]Fehler bei der Ausführung von '{function_name}': {e}[/red]")
+            return {
+                "tool_call_id": tool_call["id"],
+                "role": "tool",
+                "name": function_name,
+                "content": f'{{"error": "Ausführung fehlgeschlagen", "details": "{str(e)}"}}',
+            }
 
-        return {"status": "max_steps_reached", "final_response": "Maximale Anzahl an Schritten erreicht."}
+    def _complete(self, messages: List[Dict[str, Any]], step: int, tracker: Optional[BudgetTracker] = None,
+                  final: bool = False) -> Dict[str, Any]:
+        """Fordert den nächsten Schritt vom LLM an und liefert die Assistenten-Nachricht als Dict.
+
+        Mit final=True werden keine Tools mehr angeboten und das Modell antwortet mit dem bisherigen Stand.
+        """
+        model = llm_manager.model_for(self.call_site)
+        if final:
+            messages = messages + [{"role": "system", "content": FINAL_STEP_NOTE}]
+        # Verlauf und Tool-Ausgaben in das Kontextfenster des Modells einpassen
+        messages = llm_manager.fit_messages(messages, self.tools, model=model)
+        kwargs: Dict[str, Any] = {"tool_choice": "none" if final else "auto"}
+        remaining_tokens = tracker.remaining_tokens() if tracker else None
+        if remaining_tokens is not None:
+            kwargs["max_tokens"] = max(1, min(MAX_TOKENS, remaining_tokens))
+        started = time.monotonic()
+        if self.on_stream_event is None:
+            response = llm_manager.chat(
+                messages=cast(List[ChatCompletionMessageParam], messages),
+                model=model,
+                tools=cast(List[ChatCompletionToolParam], self.tools),
+                **kwargs,
+            )
+            if tracker:
+                tracker.record_llm(step, time.monotonic() - started, getattr(response, "usage", None))
+            # Wandle die Antwortnachricht in ein Wörterbuch um, bevor sie angehängt wird
+            return response.choices[0].message.model_dump()
+
+        self.on_stream_event({"type": "step", "index": step})
+        message: Dict[str, Any] = {"role": "assistant", "content": None}
+        usage = None
+        for event in llm_manager.stream_chat(
+            messages=cast(List[ChatCompletionMessageParam], messages),
+            model=model,
+            tools=cast(List[ChatCompletionToolParam], self.tools),
+            **kwargs,
+        ):
+            self.on_stream_event(event)
+            if event["type"] == "done":
+                message = event["message"]
+                usage = event.get("usage")
+        if tracker:
+            tracker.record_llm(step, time.monotonic() - started, usage)
+        return message
 
     def ask_user_clarification(self, question: str) -> str:
         """Stellt eine Frage an den Benutzer und wartet auf eine Antwort."""
@@ -492,8 +664,8 @@ Sei proaktiv, gründlich und autonom. Löse Probleme komplett mit deinen erweite
     def view_file(self, AbsolutePath: str, StartLine: int, EndLine: int, IncludeSummaryOfOtherLines: bool) -> Dict[str, Any]:
         """Zeigt den Inhalt einer Datei in einem bestimmten Bereich an."""
         try:
-            with open(AbsolutePath, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+            import io
+            lines = io.StringIO(file_warm_cache.read_text(AbsolutePath)).readlines()
             
             if StartLine < 0 or EndLine >= len(lines) or StartLine > EndLine:
                 return {"status": "error", "message": "Ungültige Zeilenbereiche"}
@@ -532,129 +704,80 @@ Sei proaktiv, gründlich und autonom. Löse Probleme komplett mit deinen erweite
             return {"status": "error", "message": str(e)}
 
     # Advanced search and navigation
-    def codebase_search(self, Query: str, TargetDirectories: List[str]) -> Dict[str, Any]:
-        """Führt eine semantische Suche im Codebase durch."""
+    def codebase_search(self, Query: str, TargetDirectories: List[str], MaxResults: Optional[int] = None) -> Dict[str, Any]:
+        """Führt eine semantische Suche im Codebase durch (BM25 über einen persistenten Token-Index)."""
         try:
             import os
-            import re
-            from pathlib import Path
-            
-            results = []
-            search_terms = Query.lower().split()
-            
-            # Durchsuche alle angegebenen Verzeichnisse
-            for directory in TargetDirectories:
-                if not os.path.exists(directory):
-                    continue
-                    
-                for root, dirs, files in os.walk(directory):
-                    for file in files:
-                        if file.endswith(('.py', '.js', '.ts', '.java', '.cpp', '.c', '.h', '.html', '.css', '.md', '.txt')):
-                            file_path = os.path.join(root, file)
-                            try:
-                                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                    content = f.read()
-                                
-                                # Suche nach relevanten Zeilen
-                                lines = content.split('\n')
-                                relevant_lines = []
-                                
-                                for i, line in enumerate(lines, 1):
-                                    line_lower = line.lower()
-                                    if any(term in line_lower for term in search_terms):
-                                        relevant_lines.append({
-                                            "line": i,
-                                            "content": line.strip(),
-                                            "relevance": sum(1 for term in search_terms if term in line_lower)
-                                        })
-                                
-                                if relevant_lines:
-                                    # Sortiere nach Relevanz
-                                    relevant_lines.sort(key=lambda x: x["relevance"], reverse=True)
-                                    results.append({
-                                        "file": file_path,
-                                        "matches": relevant_lines[:5],  # Top 5 Matches
-                                        "total_matches": len(relevant_lines)
-                                    })
-                                    
-                            except Exception:
-                                continue
-            
+
+            limit = MaxResults or 10
+            directories = [directory for directory in TargetDirectories if os.path.exists(directory)]
+            results, searched, matched = [], 0, 0
+            if directories:
+                ranking = bm25_index_for(directories[0]).search(Query, directories, limit=limit)
+                results, searched, matched = ranking["results"], ranking["total_files_searched"], ranking["total_files_matched"]
+
             return {
                 "status": "success", 
                 "results": results, 
                 "query": Query,
-                "total_files_searched": len(results)
+                "total_files_searched": searched,
+                "truncated": matched > len(results),
+                "truncated_reason": "max_results" if matched > len(results) else None
             }
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
-    def grep_search(self, SearchPath: str, Query: str, MatchPerLine: bool, Includes: List[str], CaseInsensitive: bool) -> Dict[str, Any]:
+    def grep_search(self, SearchPath: str, Query: str, MatchPerLine: bool, Includes: List[str], CaseInsensitive: bool,
+                    MaxResults: Optional[int] = None, MaxFiles: Optional[int] = None,
+                    TimeBudgetSeconds: Optional[float] = None) -> Dict[str, Any]:
         """Verwendet ripgrep für exakte Muster-Suche."""
         try:
             import os
             import re
             from pathlib import Path
             
-            results = []
-            
-            # Kompiliere Regex-Pattern
+            # Kompiliere Regex-Pattern (ungültige Muster fallen hier auf)
             flags = re.IGNORECASE if CaseInsensitive else 0
             pattern = re.compile(Query, flags)
-            
-            # Bestimme zu durchsuchende Dateien
-            search_files = []
-            if os.path.isfile(SearchPath):
-                search_files = [SearchPath]
-            else:
-                for root, dirs, files in os.walk(SearchPath):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        # Prüfe Include-Filter
-                        if Includes:
-                            if not any(file.endswith(ext) for ext in Includes):
-                                continue
-                        search_files.append(file_path)
-            
-            # Durchsuche Dateien
-            for file_path in search_files:
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        lines = f.readlines()
-                    
-                    matches = []
-                    for i, line in enumerate(lines, 1):
-                        if pattern.search(line):
-                            match_info = {
-                                "line": i,
-                                "content": line.strip(),
-                                "match": pattern.search(line).group()
-                            }
-                            matches.append(match_info)
-                            
-                            if MatchPerLine and matches:
-                                break  # Nur erste Übereinstimmung pro Zeile
-                    
-                    if matches:
-                        results.append({
-                            "file": file_path,
-                            "matches": matches,
-                            "total_matches": len(matches)
-                        })
-                        
-                except Exception:
-                    continue
+            limits = SearchLimits.of(MaxResults, MaxFiles, TimeBudgetSeconds)
+            searched = 0
+            
+            # Bestimme zu durchsuchende Dateien; der Trigramm-Index liefert nur Dateien, die passen können.
+            # Alles läuft als Generator, damit die Suche nach genug Treffern sofort endet.
+            def search_files():
+                nonlocal searched
+                if os.path.isfile(SearchPath):
+                    candidates = [SearchPath]
+                else:
+                    candidates = search_index_for(SearchPath).iter_candidates(SearchPath, Query, ignore_case=CaseInsensitive)
+                for file_path in limits.within_budget(candidates):
+                    # Prüfe Include-Filter
+                    if Includes:
+                        if not any(file_path.endswith(ext) for ext in Includes):
+                            continue
+                    searched += 1
+                    yield file_path
+            
+            # Durchsuche Dateien (bei vielen Dateien parallel im Prozess-Pool des Scanners)
+            hits, truncated = limits.collect_hits(scanner.grep(search_files(), Query, flags, first_only=MatchPerLine))
+            results = [
+                {"file": file_path, "matches": matches, "total_matches": len(matches)}
+                for file_path, matches in hits
+            ]
             
             return {
                 "status": "success", 
                 "results": results, 
                 "query": Query,
-                "total_files_searched": len(search_files)
+                "total_files_searched": searched,
+                "truncated": truncated is not None,
+                "truncated_reason": truncated
             }
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
-    def find_by_name(self, SearchDirectory: str, Pattern: str, Excludes: List[str], Type: str, MaxDepth: int, Extensions: List[str], FullPath: bool) -> Dict[str, Any]:
+    def find_by_name(self, SearchDirectory: str, Pattern: str, Excludes: List[str], Type: str, MaxDepth: int, Extensions: List[str], FullPath: bool,
+                     MaxResults: Optional[int] = None, TimeBudgetSeconds: Optional[float] = None) -> Dict[str, Any]:
         """Sucht nach Dateien und Unterverzeichnissen mit erweiterten Filtern."""
         try:
             import os
@@ -662,80 +785,87 @@ Sei proaktiv, gründlich und autonom. Löse Probleme komplett mit deinen erweite
             import fnmatch
             from pathlib import Path
             
-            results = []
+            limits = SearchLimits.of(MaxResults, time_budget=TimeBudgetSeconds)
             
             # Kompiliere Pattern für effiziente Suche
             if Pattern:
                 pattern_regex = re.compile(fnmatch.translate(Pattern), re.IGNORECASE)
             
-            # Durchsuche Verzeichnis rekursiv
-            for root, dirs, files in os.walk(SearchDirectory):
-                # Prüfe MaxDepth
-                current_depth = root.replace(SearchDirectory, '').count(os.sep)
-                if current_depth > MaxDepth:
-                    continue
+            def matches():
+                # Durchsuche Verzeichnis rekursiv (ohne ignorierte Verzeichnisse wie .git oder node_modules)
+                for root, dirs, files in limits.within_budget(scanner.walk(SearchDirectory)):
+                    # Prüfe MaxDepth
+                    current_depth = root.replace(SearchDirectory, '').count(os.sep)
+                    if current_depth > MaxDepth:
+                        dirs[:] = []
+                        continue
                 
-                # Filtere Verzeichnisse basierend auf Excludes
-                dirs[:] = [d for d in dirs if not any(fnmatch.fnmatch(d, exclude) for exclude in Excludes)]
+                    # Filtere Verzeichnisse basierend auf Excludes
+                    dirs[:] = [d for d in dirs if not any(fnmatch.fnmatch(d, exclude) for exclude in Excludes)]
                 
-                # Suche nach Dateien
-                if Type in ["file", "both"]:
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        relative_path = os.path.relpath(file_path, SearchDirectory)
+                    # Suche nach Dateien
+                    if Type in ["file", "both"]:
+                        for file in files:
+                            file_path = os.path.join(root, file)
+                            relative_path = os.path.relpath(file_path, SearchDirectory)
                         
-                        # Prüfe Pattern-Match
-                        if Pattern and not pattern_regex.match(file):
-                            continue
+                            # Prüfe Pattern-Match
+                            if Pattern and not pattern_regex.match(file):
+                                continue
                         
-                        # Prüfe Extensions
-                        if Extensions and not any(file.endswith(ext) for ext in Extensions):
-                            continue
+                            # Prüfe Extensions
+                            if Extensions and not any(file.endswith(ext) for ext in Extensions):
+                                continue
                         
-                        # Prüfe Excludes
-                        if any(fnmatch.fnmatch(file, exclude) for exclude in Excludes):
-                            continue
+                            # Prüfe Excludes
+                            if any(fnmatch.fnmatch(file, exclude) for exclude in Excludes):
+                                continue
                         
-                        results.append({
-                            "name": file,
-                            "path": file_path if FullPath else relative_path,
-                            "type": "file",
-                            "size": os.path.getsize(file_path),
-                            "modified": os.path.getmtime(file_path)
-                        })
+                            yield {
+                                "name": file,
+                                "path": file_path if FullPath else relative_path,
+                                "type": "file",
+                                "size": os.path.getsize(file_path),
+                                "modified": os.path.getmtime(file_path)
+                            }
                 
-                # Suche nach Verzeichnissen
-                if Type in ["directory", "both"]:
-                    for dir_name in dirs:
-                        dir_path = os.path.join(root, dir_name)
-                        relative_path = os.path.relpath(dir_path, SearchDirectory)
+                    # Suche nach Verzeichnissen
+                    if Type in ["directory", "both"]:
+                        for dir_name in dirs:
+                            dir_path = os.path.join(root, dir_name)
+                            relative_path = os.path.relpath(dir_path, SearchDirectory)
                         
-                        # Prüfe Pattern-Match
-                        if Pattern and not pattern_regex.match(dir_name):
-                            continue
+                            # Prüfe Pattern-Match
+                            if Pattern and not pattern_regex.match(dir_name):
+                                continue
                         
-                        # Prüfe Excludes
-                        if any(fnmatch.fnmatch(dir_name, exclude) for exclude in Excludes):
-                            continue
+                            # Prüfe Excludes
+                            if any(fnmatch.fnmatch(dir_name, exclude) for exclude in Excludes):
+                                continue
                         
-                        try:
-                            children = len(os.listdir(dir_path))
-                        except:
-                            children = 0
+                            try:
+                                children = len(os.listdir(dir_path))
+                            except:
+                                children = 0
                         
-                        results.append({
-                            "name": dir_name,
-                            "path": dir_path if FullPath else relative_path,
-                            "type": "directory",
-                            "children": children,
-                            "modified": os.path.getmtime(dir_path)
-                        })
+                            yield {
+                                "name": dir_name,
+                                "path": dir_path if FullPath else relative_path,
+                                "type": "directory",
+                                "children": children,
+                                "modified": os.path.getmtime(dir_path)
+                            }
+            
+            # Der Abstieg endet, sobald genug Einträge gefunden sind
+            results, truncated = limits.collect(matches())
             
             return {
                 "status": "success", 
                 "results": results, 
                 "pattern": Pattern,
-                "total_found": len(results)
+                "total_found": len(results),
+                "truncated": truncated is not None,
+                "truncated_reason": truncated
             }
         except Exception as e:
             return {"status": "error", "message": str(e)}
@@ -770,7 +900,6 @@ Sei proaktiv, gründlich und autonom. Löse Probleme komplett mit deinen erweite
         try:
             import os
             import re
-            import ast
             
             # Bestimme die zu durchsuchende Datei
             if File and os.path.exists(File):
@@ -780,50 +909,33 @@ Sei proaktiv, gründlich und autonom. Löse Probleme komplett mit deinen erweite
             else:
                 return {"status": "error", "message": "Datei nicht gefunden"}
             
-            # Lese Dateiinhalt
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Versuche AST-Parsing für Python-Dateien
-            if file_path.endswith('.py'):
-                try:
-                    tree = ast.parse(content)
-                    elements = []
-                    
-                    for node in ast.walk(tree):
-                        if isinstance(node, (ast.FunctionDef, ast.ClassDef, ast.Module)):
-                            element_info = {
-                                "type": type(node).__name__,
-                                "name": getattr(node, 'name', 'module'),
-                                "line": getattr(node, 'lineno', 1),
-                                "end_line": getattr(node, 'end_lineno', len(content.split('\n')))
-                            }
-                            elements.append(element_info)
-                    
-                    # Finde das spezifische Element
-                    target_element = None
-                    for element in elements:
-                        if element["name"] in NodePath or NodePath in element["name"]:
-                            target_element = element
-                            break
+            # Lese Dateiinhalt (ggf. vom Prefetcher vorgeladen)
+            content = file_warm_cache.read_text(file_path)
+            
+            # Symboltabelle für Python-Dateien (None bei Syntaxfehlern)
+            elements = file_warm_cache.symbols(file_path) if file_path.endswith('.py') else None
+            if elements is not None:
+                # Finde das spezifische Element
+                target_element = None
+                for element in elements:
+                    if element["name"] in NodePath or NodePath in element["name"]:
+                        target_element = element
+                        break
+                
+                if target_element:
+                    start_line = target_element["line"] - 1
+                    end_line = target_element["end_line"]
+                    lines = content.split('\n')
+                    element_content = '\n'.join(lines[start_line:end_line])
                     
-                    if target_element:
-                        start_line = target_element["line"] - 1
-                        end_line = target_element["end_line"]
-                        lines = content.split('\n')
-                        element_content = '\n'.join(lines[start_line:end_line])
-                        
-                        return {
-                            "status": "success",
-                            "content": element_content,
-                            "node_path": NodePath,
-                            "element_type": target_element["type"],
-                            "start_line": target_element["line"],
-                            "end_line": target_element["end_line"]
-                        }
-                        
-                except SyntaxError:
-                    pass
+                    return {
+                        "status": "success",
+                        "content": element_content,
+                        "node_path": NodePath,
+                        "element_type": target_element["type"],
+                        "start_line": target_element["line"],
+                        "end_line": target_element["end_line"]
+                    }
             
             # Fallback: Suche nach dem Element im Text
             lines = content.split('\n')
@@ -880,6 +992,10 @@ Sei proaktiv, gründlich und autonom. Löse Probleme komplett mit deinen erweite
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
+    def fetch_result_page(self, handle: str, page: int) -> Dict[str, Any]:
+        """Holt eine weitere Seite einer gekürzten Tool-Ausgabe."""
+        return self.result_pager.fetch(handle, page)
+
     def view_web_document_content_chunk(self, url: str, position: int) -> Dict[str, Any]:
         """Zeigt einen spezifischen Chunk eines Webdokuments an."""
         try:
@@ -1216,48 +1332,16 @@ Sei proaktiv, gründlich und autonom. Löse Probleme komplett mit deinen erweite
                 "files": []
             }
             
-            # Durchsuche alle Python-Dateien
-            for root, dirs, files in os.walk(project_path):
-                for file in files:
-                    if file.endswith('.py'):
-                        file_path = os.path.join(root, file)
-                        relative_path = os.path.relpath(file_path, project_path)
-                        
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                            
-                            # Parse AST
-                            tree = ast.parse(content)
-                            
-                            file_deps = {
-                                "file": relative_path,
-                                "imports": [],
-                                "functions": [],
-                                "classes": []
-                            }
-                            
-                            # Analysiere Imports
-                            for node in ast.walk(tree):
-                                if isinstance(node, ast.Import):
-                                    for alias in node.names:
-                                        file_deps["imports"].append(alias.name)
-                                elif isinstance(node, ast.ImportFrom):
-                                    module = node.module or ""
-                                    for alias in node.names:
-                                        file_deps["imports"].append(f"{module}.{alias.name}")
-                                elif isinstance(node, ast.FunctionDef):
-                                    file_deps["functions"].append(node.name)
-                                elif isinstance(node, ast.ClassDef):
-                                    file_deps["classes"].append(node.name)
-                            
-                            dependencies["files"].append(file_deps)
-                            dependencies["imports"].extend(file_deps["imports"])
-                            dependencies["functions"].extend(file_deps["functions"])
-                            dependencies["classes"].extend(file_deps["classes"])
-                            
-                        except Exception:
-                            continue
+            # Durchsuche alle Python-Dateien; das Parsen läuft bei vielen Dateien im Prozess-Pool
+            file_paths = list(scanner.files(project_path, suffixes=('.py',)))
+            for file_path, outline in zip(file_paths, scanner.map(python_outline, file_paths)):
+                if outline is None:
+                    continue
+                file_deps = {"file": os.path.relpath(file_path, project_path), **outline}
+                dependencies["files"].append(file_deps)
+                dependencies["imports"].extend(file_deps["imports"])
+                dependencies["functions"].extend(file_deps["functions"])
+                dependencies["classes"].extend(file_deps["classes"])
             
             # Entferne Duplikate
             dependencies["imports"] = list(set(dependencies["imports"]))
@@ -1547,11 +1631,11 @@ Sei proaktiv, gründlich und autonom. Löse Probleme komplett mit deinen erweite
                 
                 try:
                     # Use Moonshot's web search capability directly
-                    response = llm_manager.client.chat.completions.create(
-                        model=llm_manager.model,
-                        messages=cast(list[ChatCompletionMessageParam], messages),
-                        temperature=0.3
-                    )
+                    with caller_scope(f"{self.name}.search_web"):
+                        response = llm_manager.chat(
+                            messages=cast(list[ChatCompletionMessageParam], messages),
+                            temperature=0.3
+                        )
                     
                     answer = response.choices[0].message.content or "Keine Ergebnisse gefunden."
                     return {"status": "success", "results": answer, "query": query}
@@ -1573,35 +1657,4 @@ Sei proaktiv, gründlich und autonom. Löse Probleme komplett mit deinen erweite
 
     def get_chat_safe_tools(self) -> List[Dict[str, Any]]:
         """Gibt nur Chat-sichere Tools zurück (nur lesen, analysieren, suchen - keine Bearbeitung/Erstellung)."""
-        from tools.tool_definitions import get_tool_definitions
-        
-        all_tools = get_tool_definitions()
-        chat_safe_tool_names = {
-            # Nur lesende Tools
-            "list_directory", "read_file", "view_file", "list_dir", "view_code_item",
-            
-            # Nur Such-Tools
-            "codebase_search", "grep_search", "find_by_name",
-            
-            # Nur Web-Recherche
-            "read_url_content", "view_web_document_content_chunk", "search_web",
-            
-            # Nur Analyse-Tools (keine Erstellung)
-            "analyze_code_complexity", "detect_security_vulnerabilities", 
-            "analyze_dependencies", "profile_performance", "validate_architecture",
-            
-            # Nur Memory (keine Erstellung)
-            "create_memory", "suggested_responses",
-            
-            # Nur Benutzer-Interaktion
-            "ask_user_clarification"
-        }
-        
-        # Filtere nur Chat-sichere Tools
-        chat_safe_tools = []
-        for tool in all_tools:
-            tool_name = tool["function"]["name"]
-            if tool_name in chat_safe_tool_names:
-                chat_safe_tools.append(tool)
-        
-        return chat_safe_tools
+        return get_tool_definitions(chat_safe=True)
@@ -0,0 +1,3 @@
+"""
+Benchmarks der Orchestrierung gegen einen lokalen OpenAI-kompatiblen Stub-Server.
+"""
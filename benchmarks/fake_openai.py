@@ -0,0 +1,175 @@
+"""
+Lokaler OpenAI-kompatibler Stub-Server für Benchmarks.
+Beantwortet /v1/chat/completions (mit und ohne Streaming) und /v1/embeddings mit
+einstellbarer Latenz. Welche Antwort eine Anfrage erhält, entscheidet ein austauschbarer
+Responder, der Text oder Tool-Aufrufe liefert; so lassen sich Agenten-Läufe skripten.
+"""
+
+import hashlib
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+# Antwort des Responders: {"content": "..."} oder {"tool_calls": [{"name": ..., "arguments": {...}}]}
+Reply = Dict[str, Any]
+Responder = Callable[[Dict[str, Any]], Reply]
+
+EMBEDDING_DIMENSION = 1536
+STREAM_CHUNK_CHARS = 16
+
+
+def default_responder(request: Dict[str, Any]) -> Reply:
+    return {"content": "OK"}
+
+
+def _estimate_tokens(value: Any) -> int:
+    return max(1, len(json.dumps(value, ensure_ascii=False)) // 4)
+
+
+def _embedding(text: str) -> List[float]:
+    """Deterministischer Pseudo-Embedding-Vektor für einen Text."""
+    rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+    return [rng.uniform(-1.0, 1.0) for _ in range(EMBEDDING_DIMENSION)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "FakeOpenAIServer"
+
+    def log_message(self, format: str, *args: Any):
+        pass
+
+    def do_POST(self):
+        started = time.monotonic()
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        try:
+            if self.path.endswith("/chat/completions"):
+                self._chat(body)
+            elif self.path.endswith("/embeddings"):
+                self._embeddings(body)
+            else:
+                self._send_json({"error": {"message": f"Unbekannter Pfad {self.path}"}}, status=404)
+        finally:
+            self.server.record_request(self.path, time.monotonic() - started)
+
+    def _send_json(self, payload: Dict[str, Any], status: int = 200):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, payload: Any):
+        data = (f"data: {payload if isinstance(payload, str) else json.dumps(payload)}\n\n").encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _embeddings(self, body: Dict[str, Any]):
+        time.sleep(self.server.latency)
+        inputs = body.get("input")
+        inputs = inputs if isinstance(inputs, list) else [inputs]
+        self._send_json({
+            "object": "list",
+            "model": body.get("model"),
+            "data": [{"object": "embedding", "index": i, "embedding": _embedding(str(text))} for i, text in enumerate(inputs)],
+            "usage": {"prompt_tokens": _estimate_tokens(inputs), "total_tokens": _estimate_tokens(inputs)},
+        })
+
+    def _chat(self, body: Dict[str, Any]):
+        reply = self.server.responder(body)
+        tool_calls = [
+            {"id": f"call_{next(self.server.call_ids)}", "type": "function",
+             "function": {"name": call["name"], "arguments": json.dumps(call.get("arguments", {}))}}
+            for call in reply.get("tool_calls") or []
+        ]
+        content = reply.get("content") if not tool_calls else None
+        usage = {"prompt_tokens": _estimate_tokens(body.get("messages")), "completion_tokens": _estimate_tokens(reply)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        finish_reason = "tool_calls" if tool_calls else "stop"
+        time.sleep(self.server.latency)
+
+        base = {"id": "chatcmpl-bench", "created": int(time.time()), "model": body.get("model", "bench")}
+        if not body.get("stream"):
+            message: Dict[str, Any] = {"role": "assistant", "content": content}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            self._send_json({**base, "object": "chat.completion", "usage": usage,
+                             "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}]})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def chunk(delta: Dict[str, Any], finish: Optional[str] = None, **extra: Any):
+            self._write_chunk({**base, "object": "chat.completion.chunk", **extra,
+                               "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]})
+            time.sleep(self.server.chunk_latency)
+
+        chunk({"role": "assistant", "content": ""})
+        text = content or ""
+        for start in range(0, len(text), STREAM_CHUNK_CHARS):
+            chunk({"content": text[start:start + STREAM_CHUNK_CHARS]})
+        for index, call in enumerate(tool_calls):
+            chunk({"tool_calls": [{"index": index, "id": call["id"], "type": "function",
+                                   "function": {"name": call["function"]["name"], "arguments": ""}}]})
+            chunk({"tool_calls": [{"index": index, "function": {"arguments": call["function"]["arguments"]}}]})
+        chunk({}, finish_reason, usage=usage)
+        self._write_chunk("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """Stub-Server im Hintergrund-Thread; Latenz und Responder lassen sich zur Laufzeit ändern.
+
+    latency wird vor jeder Antwort abgewartet, chunk_latency zusätzlich nach jedem Stream-Chunk.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.0, chunk_latency: float = 0.0,
+                 responder: Responder = default_responder, port: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        self.chunk_latency = chunk_latency
+        self.responder = responder
+        self.call_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.reset_stats()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def record_request(self, path: str, duration: float):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["server_seconds"] += duration
+            self.stats["paths"][path] = self.stats["paths"].get(path, 0) + 1
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats: Dict[str, Any] = {"requests": 0, "server_seconds": 0.0, "paths": {}}
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any):
+        self.stop()
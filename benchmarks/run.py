@@ -0,0 +1,185 @@
+"""
+Benchmark-Lauf gegen den lokalen Stub-Server.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --scenario tool_agent --latency 0.05 --compare results.json
+
+Misst Latenz und Durchsatz der Szenarien aus benchmarks/scenarios.py bei mehreren Größen und
+schreibt die Ergebnisse als JSON, das sich zwischen Commits vergleichen lässt. overhead_ms ist
+die Laufzeit abzüglich der Zeit, die der Stub-Server mit Antworten verbracht hat.
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import click
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+# Die Szenarien laufen in einem temporären Arbeitsverzeichnis; Importe bleiben auf das Repo bezogen
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.scenarios import SCENARIOS, Scenario
+
+
+def configure_environment(server: FakeOpenAIServer, workdir: Path):
+    """Richtet alle LLM-Aufrufe auf den Stub-Server aus; muss vor dem Import von llm erfolgen."""
+    os.environ.update({
+        "SETUP_COMPLETED": "true",
+        "LLM_PROVIDER": "openai",
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": server.base_url,
+        "STATE_DIR": str(workdir / "state"),
+        "LLM_CACHE": "0",
+        "LLM_TELEMETRY": "0",
+        "LLM_ROUTING": "0",
+        "LLM_CASSETTE": "off",
+        "LLM_RPM": str(10 ** 9),
+        "LLM_TPM": str(10 ** 12),
+        "DEBUG": "0",
+    })
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(scenario: Scenario, size: int, server: FakeOpenAIServer, workdir: Path,
+            repeat: int, warmup: int) -> Dict[str, Any]:
+    """Führt ein Szenario bei einer Größe mehrfach aus und fasst die Messungen zusammen."""
+    from runtime.telemetry import percentile
+
+    server.responder = scenario.responder(size)
+    state = scenario.setup(size, workdir)
+    durations: List[float] = []
+    overheads: List[float] = []
+    requests: List[int] = []
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for i in range(warmup + repeat):
+            server.reset_stats()
+            started = time.perf_counter()
+            scenario.run(state)
+            duration = time.perf_counter() - started
+            if i < warmup:
+                continue
+            durations.append(duration * 1000)
+            overheads.append((duration - server.stats["server_seconds"]) * 1000)
+            requests.append(server.stats["requests"])
+
+    median = statistics.median(durations)
+    return {
+        "scenario": scenario.name,
+        "size": size,
+        "size_label": scenario.size_label,
+        "runs": repeat,
+        "median_ms": round(median, 3),
+        "p95_ms": round(percentile(durations, 0.95), 3),
+        "min_ms": round(min(durations), 3),
+        "mean_ms": round(statistics.mean(durations), 3),
+        "ops_per_s": round(1000 / median, 3) if median else None,
+        "overhead_ms": round(statistics.median(overheads), 3),
+        "llm_requests": statistics.median(requests),
+    }
+
+
+def compare(baseline: Dict[str, Any], results: List[Dict[str, Any]], tolerance: float) -> List[Dict[str, Any]]:
+    """Vergleicht Medianzeiten mit einem früheren Lauf; liefert die Regressionen über der Toleranz."""
+    previous = {(entry["scenario"], entry["size"]): entry for entry in baseline.get("results", [])}
+    regressions = []
+    for entry in results:
+        before = previous.get((entry["scenario"], entry["size"]))
+        if not before or not before["median_ms"]:
+            continue
+        entry["baseline_median_ms"] = before["median_ms"]
+        entry["ratio"] = round(entry["median_ms"] / before["median_ms"], 3)
+        if entry["ratio"] > 1 + tolerance or entry["llm_requests"] > before["llm_requests"]:
+            regressions.append(entry)
+    return regressions
+
+
+def print_results(results: List[Dict[str, Any]]):
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title="Benchmark-Ergebnisse")
+    for column in ("Szenario", "Größe", "Median ms", "p95 ms", "Overhead ms", "ops/s", "LLM-Anfragen", "vs. Basis"):
+        table.add_column(column, justify="left" if column == "Szenario" else "right")
+    for entry in results:
+        table.add_row(
+            entry["scenario"], f"{entry['size']} {entry['size_label']}", f"{entry['median_ms']:.1f}",
+            f"{entry['p95_ms']:.1f}", f"{entry['overhead_ms']:.1f}", f"{entry['ops_per_s']:.2f}",
+            f"{entry['llm_requests']:g}", f"{entry['ratio']:.2f}x" if "ratio" in entry else "-"
+        )
+    Console().print(table)
+
+
+@click.command()
+@click.option("--scenario", "scenario_names", multiple=True, type=click.Choice(sorted(SCENARIOS)),
+              help="Nur diese Szenarien ausführen (mehrfach angebbar).")
+@click.option("--sizes", default=None, help="Kommagetrennte Größen statt der Standardgrößen je Szenario.")
+@click.option("--repeat", default=5, show_default=True, help="Gemessene Durchläufe pro Größe.")
+@click.option("--warmup", default=1, show_default=True, help="Ungemessene Durchläufe vor der Messung.")
+@click.option("--latency", default=0.0, show_default=True, help="Antwortlatenz des Stub-Servers in Sekunden.")
+@click.option("--chunk-latency", default=0.0, show_default=True, help="Zusätzliche Latenz pro Stream-Chunk in Sekunden.")
+@click.option("--output", "-o", type=click.Path(dir_okay=False), default=None, help="Ergebnisse als JSON speichern.")
+@click.option("--compare", "baseline_path", type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Mit einem früheren JSON-Ergebnis vergleichen.")
+@click.option("--tolerance", default=0.2, show_default=True, help="Erlaubte Verlangsamung gegenüber der Basis (0.2 = 20 %).")
+def main(scenario_names, sizes, repeat, warmup, latency, chunk_latency, output, baseline_path, tolerance):
+    """Misst die Orchestrierung gegen einen lokalen OpenAI-kompatiblen Stub-Server."""
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8")) if baseline_path else None
+    output_path = Path(output).resolve() if output else None
+    selected = [SCENARIOS[name] for name in scenario_names or SCENARIOS]
+    workdir = Path(tempfile.mkdtemp(prefix="codenova-bench-"))
+
+    with FakeOpenAIServer(latency=latency, chunk_latency=chunk_latency) as server:
+        configure_environment(server, workdir)
+        # Projekte und Dateien der Szenarien landen im temporären Verzeichnis
+        os.chdir(workdir)
+        results = []
+        for scenario in selected:
+            for size in [int(value) for value in sizes.split(",")] if sizes else scenario.sizes:
+                click.echo(f"▶ {scenario.name} ({size} {scenario.size_label})", err=True)
+                results.append(measure(scenario, size, server, workdir, repeat, warmup))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency": latency,
+            "chunk_latency": chunk_latency,
+            "repeat": repeat,
+            "warmup": warmup,
+        },
+        "results": results,
+    }
+    regressions = compare(baseline, results, tolerance) if baseline else []
+    print_results(results)
+    if output_path:
+        output_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        click.echo(f"Ergebnisse gespeichert: {output_path}", err=True)
+    if regressions:
+        for entry in regressions:
+            click.echo(f"⚠️  Regression: {entry['scenario']} ({entry['size']}) {entry['ratio']:.2f}x", err=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Benchmark-Szenarien für die Orchestrierung.
+Jedes Szenario bereitet pro Größe seinen Zustand vor (setup), liefert den Responder für den
+Stub-Server und führt einen gemessenen Durchlauf aus (run). Module mit LLM-Bezug werden erst
+innerhalb der Funktionen importiert, nachdem run.py die Umgebung auf den Stub-Server umgestellt hat.
+"""
+
+import itertools
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+from benchmarks.fake_openai import Responder, default_responder
+
+SOURCE_FILES = 20
+_project_ids = itertools.count(1)
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    sizes: Tuple[int, ...]
+    size_label: str
+    setup: Callable[[int, Path], Any]
+    run: Callable[[Any], Any]
+    responder: Callable[[int], Responder]
+
+
+def _last_user_message(request: Dict[str, Any]) -> str:
+    for message in reversed(request.get("messages") or []):
+        if message.get("role") == "user":
+            return str(message.get("content") or "")
+    return ""
+
+
+# --- ToolAgent: n Runden mit je zwei parallelen lesenden Tool-Aufrufen -------------------------
+
+def _setup_tool_agent(size: int, workdir: Path) -> Dict[str, Any]:
+    source_dir = workdir / "bench_src"
+    source_dir.mkdir(exist_ok=True)
+    for i in range(SOURCE_FILES):
+        (source_dir / f"module_{i}.py").write_text(
+            "\n".join(f"def function_{j}(value):\n    return value * {j}\n" for j in range(50)), encoding="utf-8"
+        )
+    return {"size": size, "source_dir": str(source_dir)}
+
+
+def _tool_agent_responder(size: int) -> Responder:
+    def respond(request: Dict[str, Any]) -> Dict[str, Any]:
+        rounds = sum(1 for message in request.get("messages") or [] if message.get("tool_calls"))
+        if rounds >= size:
+            return {"content": "Die Analyse ist abgeschlossen. " * 8}
+        # Der Pfad steht in der Aufgabe, damit der Responder ohne gemeinsamen Zustand auskommt
+        source_dir = _last_user_message(request).rsplit(" ", 1)[-1]
+        return {"tool_calls": [
+            {"name": "list_dir", "arguments": {"DirectoryPath": source_dir}},
+            {"name": "read_file", "arguments": {"path": f"{source_dir}/module_{rounds % SOURCE_FILES}.py"}},
+        ]}
+    return respond
+
+
+def _run_tool_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+    from agents.base_agent import Task
+    from agents.tool_agent import ToolAgent
+
+    agent = ToolAgent(chat_mode=True, on_stream_event=lambda event: None)
+    result = agent.process_task(Task(f"Analysiere die Module in {state['source_dir']}", "chat"))
+    if result["status"] != "completed":
+        raise RuntimeError(f"ToolAgent-Lauf fehlgeschlagen: {result}")
+    return result
+
+
+# --- CodeNova.build_project: Plan mit n Quelldateien -------------------------------------------
+
+def _setup_build_project(size: int, workdir: Path) -> Dict[str, Any]:
+    from main import CodeNova
+    return {"size": size, "app": CodeNova()}
+
+
+def _build_project_responder(size: int) -> Responder:
+    plan = {"files": [
+        {"path": f"src/module_{i}.py", "description": f"Modul {i} mit einer Rechenfunktion.",
+         "is_test_file": False, "tests_for": None}
+        for i in range(size)
+    ]}
+
+    def respond(request: Dict[str, Any]) -> Dict[str, Any]:
+        prompt = _last_user_message(request)
+        if "development plan" in prompt:
+            return {"content": json.dumps(plan)}
+        if "Erstelle eine vollständige Datei" in prompt:
+            return {"content": "```python\ndef run(value):\n    return value * 2\n```"}
+        if "Analysiere folgende Anforderungen" in prompt:
+            return {"content": json.dumps({"summary": "Rechenprojekt", "language": "python"})}
+        return {"content": "Projekt erstellt. Start mit `python src/module_0.py`."}
+    return respond
+
+
+def _run_build_project(state: Dict[str, Any]):
+    state["app"].build_project(f"bench-build-{state['size']}-{next(_project_ids)}", "Ein kleines Rechenprojekt in Python")
+
+
+# --- Debugger.debug_project: n Reparaturversuche mit erneutem Testlauf -------------------------
+
+FAILING_TEST = "def test_add():\n    from src.calc import add\n    assert add(1, 1) == 3\n"
+FIXED_CODE = "def add(a, b):\n    return a + b\n"
+
+
+def _setup_debug_project(size: int, workdir: Path) -> Dict[str, Any]:
+    from agents.debugger import Debugger
+    from agents.test_runner import TestRunner
+    from tools.file_tools import file_manager
+
+    name = f"bench-debug-{size}"
+    project_path = file_manager.create_project_structure(name)
+    (project_path / "src").mkdir(exist_ok=True)
+    (project_path / "tests").mkdir(exist_ok=True)
+    (project_path / "src" / "calc.py").write_text(FIXED_CODE, encoding="utf-8")
+    (project_path / "tests" / "test_calc.py").write_text(FAILING_TEST, encoding="utf-8")
+    project_info = {"name": name, "path": str(project_path)}
+    return {"size": size, "debugger": Debugger(), "project_info": project_info,
+            "test_results": TestRunner().run_tests(str(project_path))}
+
+
+def _debug_project_responder(size: int) -> Responder:
+    def respond(request: Dict[str, Any]) -> Dict[str, Any]:
+        if "Analysiere folgenden Fehler" in _last_user_message(request):
+            # Der "Fix" ändert nichts am fehlschlagenden Test, daher laufen alle n Versuche
+            return {"content": json.dumps({"fixed_code": FIXED_CODE})}
+        return default_responder(request)
+    return respond
+
+
+def _run_debug_project(state: Dict[str, Any]):
+    state["debugger"].debug_project(state["project_info"], state["test_results"], max_retries=state["size"])
+
+
+# --- VectorMemory.search_similar: Index mit n Einträgen ----------------------------------------
+
+def _setup_vector_search(size: int, workdir: Path):
+    import numpy as np
+    from memory.vector_store import VectorMemory
+
+    memory = VectorMemory(str(workdir / f"vector_memory_{size}"))
+    vectors = np.random.default_rng(size).uniform(-1.0, 1.0, (size, memory.dimension)).astype(np.float32)
+    memory.index.add(vectors)
+    memory.metadata = [{"content": f"Erinnerung {i}", "type": "benchmark", "id": i} for i in range(size)]
+    return memory
+
+
+def _run_vector_search(memory: Any):
+    if not memory.search_similar("Wie funktioniert der Antwort-Cache?", k=5):
+        raise RuntimeError("search_similar lieferte keine Ergebnisse")
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    scenario.name: scenario for scenario in (
+        Scenario("tool_agent", (1, 4, 8), "tool_rounds", _setup_tool_agent, _run_tool_agent, _tool_agent_responder),
+        Scenario("build_project", (1, 4, 8), "files", _setup_build_project, _run_build_project, _build_project_responder),
+        Scenario("debug_project", (1, 2, 3), "retries", _setup_debug_project, _run_debug_project, _debug_project_responder),
+        Scenario("vector_search", (100, 1000, 10000), "memories", _setup_vector_search, _run_vector_search,
+                 lambda size: default_responder),
+    )
+}
@@ -1,7 +1,7 @@
 import os
 from pathlib import Path
 from dotenv import load_dotenv, set_key
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 
 # Lade Umgebungsvariablen aus .env, falls vorhanden
 dotenv_path = Path(__file__).parent.parent / ".env"
@@ -57,29 +57,152 @@ TEMPERATURE = float(os.getenv("TEMPERATURE", "0.1"))
 MAX_TOKENS = int(os.getenv("MAX_TOKENS", "4000"))
 
 # System-Einstellungen
-AGENT_TIMEOUT = 300
-MAX_RETRIES = 3
+AGENT_TIMEOUT = int(os.getenv("AGENT_TIMEOUT", "300"))  # Sekunden pro Aufgabe
+AGENT_MAX_STEPS = int(os.getenv("AGENT_MAX_STEPS", "10"))  # LLM-Schritte pro Aufgabe
+AGENT_MAX_TOKENS = int(os.getenv("AGENT_MAX_TOKENS", "0"))  # Prompt- + Completion-Tokens pro Aufgabe (0 = unbegrenzt)
+AGENT_MAX_TOOL_SECONDS = float(os.getenv("AGENT_MAX_TOOL_SECONDS", "0"))  # Tool-Laufzeit pro Aufgabe (0 = unbegrenzt)
+MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
+TOOL_MAX_WORKERS = int(os.getenv("TOOL_MAX_WORKERS", "8"))  # Parallele lesende Tool-Aufrufe
+TOOL_CACHE_DIR_TTL = float(os.getenv("TOOL_CACHE_DIR_TTL", "30"))  # Sekunden, die Verzeichnis-Ergebnisse ohne Tiefenprüfung gelten
+TOOL_OUTPUT_MAX_CHARS = int(os.getenv("TOOL_OUTPUT_MAX_CHARS", "12000"))  # Größere Ausgaben werden seitenweise geliefert
+TOOL_PREFETCH = os.getenv("TOOL_PREFETCH", "1").lower() in ("1", "true", "yes")  # Dateien nach Auflistungen/Suchen vorladen
+TOOL_PREFETCH_MAX_FILES = int(os.getenv("TOOL_PREFETCH_MAX_FILES", "5"))  # Vorgeladene Dateien pro Tool-Ergebnis
+CHAT_HISTORY_SHARE = float(os.getenv("CHAT_HISTORY_SHARE", "0.5"))  # Anteil des Kontextbudgets für den Chat-Verlauf
+CHAT_KEEP_TURNS = int(os.getenv("CHAT_KEEP_TURNS", "2"))  # Letzte Chat-Runden, die nie komprimiert werden
 DEBUG_MODE = os.getenv("DEBUG", "0").lower() in ("1", "true", "yes")
 
+# Antwort-Cache für LLM-Aufrufe (LLM_CACHE=0 schaltet ihn ab)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1").lower() in ("1", "true", "yes")
+LLM_CACHE_PATH = Path(os.getenv("LLM_CACHE_PATH", str(MEMORY_DIR / "llm_cache.sqlite3")))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_MAX_SIZE_MB = float(os.getenv("LLM_CACHE_MAX_SIZE_MB", "100"))
+LLM_CACHE_MAX_AGE = int(os.getenv("LLM_CACHE_MAX_AGE", str(7 * 24 * 3600)))  # Sekunden
+
+# Kontextfenster für Modelle ohne Eintrag in AVAILABLE_PROVIDERS["..."]["context_windows"]
+DEFAULT_CONTEXT_WINDOW = int(os.getenv("DEFAULT_CONTEXT_WINDOW", "8192"))
+
+# Gemeinsamer HTTP-Verbindungspool für Chat-, LangChain- und Embedding-Aufrufe
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))  # Sekunden
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "600"))  # Sekunden
+HTTP2_ENABLED = os.getenv("HTTP2", "1").lower() in ("1", "true", "yes")
+
+# Maximale Anzahl paralleler LLM-Anfragen pro Provider (überschreibt "max_concurrency")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "0"))
+
+# Rate-Limits pro Minute (überschreiben "rate_limits" des Providers, 0 = Provider-Standard)
+LLM_RPM = int(os.getenv("LLM_RPM", "0"))
+LLM_TPM = int(os.getenv("LLM_TPM", "0"))
+
+# Routing über mehrere Provider (opt-in): Hedging und Failover auf Ausweich-Provider
+LLM_ROUTING_ENABLED = os.getenv("LLM_ROUTING", "0").lower() in ("1", "true", "yes")
+# Kommagetrennt, optional mit Modell: "openrouter,moonshot:moonshot-v1-32k"
+LLM_FALLBACK_PROVIDERS = [entry.strip() for entry in os.getenv("LLM_FALLBACK_PROVIDERS", "").split(",") if entry.strip()]
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+LLM_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DELAY", "15"))  # Sekunden, solange zu wenige Messwerte vorliegen
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+# Modell-Stufen: "fast" für kurze Klassifikations-/Benennungsaufrufe, "standard" und "large"
+# verwenden ohne eigene Konfiguration das eingestellte Modell des Providers
+MODEL_TIERS = ("fast", "standard", "large")
+# Stufe pro Aufrufstelle; überschreibbar per LLM_CALL_SITE_TIERS="intent=standard,chat=fast"
+CALL_SITE_TIERS = {
+    "intent": "fast",
+    "project_name": "fast",
+    "requirements": "standard",
+    "chat": "standard",
+    "testing": "standard",
+    "planning": "large",
+    "code_generation": "large",
+    "debugging": "large",
+    "tool_agent": "large",
+}
+for _entry in os.getenv("LLM_CALL_SITE_TIERS", "").split(","):
+    _site, _, _tier = _entry.partition("=")
+    if _tier.strip() in MODEL_TIERS:
+        CALL_SITE_TIERS[_site.strip()] = _tier.strip()
+
+# Telemetrie der LLM-Aufrufe (rotierende JSONL-Dateien im Zustandsverzeichnis)
+STATE_DIR = Path(os.getenv("STATE_DIR", "/state"))
+LLM_TELEMETRY_ENABLED = os.getenv("LLM_TELEMETRY", "1").lower() in ("1", "true", "yes")
+LLM_TELEMETRY_MAX_BYTES = int(os.getenv("LLM_TELEMETRY_MAX_BYTES", str(5 * 1024 * 1024)))
+LLM_TELEMETRY_BACKUPS = int(os.getenv("LLM_TELEMETRY_BACKUPS", "3"))
+# Aufzeichnen/Abspielen von LLM-Anfragen für Offline-Benchmarks: "off", "record" oder "replay"
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE", "off").lower()
+LLM_CASSETTE_PATH = Path(os.getenv("LLM_CASSETTE_PATH", str(STATE_DIR / "llm_cassette.jsonl")))
+LLM_CASSETTE_LATENCY = float(os.getenv("LLM_CASSETTE_LATENCY", "0"))  # Faktor für die aufgezeichnete Dauer beim Abspielen
+# Persistenter Trigramm-Index für grep_search, search_code und search_files
+SEARCH_INDEX_ENABLED = os.getenv("SEARCH_INDEX", "1").lower() in ("1", "true", "yes")
+SEARCH_INDEX_DIR = Path(os.getenv("SEARCH_INDEX_DIR", str(STATE_DIR / "search_index")))
+SEARCH_INDEX_MAX_FILE_BYTES = int(os.getenv("SEARCH_INDEX_MAX_FILE_BYTES", str(4 * 1024 * 1024)))  # Größere Dateien sind immer Kandidaten
+SEARCH_INDEX_MAX_SIZE_MB = float(os.getenv("SEARCH_INDEX_MAX_SIZE_MB", "512"))  # Darüber werden die am längsten ungenutzten Indizes gelöscht
+SEARCH_INDEX_MAX_AGE = int(os.getenv("SEARCH_INDEX_MAX_AGE", str(30 * 24 * 3600)))  # Sekunden ohne Nutzung (0 = unbegrenzt)
+SEARCH_INDEX_REFRESH_INTERVAL = float(os.getenv("SEARCH_INDEX_REFRESH_INTERVAL", "2"))  # Sekunden zwischen zwei Abgleichen eines Verzeichnisses
+# Datei-Scanner: Ignore-Dateien (gitignore-Syntax) und Prozess-Pool für Lesen und Regex-Suche
+SCAN_IGNORE_FILES = [name.strip() for name in os.getenv("SCAN_IGNORE_FILES", ".gitignore,.ignore,.codenovaignore").split(",") if name.strip()]
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "0"))  # 0 = Anzahl der CPU-Kerne
+SCAN_MIN_PARALLEL_FILES = int(os.getenv("SCAN_MIN_PARALLEL_FILES", "200"))  # Darunter wird im eigenen Prozess gelesen
+SCAN_MMAP_MIN_BYTES = int(os.getenv("SCAN_MMAP_MIN_BYTES", str(1024 * 1024)))  # Ab dieser Größe wird per mmap gesucht
+SCAN_MAX_FILE_BYTES = int(os.getenv("SCAN_MAX_FILE_BYTES", "0"))  # Größere Dateien werden nicht durchsucht (0 = unbegrenzt)
+# Abbruchgrenzen der Suchtools; Ergebnisse werden dann als gekürzt markiert
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "200"))  # Treffer pro Suche, danach wird abgebrochen (0 = unbegrenzt)
+SEARCH_MAX_FILES = int(os.getenv("SEARCH_MAX_FILES", "50"))  # Dateien mit Treffern pro Suche (0 = unbegrenzt)
+SEARCH_TIME_BUDGET = float(os.getenv("SEARCH_TIME_BUDGET", "10"))  # Sekunden pro Suche (0 = unbegrenzt)
+# Verlauf der Agenten-Schritte (nur bei DEBUG_MODE)
+AGENT_TRACE_MAX_BYTES = int(os.getenv("AGENT_TRACE_MAX_BYTES", str(20 * 1024 * 1024)))
+AGENT_TRACE_BACKUPS = int(os.getenv("AGENT_TRACE_BACKUPS", "3"))
+
+# Intent-Erkennung im Auto-Modus: "heuristic" (lokal, LLM nur bei Unsicherheit) oder "llm"
+INTENT_CLASSIFIER = os.getenv("INTENT_CLASSIFIER", "heuristic").lower()
+
 # Verfügbare LLM-Provider (alle OpenAI-kompatibel)
 AVAILABLE_PROVIDERS = {
     "openai": {
         "name": "OpenAI",
-        "models": ["gpt-4-turbo", "gpt-4o", "gpt-3.5-turbo"],
+        "models": ["gpt-4-turbo", "gpt-4o", "gpt-4o-mini", "gpt-3.5-turbo"],
         "api_key_env": "OPENAI_API_KEY",
-        "api_base_url": "https://api.openai.com/v1"
+        "api_base_url": os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
+        "max_concurrency": 8,
+        "rate_limits": {"rpm": 500, "tpm": 150000},
+        "model_tiers": {"fast": "gpt-4o-mini"},
+        # Geschätzte Preise in USD pro 1 Mio. Tokens (Eingabe, Ausgabe)
+        "prices": {
+            "gpt-4-turbo": (10.0, 30.0), "gpt-4-turbo-preview": (10.0, 30.0), "gpt-4o": (2.5, 10.0),
+            "gpt-4o-mini": (0.15, 0.6), "gpt-3.5-turbo": (0.5, 1.5)
+        },
+        "context_windows": {
+            "gpt-4-turbo": 128000, "gpt-4-turbo-preview": 128000, "gpt-4o": 128000,
+            "gpt-4o-mini": 128000, "gpt-3.5-turbo": 16385
+        }
     },
     "openrouter": {
         "name": "OpenRouter",
         "models": ["anthropic/claude-3.5-sonnet", "anthropic/claude-3-haiku", "google/gemini-pro-1.5", "mistralai/mistral-large"],
         "api_key_env": "OPENROUTER_API_KEY",
-        "api_base_url": "https://openrouter.ai/api/v1"
+        "api_base_url": os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
+        "max_concurrency": 8,
+        "rate_limits": {"rpm": 200, "tpm": 0},
+        "model_tiers": {"fast": "anthropic/claude-3-haiku"},
+        "prices": {
+            "anthropic/claude-3.5-sonnet": (3.0, 15.0), "anthropic/claude-3-haiku": (0.25, 1.25),
+            "google/gemini-pro-1.5": (1.25, 5.0), "mistralai/mistral-large": (2.0, 6.0)
+        },
+        "context_windows": {
+            "anthropic/claude-3.5-sonnet": 200000, "anthropic/claude-3-haiku": 200000,
+            "google/gemini-pro-1.5": 1000000, "mistralai/mistral-large": 128000
+        }
     },
     "moonshot": {
         "name": "Moonshot (Kimi)",
         "models": ["moonshot-v1-8k", "moonshot-v1-32k", "moonshot-v1-128k"],
         "api_key_env": "MOONSHOT_API_KEY",
-        "api_base_url": "https://api.moonshot.ai/v1"
+        "api_base_url": os.getenv("MOONSHOT_BASE_URL", "https://api.moonshot.ai/v1"),
+        "max_concurrency": 4,
+        "rate_limits": {"rpm": 200, "tpm": 128000},
+        "model_tiers": {"fast": "moonshot-v1-8k"},
+        "prices": {"moonshot-v1-8k": (0.2, 2.0), "moonshot-v1-32k": (1.0, 3.0), "moonshot-v1-128k": (2.0, 5.0)},
+        "context_windows": {"moonshot-v1-8k": 8192, "moonshot-v1-32k": 32768, "moonshot-v1-128k": 131072}
     }
 }
 
@@ -94,7 +217,10 @@ def get_current_provider_config() -> Dict[str, Any]:
 
 def get_current_model() -> str:
     """Hole das aktuell konfigurierte Modell."""
-    provider = os.getenv("LLM_PROVIDER", "openai").lower()
+    return get_provider_model(os.getenv("LLM_PROVIDER", "openai").lower())
+
+def get_provider_model(provider: str) -> str:
+    """Hole das konfigurierte Modell eines Providers."""
     if provider == "openai":
         return os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview")
     elif provider == "openrouter":
@@ -104,6 +230,27 @@ def get_current_model() -> str:
     else:
         return os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview")
 
+def get_tier_model(provider: str, tier: str) -> str:
+    """Hole das Modell einer Stufe (Umgebungsvariable LLM_MODEL_<STUFE> hat Vorrang)."""
+    model = os.getenv(f"LLM_MODEL_{tier.upper()}")
+    if model:
+        return model
+    tiers = AVAILABLE_PROVIDERS.get(provider, {}).get("model_tiers", {})
+    return tiers.get(tier) or get_provider_model(provider)
+
+def get_call_site_model(provider: str, call_site: str) -> str:
+    """Hole das Modell für eine Aufrufstelle; unbekannte Aufrufstellen verwenden die Standard-Stufe."""
+    return get_tier_model(provider, CALL_SITE_TIERS.get(call_site, "standard"))
+
+def get_model_price(provider: str, model: str) -> Optional[Tuple[float, float]]:
+    """Hole den geschätzten Preis (USD pro 1 Mio. Eingabe-/Ausgabe-Tokens) eines Modells."""
+    return AVAILABLE_PROVIDERS.get(provider, {}).get("prices", {}).get(model)
+
+def get_context_window(provider: str, model: str) -> int:
+    """Hole die Größe des Kontextfensters (in Tokens) für ein Modell."""
+    windows = AVAILABLE_PROVIDERS.get(provider, {}).get("context_windows", {})
+    return windows.get(model, DEFAULT_CONTEXT_WINDOW)
+
 def validate_configuration() -> bool:
     """Validiere die aktuelle Konfiguration."""
     if not is_configured():
@@ -1,21 +1,103 @@
 import os
-from typing import List, Dict, Any, Optional, TypedDict
-from openai import OpenAI, types
+import time
+import asyncio
+import weakref
+from typing import List, Dict, Any, Iterator, Optional, TypedDict
+from openai import OpenAI, AsyncOpenAI, types
+from openai.types.chat import ChatCompletion
 from langchain_openai import ChatOpenAI
 from langchain.schema import SystemMessage, HumanMessage, AIMessage
 from pydantic import SecretStr
 
 from config.settings import (
-    LLM_PROVIDER, TEMPERATURE, MAX_TOKENS, 
-    get_current_provider_config, get_current_model, validate_configuration
+    LLM_PROVIDER, TEMPERATURE, MAX_TOKENS, AVAILABLE_PROVIDERS,
+    get_current_provider_config, get_current_model, get_call_site_model, validate_configuration
 )
+from memory.response_cache import ResponseCache, make_request_key
+from runtime.executor import request_executor
+from runtime.http_pool import get_http_client, get_async_http_client, aclose_async_http_client
+from runtime.context_window import ContextWindowManager, count_message_tokens, count_tools_tokens, count_tokens
+from runtime.scheduler import rate_limit_scheduler
+from runtime.routing import ProviderRouter, Route, is_last_route
+from runtime.telemetry import llm_telemetry
+from runtime.singleflight import SingleFlight
+from runtime.cassette import llm_cassette
+
+API_ERROR_PREFIX = "Fehler bei API-Aufruf"
 
 class ChatMessage(TypedDict):
     role: str
     content: str
 
+def is_error_response(text: str) -> bool:
+    """Prüft, ob generate_response() statt einer Antwort eine Fehlermeldung geliefert hat."""
+    return text.startswith(API_ERROR_PREFIX)
+
+class StreamedMessage:
+    """Setzt eine gestreamte Antwort inklusive Tool-Aufrufen schrittweise zusammen."""
+
+    def __init__(self):
+        self.content_parts: List[str] = []
+        self.tool_calls: Dict[int, Dict[str, Any]] = {}
+        self.finish_reason: Optional[str] = None
+        self.usage: Any = None
+
+    def add_chunk(self, chunk: Any) -> List[Dict[str, Any]]:
+        """Verarbeitet einen Stream-Chunk und liefert die daraus entstehenden Ereignisse."""
+        events: List[Dict[str, Any]] = []
+        # Manche Provider senden den Verbrauch im letzten Chunk mit
+        if getattr(chunk, "usage", None):
+            self.usage = chunk.usage
+        for choice in chunk.choices:
+            delta = choice.delta
+            if choice.finish_reason:
+                self.finish_reason = choice.finish_reason
+            if delta is None:
+                continue
+            if delta.content:
+                self.content_parts.append(delta.content)
+                events.append({"type": "content", "text": delta.content})
+            for tool_delta in delta.tool_calls or []:
+                entry = self.tool_calls.setdefault(tool_delta.index, {
+                    "id": "",
+                    "type": "function",
+                    "function": {"name": "", "arguments": ""}
+                })
+                if tool_delta.id:
+                    entry["id"] = tool_delta.id
+                if tool_delta.function:
+                    # Name und Argumente kommen fragmentiert und werden aneinandergehängt
+                    entry["function"]["name"] += tool_delta.function.name or ""
+                    entry["function"]["arguments"] += tool_delta.function.arguments or ""
+                events.append({
+                    "type": "tool_call_delta",
+                    "index": tool_delta.index,
+                    "name": entry["function"]["name"],
+                    "arguments": entry["function"]["arguments"]
+                })
+        return events
+
+    @property
+    def content(self) -> str:
+        return "".join(self.content_parts)
+
+    def to_message(self) -> Dict[str, Any]:
+        """Liefert die vollständige Assistenten-Nachricht im Format der Chat-API."""
+        message: Dict[str, Any] = {"role": "assistant", "content": self.content or None}
+        if self.tool_calls:
+            message["tool_calls"] = [self.tool_calls[index] for index in sorted(self.tool_calls)]
+        return message
+
 class LLMManager:
     def __init__(self):
+        self.response_cache = ResponseCache()
+        self.executor = request_executor
+        self.scheduler = rate_limit_scheduler
+        self.router = ProviderRouter()
+        self.telemetry = llm_telemetry
+        self.inflight = SingleFlight()
+        self.cassette = llm_cassette
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncOpenAI]]" = weakref.WeakKeyDictionary()
         self.reload_config()
     
     def reload_config(self):
@@ -27,20 +109,46 @@ class LLMManager:
         self.provider = os.getenv("LLM_PROVIDER", "openai").lower()
         self.model = get_current_model()
         self.provider_config = get_current_provider_config()
+        self.context_manager = ContextWindowManager(self.provider, self.model)
+        self.router.configure(self.provider, self.model)
         
         # Initialisiere Client
         self.client = self._initialize_client()
         self.langchain_llm = self._initialize_langchain_llm()
+        self._async_clients = weakref.WeakKeyDictionary()
     
-    def _get_client_args(self) -> Dict[str, Any]:
-        """Erstellt die Argumente für den OpenAI-Client."""
-        api_key = os.getenv(self.provider_config["api_key_env"], "")
-        base_url = self.provider_config["api_base_url"]
+    def _get_client_args(self, provider: Optional[str] = None) -> Dict[str, Any]:
+        """Erstellt die Argumente für den OpenAI-Client (standardmäßig des aktuellen Providers)."""
+        provider_config = AVAILABLE_PROVIDERS[provider] if provider else self.provider_config
+        api_key = os.getenv(provider_config["api_key_env"], "")
+        base_url = provider_config["api_base_url"]
         return {"api_key": api_key, "base_url": base_url}
 
     def _initialize_client(self) -> OpenAI:
         """Initialisiere den OpenAI-kompatiblen Client."""
-        return OpenAI(**self._get_client_args())
+        # Wiederholungen übernimmt der RateLimitScheduler
+        return OpenAI(**self._get_client_args(), http_client=get_http_client(), max_retries=0)
+
+    def _get_async_client(self, provider: Optional[str] = None) -> AsyncOpenAI:
+        """Hole den asynchronen Client eines Providers für die laufende Event-Loop."""
+        # Verbindungen eines AsyncOpenAI-Clients gehören zu genau einer Event-Loop
+        provider = provider or self.provider
+        per_loop = self._async_clients.setdefault(asyncio.get_running_loop(), {})
+        client = per_loop.get(provider)
+        if client is None:
+            client = AsyncOpenAI(**self._get_client_args(provider), http_client=get_async_http_client(), max_retries=0)
+            per_loop[provider] = client
+        return client
+
+    async def aclose_async_clients(self):
+        """Schließt die Clients und Verbindungen der laufenden Event-Loop.
+
+        Für kurzlebige Loops (asyncio.run): ohne aclose bleiben Verbindungen offen und werden erst
+        beim Aufräumen nach dem Ende der Loop mit "Event loop is closed" verworfen.
+        """
+        for client in self._async_clients.pop(asyncio.get_running_loop(), {}).values():
+            await client.close()
+        await aclose_async_http_client()
     
     def _initialize_langchain_llm(self) -> ChatOpenAI:
         """Initialisiere LangChain LLM für den aktuellen Provider."""
@@ -49,7 +157,8 @@ class LLMManager:
             model=self.model,
             temperature=TEMPERATURE,
             api_key=SecretStr(client_args["api_key"]),
-            base_url=client_args["base_url"]
+            base_url=client_args["base_url"],
+            http_client=get_http_client()
         )
     
     def _print_configuration(self):
@@ -62,27 +171,244 @@ class LLMManager:
         print(f"   Max Tokens: {MAX_TOKENS}")
         print()
     
-    def generate_response(self, system_prompt: str, user_prompt: str, context: Optional[List[ChatMessage]] = None) -> str:
-        """Generiere Antwort mit Kontext"""
+    def model_for(self, call_site: Optional[str] = None) -> str:
+        """Wählt das Modell anhand der Stufe der Aufrufstelle (ohne Aufrufstelle: konfiguriertes Modell)."""
+        return get_call_site_model(self.provider, call_site) if call_site else self.model
+
+    def _build_messages(self, system_prompt: str, user_prompt: str, context: Optional[List[ChatMessage]] = None,
+                        model: Optional[str] = None) -> List[ChatMessage]:
+        """Baut die Nachrichtenliste aus System-Prompt, Kontext und Benutzereingabe."""
         messages: List[ChatMessage] = [{"role": "system", "content": system_prompt}]
         
         if context:
-            messages.extend(context[-10:])  # Letzte 10 Nachrichten
+            messages.extend(context)
         
         messages.append({"role": "user", "content": user_prompt})
+        # Verlauf nach Token-Budget des Modells statt fester Nachrichtenanzahl begrenzen
+        return self.fit_messages(messages, model=model) # type: ignore
+
+    def fit_messages(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = None,
+                     model: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Kürzt eine Nachrichtenliste so, dass sie samt Tools ins Kontextfenster des Modells passt."""
+        if model and model != self.model:
+            return ContextWindowManager(self.provider, model).fit(messages, tools)
+        return self.context_manager.fit(messages, tools)
+
+    def _cache_key(self, messages: List[ChatMessage], model: str) -> str:
+        return make_request_key(self.provider, model, TEMPERATURE, list(messages), max_tokens=MAX_TOKENS)
+
+    def _should_route(self, kwargs: Dict[str, Any]) -> bool:
+        # Abweichende Modelle (z. B. die schnelle Stufe) und Streams laufen direkt über den aktuellen Provider
+        return self.router.active and not kwargs.get("stream") and kwargs.get("model", self.model) == self.model
+
+    def _estimate_tokens(self, messages: List[Dict[str, Any]], kwargs: Dict[str, Any]) -> int:
+        """Schätzt den Token-Verbrauch einer Anfrage für den Token-Bucket."""
+        prompt_tokens = sum(count_message_tokens(message) for message in messages) + count_tools_tokens(kwargs.get("tools"))
+        return prompt_tokens + int(kwargs.get("max_tokens") or 0)
+
+    def chat(self, messages: List[Dict[str, Any]], **kwargs: Any) -> ChatCompletion:
+        """Sende eine Chat-Completion-Anfrage an den aktuellen Provider (gedrosselt, mit Wiederholungen).
+
+        Mit aktivem Routing wird die Anfrage abgesichert über mehrere Provider ausgeführt;
+        Streams und abweichende Modelle laufen immer direkt über den aktuellen Provider.
+        """
+        if self._should_route(kwargs):
+            return self.router.run_sync(lambda: self.achat(messages, **kwargs))
+        kwargs.setdefault("model", self.model)
+        estimated_tokens = self._estimate_tokens(messages, kwargs)
+
+        def request(timeout: float) -> ChatCompletion:
+            create = self.client.chat.completions.create
+            if kwargs.get("stream"):
+                # Streams werden in stream_chat() über ihre gesamte Dauer gemessen
+                return self.cassette.create(self.provider, create, messages=messages, timeout=timeout, **kwargs)
+            with self.telemetry.measure(self.provider, kwargs["model"]) as measured:
+                response = self.cassette.create(self.provider, create, messages=messages, timeout=timeout, **kwargs)
+                measured["usage"] = getattr(response, "usage", None)
+            return response
+
+        response = self.scheduler.run(self.provider, request, estimated_tokens)
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.scheduler.record_usage(self.provider, estimated_tokens, usage.total_tokens)
+        return response
+
+    async def achat(self, messages: List[Dict[str, Any]], **kwargs: Any) -> ChatCompletion:
+        """Asynchrone Variante von chat(), begrenzt durch das Provider-Limit des Executors."""
+        if self._should_route(kwargs):
+            return await self.router.hedged(lambda route: self._achat_route(route, messages, kwargs))
+        route = Route(self.provider, kwargs.pop("model", self.model))
+        return await self._achat_route(route, messages, kwargs)
+
+    async def _achat_route(self, route: Route, messages: List[Dict[str, Any]], kwargs: Dict[str, Any]) -> ChatCompletion:
+        """Sendet eine Anfrage an Provider und Modell der Route."""
+        if route != Route(self.provider, self.model):
+            # Ausweichmodelle können ein kleineres Kontextfenster haben
+            messages = ContextWindowManager(route.provider, route.model).fit(messages, kwargs.get("tools"))
+        kwargs = dict(kwargs, model=route.model)
+        estimated_tokens = self._estimate_tokens(messages, kwargs)
+
+        async def request(timeout: float) -> ChatCompletion:
+            # Der Platz wird nur während der eigentlichen Anfrage belegt, nicht während des Backoffs
+            async with self.executor.slot(route.provider):
+                client = self._get_async_client(route.provider)
+                with self.telemetry.measure(route.provider, route.model) as measured:
+                    response = await self.cassette.acreate(route.provider, client.chat.completions.create,
+                                                           messages=messages, timeout=timeout, **kwargs)
+                    measured["usage"] = getattr(response, "usage", None)
+                return response
+
+        # Solange eine Ausweichroute bereitsteht, wird sofort gewechselt statt mit Backoff wiederholt
+        retries = None if is_last_route() else 0
+        response = await self.scheduler.arun(route.provider, request, estimated_tokens, max_retries=retries)
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.scheduler.record_usage(route.provider, estimated_tokens, usage.total_tokens)
+        return response
+
+    def generate_response(self, system_prompt: str, user_prompt: str, context: Optional[List[ChatMessage]] = None,
+                          use_cache: bool = True, call_site: Optional[str] = None) -> str:
+        """Generiere Antwort mit Kontext (call_site wählt die Modell-Stufe, siehe CALL_SITE_TIERS)"""
+        # Beim Aufzeichnen und Abspielen muss jede Anfrage die Kassette erreichen
+        use_cache = use_cache and not self.cassette.active
+        model = self.model_for(call_site)
+        messages = self._build_messages(system_prompt, user_prompt, context, model)
         
+        # Identische Anfragen werden aus dem persistenten Cache bedient
+        cache_key = self._cache_key(messages, model)
+        if use_cache:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        def complete() -> str:
+            response = self.chat(messages, model=model, temperature=TEMPERATURE, max_tokens=MAX_TOKENS)
+            content = response.choices[0].message.content or ""
+            if use_cache and content:
+                self.response_cache.set(cache_key, content)
+            return content
+
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages, # type: ignore
-                temperature=TEMPERATURE,
-                max_tokens=MAX_TOKENS
-            )
-            return response.choices[0].message.content or ""
+            # Gleichzeitig laufende identische Anfragen teilen sich einen Upstream-Aufruf
+            return self.inflight.do(cache_key, complete)
         except Exception as e:
-            error_msg = f"Fehler bei API-Aufruf ({self.provider_config['name']}): {str(e)}"
+            error_msg = f"{API_ERROR_PREFIX} ({self.provider_config['name']}): {str(e)}"
             print(f"❌ {error_msg}")
             return error_msg
+
+    def stream_chat(self, messages: List[Dict[str, Any]], **kwargs: Any) -> Iterator[Dict[str, Any]]:
+        """Streamt eine Chat-Completion als Folge von Ereignissen.
+
+        Ereignisse: {"type": "content"}, {"type": "tool_call_delta"} und zum Abschluss
+        {"type": "done", "message": ..., "usage": ...} mit der zusammengesetzten Assistenten-Nachricht.
+        """
+        accumulator = StreamedMessage()
+        model = kwargs.get("model", self.model)
+        start = time.monotonic()
+        first_token: Optional[float] = None
+        try:
+            for chunk in self.chat(messages, stream=True, **kwargs):
+                events = accumulator.add_chunk(chunk)
+                if events and first_token is None:
+                    first_token = time.monotonic() - start
+                yield from events
+        except Exception as e:
+            self.telemetry.record(self.provider, model, time.monotonic() - start, "error", error=e, stream=True)
+            raise
+        usage = accumulator.usage or self._estimate_stream_usage(messages, kwargs, accumulator)
+        self.telemetry.record(
+            self.provider, model, time.monotonic() - start, "ok",
+            usage=usage, stream=True, ttft_ms=round(first_token * 1000, 1) if first_token is not None else None,
+            estimated_usage=accumulator.usage is None
+        )
+        yield {"type": "done", "message": accumulator.to_message(), "finish_reason": accumulator.finish_reason, "usage": usage}
+
+    def _estimate_stream_usage(self, messages: List[Dict[str, Any]], kwargs: Dict[str, Any],
+                               accumulator: StreamedMessage) -> Dict[str, int]:
+        """Schätzt den Verbrauch eines Streams, wenn der Provider keine Angaben mitsendet."""
+        completion = accumulator.content + "".join(
+            call["function"]["name"] + call["function"]["arguments"] for call in accumulator.tool_calls.values()
+        )
+        return {
+            "prompt_tokens": self._estimate_tokens(messages, {"tools": kwargs.get("tools")}),
+            "completion_tokens": count_tokens(completion)
+        }
+
+    def stream_response(self, system_prompt: str, user_prompt: str, context: Optional[List[ChatMessage]] = None,
+                        use_cache: bool = True, call_site: Optional[str] = None) -> Iterator[str]:
+        """Wie generate_response(), liefert den Text aber stückweise, sobald er eintrifft."""
+        use_cache = use_cache and not self.cassette.active
+        model = self.model_for(call_site)
+        messages = self._build_messages(system_prompt, user_prompt, context, model)
+        
+        cache_key = self._cache_key(messages, model)
+        if use_cache:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        try:
+            parts: List[str] = []
+            for event in self.stream_chat(messages, model=model, temperature=TEMPERATURE, max_tokens=MAX_TOKENS):
+                if event["type"] == "content":
+                    parts.append(event["text"])
+                    yield event["text"]
+            content = "".join(parts)
+            if use_cache and content:
+                self.response_cache.set(cache_key, content)
+        except Exception as e:
+            error_msg = f"{API_ERROR_PREFIX} ({self.provider_config['name']}): {str(e)}"
+            print(f"❌ {error_msg}")
+            yield error_msg
+
+    async def agenerate_response(self, system_prompt: str, user_prompt: str, context: Optional[List[ChatMessage]] = None,
+                                 use_cache: bool = True, call_site: Optional[str] = None) -> str:
+        """Asynchrone Variante von generate_response()."""
+        use_cache = use_cache and not self.cassette.active
+        model = self.model_for(call_site)
+        messages = self._build_messages(system_prompt, user_prompt, context, model)
+        
+        cache_key = self._cache_key(messages, model)
+        if use_cache:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        async def complete() -> str:
+            response = await self.achat(messages, model=model, temperature=TEMPERATURE, max_tokens=MAX_TOKENS)
+            content = response.choices[0].message.content or ""
+            if use_cache and content:
+                self.response_cache.set(cache_key, content)
+            return content
+
+        try:
+            return await self.inflight.ado(cache_key, complete)
+        except Exception as e:
+            error_msg = f"{API_ERROR_PREFIX} ({self.provider_config['name']}): {str(e)}"
+            print(f"❌ {error_msg}")
+            return error_msg
+
+    def generate_many(self, requests: List[Dict[str, Any]]) -> List[str]:
+        """Generiere mehrere unabhängige Antworten parallel.
+
+        Jeder Eintrag enthält die Argumente von generate_response() (system_prompt, user_prompt, context, call_site).
+        Die Ergebnisse haben dieselbe Reihenfolge wie die Anfragen.
+        """
+        factories = [lambda request=request: self.agenerate_response(**request) for request in requests]
+
+        async def run_batch() -> List[Any]:
+            try:
+                return await self.executor.gather(factories)
+            finally:
+                # Jeder Aufruf hat eine eigene Event-Loop; ihre Clients vor dem Ende schließen
+                await self.aclose_async_clients()
+
+        results = asyncio.run(run_batch())
+        return [
+            result if isinstance(result, str) else f"{API_ERROR_PREFIX} ({self.provider_config['name']}): {result}"
+            for result in results
+        ]
     
     def generate_structured_response(self, system_prompt: str, user_prompt: str, response_format: Dict[str, Any]) -> Any:
         """Generiere strukturierte Antwort (JSON)"""
@@ -106,7 +432,11 @@ class LLMManager:
             "provider_name": self.provider_config["name"],
             "model": self.model,
             "temperature": TEMPERATURE,
-            "max_tokens": MAX_TOKENS
+            "max_tokens": MAX_TOKENS,
+            "response_cache": self.response_cache.get_stats(),
+            "singleflight": dict(self.inflight.stats),
+            "cassette": {"mode": self.cassette.mode, **self.cassette.stats} if self.cassette.active else None,
+            "routing": self.router.get_stats() if self.router.active else None
         }
     
     def test_connection(self) -> bool:
@@ -114,7 +444,8 @@ class LLMManager:
         try:
             test_response = self.generate_response(
                 "Du bist ein hilfreicher Assistent.",
-                "Antworte nur mit 'OK'."
+                "Antworte nur mit 'OK'.",
+                use_cache=False
             )
             return "OK" in test_response or "ok" in test_response
         except Exception as e:
@@ -3,7 +3,7 @@
 import click
 import os
 import sys
-from typing import Dict, Any
+from typing import Dict, Any, List
 import json # Added missing import for json
 
 from rich.console import Console
@@ -11,6 +11,9 @@ from rich.panel import Panel
 from rich.prompt import IntPrompt, Confirm
 from rich.markdown import Markdown
 from rich.table import Table
+from rich.live import Live
+from rich.text import Text
+from rich.console import Group
 
 from prompt_toolkit import PromptSession
 from prompt_toolkit.key_binding import KeyBindings
@@ -23,9 +26,12 @@ from agents.debugger import Debugger
 
 from config.settings import (
     is_configured, save_configuration, get_current_provider_config, 
-    get_current_model, AVAILABLE_PROVIDERS
+    get_current_model, AVAILABLE_PROVIDERS, INTENT_CLASSIFIER
 )
 from llm import llm_manager
+from agents.intent_classifier import classify_intent, PROJECT
+from runtime.telemetry import llm_telemetry, caller_scope
+from runtime.trace import trace_sink
 
 console = Console()
 
@@ -83,6 +89,40 @@ def setup_wizard():
     save_configuration(provider, api_key, model)
     console.print("\n[bold green]✅ Einrichtung abgeschlossen![/bold green]")
 
+class ChatStreamRenderer:
+    """Rendert gestreamte Antworten und Tool-Aufrufe inkrementell in einem rich.Live-Bereich."""
+
+    def __init__(self, live: Live):
+        self.live = live
+        self.text = ""
+        self.tool_calls: Dict[int, Dict[str, str]] = {}
+
+    def handle_event(self, event: Dict[str, Any]):
+        """Callback für ToolAgent.on_stream_event."""
+        if event["type"] == "step":
+            # Neuer Agenten-Schritt: bisherigen Text festschreiben und Anzeige zurücksetzen
+            if self.text:
+                self.live.console.print(Markdown(self.text))
+            self.text = ""
+            self.tool_calls = {}
+        elif event["type"] == "content":
+            self.text += event["text"]
+        elif event["type"] == "tool_call_delta":
+            self.tool_calls[event["index"]] = {"name": event["name"], "arguments": event["arguments"]}
+        else:
+            return
+        self.live.update(self._render())
+
+    def append_text(self, text: str):
+        self.text += text
+        self.live.update(self._render())
+
+    def _render(self) -> Group:
+        parts: List[Any] = [Markdown(self.text)] if self.text else []
+        for call in self.tool_calls.values():
+            parts.append(Text(f"🔩 {call['name']}({call['arguments']})", style="dim"))
+        return Group(*parts)
+
 class CodeNova: # Umbenennung von AIProgrammer
     def __init__(self):
         self.modes = ["Chat", "Auto"]
@@ -93,6 +133,8 @@ class CodeNova: # Umbenennung von AIProgrammer
         self.code_generator = CodeGenerator()
         self.test_runner = TestRunner()
         self.debugger = Debugger()
+        # Chat-Agent der Sitzung: behält Verlauf, Tool-Cache und Fortsetzungs-Handles über alle Runden
+        self.chat_agent = None
 
     def get_bottom_toolbar(self):
         """Erzeugt die Toolbar, die den aktuellen Modus anzeigt."""
@@ -151,30 +193,44 @@ class CodeNova: # Umbenennung von AIProgrammer
 
         # Verwende den ToolAgent für alle Provider im Chat-Modus (nur lesende Tools)
         from agents.tool_agent import ToolAgent
-        tool_agent = ToolAgent(chat_mode=True)  # Chat-Modus: nur lesende/analysierende Tools
         from agents.base_agent import Task
         task = Task(
             description=user_input,
             task_type="chat"
         )
-        result = tool_agent.process_task(task)
-        if result.get("status") == "completed":
-            answer = result.get("final_response", "Ich konnte die Aufgabe nicht abschließen.")
-        else:
-            from llm import llm_manager
-            answer = llm_manager.generate_response(
-                system_prompt="Du bist ein hilfreicher KI-Programmier-Assistent auf Windows 11 mit PowerShell. Deine Aufgabe ist es, Projektanforderungen mit dem Benutzer zu planen und zu verfeinern. Gib klare und prägnante Antworten. WICHTIG: Du arbeitest in einer Windows PowerShell-Umgebung. Verwende nur Windows-kompatible Befehle und Pfade.",
-                user_prompt=user_input,
-                context=self.shared_context["history"]
-            )
-        from rich.markdown import Markdown
-        console.print(Markdown(answer))
+        if self.chat_agent is None:
+            self.chat_agent = ToolAgent(chat_mode=True, persistent=True)  # Chat-Modus: nur lesende/analysierende Tools
+        with Live(console=console, refresh_per_second=12, vertical_overflow="visible") as live:
+            renderer = ChatStreamRenderer(live)
+            self.chat_agent.on_stream_event = renderer.handle_event
+            result = self.chat_agent.process_task(task)
+            if result.get("status") == "completed":
+                answer = result.get("final_response") or "Ich konnte die Aufgabe nicht abschließen."
+                if not renderer.text:
+                    renderer.append_text(answer)
+            else:
+                renderer.handle_event({"type": "step", "index": -1})
+                for text in llm_manager.stream_response(
+                    system_prompt="Du bist ein hilfreicher KI-Programmier-Assistent auf Windows 11 mit PowerShell. Deine Aufgabe ist es, Projektanforderungen mit dem Benutzer zu planen und zu verfeinern. Gib klare und prägnante Antworten. WICHTIG: Du arbeitest in einer Windows PowerShell-Umgebung. Verwende nur Windows-kompatible Befehle und Pfade.",
+                    user_prompt=user_input,
+                    context=self.shared_context["history"],
+                    call_site="chat"
+                ):
+                    renderer.append_text(text)
+                answer = renderer.text
+                self.chat_agent.add_to_conversation({"role": "assistant", "content": answer})
         self.shared_context["history"].append({"role": "assistant", "content": answer})
         if len(self.shared_context["history"]) > 10:
             self.shared_context["history"] = self.shared_context["history"][-10:]
 
     def _should_build_project(self, user_input: str) -> bool:
         """KI-basierte Intent-Erkennung: Entscheidet intelligent, ob eine Projektanforderung vorliegt."""
+        # Eindeutige Eingaben werden lokal ohne API-Aufruf entschieden
+        if INTENT_CLASSIFIER == "heuristic":
+            intent = classify_intent(user_input)
+            if intent is not None:
+                return intent == PROJECT
+
         prompt = f"""
         Analysiere die folgende Benutzereingabe und entscheide, ob der Benutzer ein neues Softwareprojekt erstellen möchte oder nur eine Frage stellt.
 
@@ -198,7 +254,8 @@ class CodeNova: # Umbenennung von AIProgrammer
         try:
             response = llm_manager.generate_response(
                 system_prompt="Du bist ein Experte für Intent-Erkennung. Deine Aufgabe ist es, zu entscheiden, ob eine Benutzereingabe eine Projektanforderung oder eine normale Frage ist. Antworte nur mit 'PROJEKT' oder 'FRAGE'.",
-                user_prompt=prompt
+                user_prompt=prompt,
+                call_site="intent"
             ).strip().upper()
             
             return response == "PROJEKT"
@@ -238,7 +295,8 @@ class CodeNova: # Umbenennung von AIProgrammer
         with console.status("[bold yellow]Analysiere Anforderungen aus dem Chat-Verlauf...", spinner="dots"):
             requirements = llm_manager.generate_response(
                 system_prompt="Du bist ein Experte für die Zusammenfassung von Anforderungen auf Windows 11. WICHTIG: Du arbeitest in einer Windows PowerShell-Umgebung. Verwende nur Windows-kompatible Befehle und Pfade.",
-                user_prompt=prompt
+                user_prompt=prompt,
+                call_site="requirements"
             ).strip()
 
         console.print(f"[green]Anforderungen extrahiert:[/green] [italic]{requirements}[/italic]")
@@ -260,7 +318,7 @@ class CodeNova: # Umbenennung von AIProgrammer
             files_to_create = plan.get("plan", {}).get("files", [])
             if not files_to_create:
                 console.print("[bold red]Fehler: Der Plan enthält keine zu erstellenden Dateien.[/bold red]")
-            return
+                return
         
             # 2. Dateien einzeln generieren und linten
             console.print(f"[bold green]2. Generiere {len(files_to_create)} Dateien...[/bold green] ([Ctrl-C] zum Abbrechen)")
@@ -276,7 +334,7 @@ class CodeNova: # Umbenennung von AIProgrammer
                 file_list = self.code_generator.generate_code({"plan": {"files": [file_info]}, "path": project_info["path"]})
                 if not file_list:
                     console.print(f"\r    └── [red]Generierung fehlgeschlagen.[/red]")
-                continue
+                    continue
                 console.print(f"\r    └── [green]Generiere Code... OK[/green]")
                 
                 # Linter ausführen
@@ -341,16 +399,20 @@ class CodeNova: # Umbenennung von AIProgrammer
             border_style="green"
         ))
 
-@click.command()
-def main_cli():
+@click.group(invoke_without_command=True)
+@click.pass_context
+def main_cli(ctx: click.Context):
     """Der Haupteinstiegspunkt für CodeNova.""" # Umbenannt
+    if ctx.invoked_subcommand is not None:
+        return
     if not is_configured():
         setup_wizard()
     
     try:
         llm_manager.reload_config()
         app = CodeNova() # Umbenannt
-        app.interactive_mode()
+        with caller_scope("CodeNova"):
+            app.interactive_mode()
     except Exception as e:
         console.print(f"[bold red]Ein kritischer Fehler ist aufgetreten: {e}[/bold red]")
         console.print("Bitte überprüfe deine `.env`-Datei oder führe die Einrichtung erneut aus.")
@@ -360,7 +422,79 @@ def main_cli():
             setup_wizard()
             llm_manager.reload_config()
             app = CodeNova()
-            app.interactive_mode()
+            with caller_scope("CodeNova"):
+                app.interactive_mode()
+
+@main_cli.command()
+@click.option("--by", "group_by", type=click.Choice(["caller", "model", "provider"]), default="caller",
+              help="Gruppierung der Auswertung")
+def stats(group_by: str):
+    """Zeigt Latenz-Perzentile, Token-Verbrauch und Kosten der protokollierten LLM-Aufrufe."""
+    summary = llm_telemetry.summarize(llm_telemetry.read(), group_by=group_by)
+    if not summary:
+        console.print(f"[yellow]Keine Telemetrie-Daten unter {llm_telemetry.store.path} gefunden.[/yellow]")
+        return
+
+    def fmt_ms(value):
+        return "-" if value is None else f"{value:,.0f}"
+
+    table = Table(title="LLM-Telemetrie")
+    for column in (group_by.capitalize(), "Aufrufe", "Fehler", "p50 ms", "p95 ms", "p99 ms", "Prompt-Tokens", "Antwort-Tokens", "Kosten $"):
+        table.add_column(column, justify="left" if column == group_by.capitalize() else "right")
+    for row in summary:
+        table.add_row(
+            row[group_by], str(row["calls"]), str(row["errors"]),
+            fmt_ms(row["p50_ms"]), fmt_ms(row["p95_ms"]), fmt_ms(row["p99_ms"]),
+            f"{row['prompt_tokens']:,}", f"{row['completion_tokens']:,}",
+            "-" if row["cost_usd"] is None else f"{row['cost_usd']:.4f}"
+        )
+    console.print(table)
+
+@main_cli.command()
+@click.argument("session", required=False)
+@click.option("--list", "list_sessions", is_flag=True, help="Nur die aufgezeichneten Sitzungen auflisten")
+@click.option("--max-chars", default=500, show_default=True, help="Maximale Länge pro Nachricht (0 = vollständig)")
+def trace(session: str, list_sessions: bool, max_chars: int):
+    """Zeigt den im DEBUG-Modus aufgezeichneten Verlauf einer Agenten-Sitzung (Standard: die letzte)."""
+    sessions = trace_sink.sessions()
+    if not sessions:
+        console.print(f"[yellow]Keine Trace-Daten unter {trace_sink.store.path} gefunden (aktivieren mit DEBUG=1).[/yellow]")
+        return
+
+    if list_sessions:
+        table = Table(title="Agenten-Sitzungen")
+        for column in ("Sitzung", "Start", "Agent", "Nachrichten", "Status", "Aufgabe"):
+            table.add_column(column)
+        for entry in sessions:
+            table.add_row(entry["session"], entry.get("started") or "-", entry.get("agent") or "-",
+                          str(entry["messages"]), entry["status"] or "-", (entry.get("task") or "")[:60])
+        console.print(table)
+        return
+
+    matches = [entry for entry in sessions if entry["session"].startswith(session)] if session else sessions[-1:]
+    if not matches:
+        console.print(f"[red]Sitzung '{session}' nicht gefunden.[/red]")
+        return
+
+    for record in trace_sink.session_records(matches[-1]["session"]):
+        if record["event"] == "start":
+            console.print(Panel(record.get("task") or "", title=f"{record.get('agent')} · {record['session']} · {record['ts']}", border_style="blue"))
+        elif record["event"] == "end":
+            console.print(f"[bold]Ende:[/bold] {record.get('status')}")
+        else:
+            message = record["message"]
+            content = message.get("content") or ""
+            if max_chars and len(content) > max_chars:
+                content = content[:max_chars] + f" …[{len(content) - max_chars} Zeichen]"
+            calls = ", ".join(call["function"]["name"] for call in message.get("tool_calls") or [])
+            header = f"[cyan]#{record['index']} Schritt {record['step']} · {message.get('role')}[/cyan]"
+            if message.get("name"):
+                header += f" [dim]({message['name']})[/dim]"
+            if calls:
+                header += f" → {calls}"
+            console.print(header)
+            if content:
+                console.print(Text(content))
 
 if __name__ == "__main__":
     main_cli()
\ No newline at end of file
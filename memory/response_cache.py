@@ -0,0 +1,156 @@
+"""
+Persistenter Antwort-Cache für LLM-Aufrufe.
+Antworten werden inhaltsadressiert (SHA-256 über Provider, Modell, Temperatur und Nachrichten)
+in einer SQLite-Datenbank unter MEMORY_DIR abgelegt.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from config.settings import (
+    LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_MAX_SIZE_MB, LLM_CACHE_MAX_AGE
+)
+
+
+def make_request_key(provider: str, model: str, temperature: float, messages: List[Dict[str, Any]], **extra: Any) -> str:
+    """Erzeugt einen stabilen Schlüssel für eine LLM-Anfrage."""
+    payload = {
+        "provider": provider,
+        "model": model,
+        "temperature": temperature,
+        "messages": messages,
+        **extra
+    }
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-basierter Cache mit Alters- und Größenverdrängung."""
+
+    def __init__(self, db_path: Optional[Union[str, Path]] = None, max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 max_size_mb: float = LLM_CACHE_MAX_SIZE_MB, max_age: int = LLM_CACHE_MAX_AGE,
+                 enabled: bool = LLM_CACHE_ENABLED):
+        self.db_path = Path(db_path) if db_path else LLM_CACHE_PATH
+        self.max_entries = max_entries
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.max_age = max_age
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Öffnet die Datenbank beim ersten Zugriff und legt das Schema an."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), timeout=5, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        """Hole eine gespeicherte Antwort oder None."""
+        if not self.enabled:
+            return None
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+                now = time.time()
+                if row is None or (self.max_age and now - row[1] > self.max_age):
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                conn.commit()
+                self.hits += 1
+                return row[0]
+        except sqlite3.Error as e:
+            print(f"⚠️  Antwort-Cache nicht lesbar: {e}")
+            self.misses += 1
+            return None
+
+    def set(self, key: str, response: str) -> bool:
+        """Speichere eine Antwort und verdränge alte Einträge."""
+        if not self.enabled:
+            return False
+        try:
+            with self._lock:
+                conn = self._connection()
+                now = time.time()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, response, len(response.encode("utf-8")), now, now)
+                )
+                self._evict(conn, now)
+                conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"⚠️  Antwort-Cache nicht beschreibbar: {e}")
+            return False
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """Entferne abgelaufene Einträge und die am längsten ungenutzten bei Überschreitung der Limits."""
+        if self.max_age:
+            conn.execute("DELETE FROM responses WHERE created < ?", (now - self.max_age,))
+
+        count, total_size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total_size <= self.max_size_bytes:
+            return
+
+        # Älteste Zugriffe zuerst verwerfen, bis beide Limits eingehalten werden
+        rows = conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC").fetchall()
+        stale_keys = []
+        for key, size in rows:
+            if count <= self.max_entries and total_size <= self.max_size_bytes:
+                break
+            stale_keys.append((key,))
+            count -= 1
+            total_size -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", stale_keys)
+
+    def clear(self) -> bool:
+        """Lösche alle Einträge und setze die Zähler zurück."""
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute("DELETE FROM responses")
+                conn.commit()
+                self.hits = 0
+                self.misses = 0
+            return True
+        except sqlite3.Error as e:
+            print(f"Fehler beim Leeren des Antwort-Caches: {e}")
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hole Cache-Statistiken"""
+        stats: Dict[str, Any] = {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "path": str(self.db_path)
+        }
+        try:
+            with self._lock:
+                count, total_size = self._connection().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                ).fetchone()
+            stats["entries"] = count
+            stats["size_bytes"] = total_size
+        except sqlite3.Error:
+            stats["entries"] = 0
+            stats["size_bytes"] = 0
+        return stats
@@ -22,6 +22,7 @@ class VectorMemory:
         self.index_path = self.storage_path / "index.faiss"
         self.metadata_path = self.storage_path / "metadata.json"
         
+        self._embedding_client = None
         self.index: Union['faiss.Index', 'SimpleMemory']
         self.dimension = 1536  # Standard-Dimension für den Fall, dass FAISS nicht verfügbar ist
 
@@ -156,10 +157,12 @@ class VectorMemory:
             print("OpenAI-Modul nicht verfügbar, kann keine Embeddings erstellen.")
             return None
         try:
-            # Verwende OpenAI Embeddings
-            client = openai.OpenAI()
+            # Verwende OpenAI Embeddings über den gemeinsamen Verbindungspool
+            if self._embedding_client is None:
+                from runtime.http_pool import get_http_client
+                self._embedding_client = openai.OpenAI(http_client=get_http_client())
             
-            response = client.embeddings.create(
+            response = self._embedding_client.embeddings.create(
                 model="text-embedding-ada-002",
                 input=text
             )
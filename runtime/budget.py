@@ -0,0 +1,107 @@
+"""
+Budgets für die Agenten-Schleife.
+Ein AgentBudget begrenzt Schritte, Laufzeit, Tokens (Prompt + Completion) und die gesamte
+Tool-Laufzeit einer Aufgabe. Der BudgetTracker zählt den Verbrauch pro Schritt mit und meldet,
+welches Limit erschöpft ist; sein Bericht wird dem Ergebnis der Aufgabe beigefügt.
+"""
+
+import time
+from dataclasses import dataclass, asdict, fields
+from typing import Any, Dict, List, Optional
+
+from config.settings import AGENT_MAX_STEPS, AGENT_TIMEOUT, AGENT_MAX_TOKENS, AGENT_MAX_TOOL_SECONDS
+from runtime.telemetry import usage_tokens
+
+
+@dataclass(frozen=True)
+class AgentBudget:
+    """Obergrenzen einer Aufgabe; 0 bei Tokens und Tool-Laufzeit bedeutet unbegrenzt."""
+
+    max_steps: int = AGENT_MAX_STEPS
+    max_seconds: float = AGENT_TIMEOUT
+    max_tokens: int = AGENT_MAX_TOKENS
+    max_tool_seconds: float = AGENT_MAX_TOOL_SECONDS
+
+    @classmethod
+    def from_context(cls, value: Any) -> "AgentBudget":
+        """Liest das Budget aus Task.context["budget"] (AgentBudget, Dict oder None)."""
+        if isinstance(value, cls):
+            return value
+        if not value:
+            return cls()
+        if not isinstance(value, dict):
+            raise TypeError(f"Ungültiges Budget: {value!r}")
+        known = {field.name for field in fields(cls)}
+        unknown = set(value) - known
+        if unknown:
+            raise ValueError(f"Unbekannte Budget-Felder: {', '.join(sorted(unknown))}")
+        return cls(**value)
+
+
+class BudgetTracker:
+    """Zählt den Verbrauch einer Aufgabe gegen ihr Budget."""
+
+    def __init__(self, budget: AgentBudget):
+        self.budget = budget
+        self.started = time.monotonic()
+        self.tokens = 0
+        self.tool_seconds = 0.0
+        self.steps: List[Dict[str, Any]] = []
+        self.exhausted: Optional[str] = None
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining_seconds(self) -> float:
+        return max(0.0, self.budget.max_seconds - self.elapsed())
+
+    def remaining_tokens(self) -> Optional[int]:
+        return max(0, self.budget.max_tokens - self.tokens) if self.budget.max_tokens else None
+
+    def record_llm(self, step: int, duration: float, usage: Any):
+        """Erfasst einen LLM-Aufruf; jeder Aufruf beginnt einen neuen Schritt-Eintrag."""
+        tokens = usage_tokens(usage)
+        self.tokens += tokens["prompt_tokens"] + tokens["completion_tokens"]
+        self.steps.append({"step": step, "llm_ms": round(duration * 1000, 1), "tool_ms": 0.0, "tool_calls": 0, **tokens})
+
+    def record_tools(self, duration: float, calls: int):
+        """Erfasst die Tool-Aufrufe des zuletzt erfassten Schritts."""
+        self.tool_seconds += duration
+        self.steps[-1]["tool_ms"] = round(duration * 1000, 1)
+        self.steps[-1]["tool_calls"] = calls
+
+    def check(self) -> Optional[str]:
+        """Liefert das erschöpfte Limit, wenn kein weiterer LLM-Aufruf mehr erlaubt ist, sonst None."""
+        budget = self.budget
+        if len(self.steps) >= budget.max_steps:
+            self.exhausted = "max_steps"
+        elif self.elapsed() >= budget.max_seconds:
+            self.exhausted = "max_seconds"
+        elif budget.max_tokens and self.tokens >= budget.max_tokens:
+            self.exhausted = "max_tokens"
+        return self.exhausted
+
+    def final_step(self) -> Optional[str]:
+        """Liefert das Limit, wegen dessen der nächste Schritt ohne Tools antworten muss, sonst None.
+
+        Ändert exhausted nicht: gelingt die Antwort im letzten Schritt, gilt das Budget als eingehalten.
+        """
+        budget = self.budget
+        if len(self.steps) >= budget.max_steps - 1:
+            return "max_steps"
+        if budget.max_tool_seconds and self.tool_seconds >= budget.max_tool_seconds:
+            return "max_tool_seconds"
+        return None
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "limits": asdict(self.budget),
+            "used": {
+                "steps": len(self.steps),
+                "seconds": round(self.elapsed(), 3),
+                "tokens": self.tokens,
+                "tool_seconds": round(self.tool_seconds, 3),
+            },
+            "exhausted": self.exhausted,
+            "steps": self.steps,
+        }
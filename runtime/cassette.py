@@ -0,0 +1,145 @@
+"""
+Aufzeichnen und Abspielen von LLM-Anfragen ("Kassetten").
+Im Modus "record" wird jedes Anfrage/Antwort-Paar (auch Streams, Chunk für Chunk) als Zeile in
+eine JSONL-Datei geschrieben. Im Modus "replay" beantwortet die Kassette Anfragen anhand des
+Anfrage-Hashes, ohne das Netzwerk zu benutzen; so lassen sich Agenten-Läufe offline und
+deterministisch messen und profilieren.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Union
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from config.settings import LLM_CASSETTE_MODE, LLM_CASSETTE_PATH, LLM_CASSETTE_LATENCY
+from memory.response_cache import make_request_key
+
+MODES = ("off", "record", "replay")
+
+
+class CassetteMiss(Exception):
+    """Für die Anfrage gibt es in der abgespielten Kassette keine Aufnahme."""
+
+
+class Cassette:
+    """Zeichnet LLM-Antworten auf oder spielt sie ab.
+
+    Mehrfach gestellte identische Anfragen werden in Aufnahmereihenfolge beantwortet; sind alle
+    Aufnahmen verbraucht, wird die letzte wiederholt. latency_scale > 0 wartet beim Abspielen
+    die aufgezeichnete Dauer (skaliert) ab, 0 antwortet sofort.
+    """
+
+    def __init__(self, path: Union[str, Path] = LLM_CASSETTE_PATH, mode: str = LLM_CASSETTE_MODE,
+                 latency_scale: float = LLM_CASSETTE_LATENCY):
+        if mode not in MODES:
+            raise ValueError(f"Unbekannter Kassetten-Modus '{mode}' (erlaubt: {', '.join(MODES)})")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._played: Dict[str, int] = defaultdict(int)
+        self._loaded = False
+        self.stats = {"recorded": 0, "replayed": 0, "misses": 0}
+
+    @property
+    def active(self) -> bool:
+        return self.mode != "off"
+
+    def _load(self):
+        self._loaded = True
+        if not self.path.exists():
+            raise FileNotFoundError(f"Kassette nicht gefunden: {self.path}")
+        with self.path.open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["key"]].append(entry)
+
+    @staticmethod
+    def request_key(provider: str, request: Dict[str, Any]) -> str:
+        """Hash über Provider und alle Anfrageparameter außer dem Timeout."""
+        params = {name: value for name, value in request.items() if name not in ("timeout", "messages")}
+        return make_request_key(provider, params.pop("model", ""), params.pop("temperature", None),
+                                list(request.get("messages") or []), **params)
+
+    def _append(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.stats["recorded"] += 1
+
+    def _next(self, key: str) -> Dict[str, Any]:
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entries = self._entries.get(key)
+            if not entries:
+                self.stats["misses"] += 1
+                raise CassetteMiss(f"Keine Aufnahme für Anfrage {key[:12]} in {self.path}")
+            index = min(self._played[key], len(entries) - 1)
+            self._played[key] += 1
+            self.stats["replayed"] += 1
+            return entries[index]
+
+    def _replay(self, entry: Dict[str, Any]) -> Any:
+        if entry["stream"]:
+            return iter([ChatCompletionChunk.model_validate(chunk) for chunk in entry["response"]])
+        return ChatCompletion.model_validate(entry["response"])
+
+    def _delay(self, entry: Dict[str, Any]) -> float:
+        return entry.get("duration_ms", 0) / 1000 * self.latency_scale
+
+    def _record_stream(self, key: str, provider: str, chunks: Iterator[Any], start: float) -> Iterator[Any]:
+        recorded: List[Dict[str, Any]] = []
+        for chunk in chunks:
+            recorded.append(chunk.model_dump())
+            yield chunk
+        # Nur vollständig gelesene Streams werden aufgezeichnet
+        self._append({"key": key, "provider": provider, "stream": True, "response": recorded,
+                      "duration_ms": round((time.monotonic() - start) * 1000, 1)})
+
+    def create(self, provider: str, create: Callable[..., Any], **request: Any) -> Any:
+        """Ersetzt client.chat.completions.create(**request) je nach Modus."""
+        if self.mode == "off":
+            return create(**request)
+        key = self.request_key(provider, request)
+        if self.mode == "replay":
+            entry = self._next(key)
+            time.sleep(self._delay(entry))
+            return self._replay(entry)
+
+        start = time.monotonic()
+        response = create(**request)
+        if request.get("stream"):
+            return self._record_stream(key, provider, response, start)
+        self._append({"key": key, "provider": provider, "stream": False, "response": response.model_dump(),
+                      "duration_ms": round((time.monotonic() - start) * 1000, 1)})
+        return response
+
+    async def acreate(self, provider: str, create: Callable[..., Awaitable[Any]], **request: Any) -> Any:
+        """Asynchrone Variante von create() (ohne Streams)."""
+        if self.mode == "off":
+            return await create(**request)
+        key = self.request_key(provider, request)
+        if self.mode == "replay":
+            entry = self._next(key)
+            await asyncio.sleep(self._delay(entry))
+            return self._replay(entry)
+
+        start = time.monotonic()
+        response = await create(**request)
+        self._append({"key": key, "provider": provider, "stream": False, "response": response.model_dump(),
+                      "duration_ms": round((time.monotonic() - start) * 1000, 1)})
+        return response
+
+
+# Globale Instanz
+llm_cassette = Cassette()
@@ -0,0 +1,239 @@
+"""
+Token-bewusste Verwaltung des Kontextfensters.
+Packt System-Prompt, Tool-Schemata, Verlauf und Tool-Ausgaben in das Token-Budget
+des jeweiligen Modells und kürzt nach Priorität, statt blind die letzten N Nachrichten zu nehmen.
+"""
+
+import itertools
+import json
+import math
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+
+from config.settings import MAX_TOKENS, get_context_window
+
+# Pauschaler Overhead pro Nachricht (Rolle, Trennzeichen) laut OpenAI-Zählweise
+MESSAGE_OVERHEAD = 4
+# Sicherheitsabstand, da lokale Zählung und Provider-Tokenizer voneinander abweichen
+SAFETY_MARGIN = 0.05
+# Ältere Tool-Ausgaben werden zuerst auf diese Länge gekürzt
+TOOL_OUTPUT_KEEP_CHARS = 2000
+TRUNCATION_NOTE = "\n…[gekürzt: {removed} Zeichen entfernt]"
+# Schätzung ohne Tokenizer: Code kommt auf weniger als 3 ASCII-Zeichen pro Token, andere Schriften
+# oft auf ein Token pro Zeichen; der Aufschlag deckt die verbleibende Streuung ab
+ESTIMATE_ASCII_CHARS_PER_TOKEN = 2.5
+ESTIMATE_MARGIN = 1.1
+
+_encoding: Any = None
+_encoding_failed = False
+# Serialisierte Tool-Schemata pro Listen-Objekt (die Tool-Listen sind modulweit zwischengespeichert)
+_serialized_tools: Dict[int, Tuple[List[Dict[str, Any]], str]] = {}
+
+
+def _get_encoding():
+    """Lädt den lokalen Tokenizer einmalig; ohne Netz/tiktoken wird geschätzt."""
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed and TIKTOKEN_AVAILABLE:
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding_failed = True
+    return _encoding
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    """Zählt die Tokens eines Textes.
+
+    Ohne tiktoken wird bewusst zu hoch geschätzt: 2,5 ASCII-Zeichen und jedes andere Zeichen je ein
+    Token, plus 10 % Aufschlag, damit das Budget das Kontextfenster auch bei Code und nicht-lateinischen
+    Texten nicht überschreitet.
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return math.ceil((ascii_chars / ESTIMATE_ASCII_CHARS_PER_TOKEN + len(text) - ascii_chars) * ESTIMATE_MARGIN)
+
+
+def count_message_tokens(message: Dict[str, Any]) -> int:
+    """Zählt die Tokens einer Chat-Nachricht inklusive Tool-Aufrufen."""
+    tokens = MESSAGE_OVERHEAD
+    content = message.get("content")
+    if isinstance(content, str):
+        tokens += count_tokens(content)
+    elif content:
+        tokens += count_tokens(json.dumps(content, ensure_ascii=False))
+    if message.get("name"):
+        tokens += count_tokens(message["name"])
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.get("function", {})
+        tokens += count_tokens(function.get("name", "")) + count_tokens(function.get("arguments", ""))
+    return tokens
+
+
+def serialize_tools(tools: List[Dict[str, Any]]) -> str:
+    """Serialisiert Tool-Schemata einmal pro Listen-Objekt statt bei jedem Schritt."""
+    cached = _serialized_tools.get(id(tools))
+    # Die Referenz im Cache verhindert, dass die id an eine neue Liste vergeben wird
+    if cached is not None and cached[0] is tools:
+        return cached[1]
+    serialized = json.dumps(tools, ensure_ascii=False, separators=(",", ":"))
+    if len(_serialized_tools) >= 16:
+        _serialized_tools.clear()
+    _serialized_tools[id(tools)] = (tools, serialized)
+    return serialized
+
+
+def count_tools_tokens(tools: Optional[List[Dict[str, Any]]]) -> int:
+    """Zählt die Tokens der Tool-Schemata, die mit jeder Anfrage gesendet werden."""
+    if not tools:
+        return 0
+    return count_tokens(serialize_tools(tools))
+
+
+def _truncate_text(text: str, keep_chars: int) -> str:
+    if len(text) <= keep_chars:
+        return text
+    return text[:keep_chars] + TRUNCATION_NOTE.format(removed=len(text) - keep_chars)
+
+
+def compact_history(messages: List[Dict[str, Any]], max_tokens: int, keep_turns: int = 2,
+                    stub_chars: int = 300) -> List[Dict[str, Any]]:
+    """Begrenzt einen über mehrere Runden wachsenden Verlauf (verändert die Liste direkt).
+
+    Eine Runde beginnt mit einer Benutzer-Nachricht. Tool-Ausgaben älterer Runden werden zuerst
+    auf stub_chars Zeichen gekürzt; reicht das nicht, werden die ältesten Runden vollständig
+    entfernt. Führende System-Nachrichten und die letzten keep_turns Runden bleiben unverändert.
+    """
+    turn_starts = [i for i, message in enumerate(messages) if message.get("role") == "user"]
+    if len(turn_starts) <= keep_turns:
+        return messages
+    protected_from = turn_starts[-keep_turns] if keep_turns > 0 else len(messages)
+
+    # 1. Tool-Ausgaben älterer Runden auf einen kurzen Auszug reduzieren
+    for i in range(turn_starts[0], protected_from):
+        message = messages[i]
+        if message.get("role") == "tool" and len(message.get("content") or "") > stub_chars:
+            messages[i] = dict(message, content=_truncate_text(message["content"], stub_chars))
+
+    # 2. Älteste Runden komplett entfernen, bis der Verlauf ins Budget passt
+    total = sum(count_message_tokens(message) for message in messages)
+    drop_until = turn_starts[0]
+    for start, end in zip(turn_starts, turn_starts[1:]):
+        if total <= max_tokens or end > protected_from:
+            break
+        total -= sum(count_message_tokens(message) for message in messages[start:end])
+        drop_until = end
+    del messages[turn_starts[0]:drop_until]
+    return messages
+
+
+class ContextWindowManager:
+    """Passt Nachrichtenlisten an das Kontextfenster eines Modells an."""
+
+    def __init__(self, provider: str, model: str, reserve_tokens: int = MAX_TOKENS):
+        self.provider = provider
+        self.model = model
+        self.reserve_tokens = reserve_tokens
+
+    @property
+    def window(self) -> int:
+        return get_context_window(self.provider, self.model)
+
+    def budget(self, tools: Optional[List[Dict[str, Any]]] = None) -> int:
+        """Verfügbare Tokens für Nachrichten nach Abzug von Antwortreserve, Tools und Sicherheitsabstand."""
+        window = self.window
+        # Kleine Fenster dürfen nicht komplett von der Antwortreserve belegt werden
+        reserve = min(self.reserve_tokens, window // 4)
+        return int(window * (1 - SAFETY_MARGIN)) - reserve - count_tools_tokens(tools)
+
+    def fit(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """Liefert eine Nachrichtenliste, die in das Budget passt.
+
+        Priorität (höchste zuerst): führende System-Nachrichten, letzte Benutzer-Nachricht,
+        jüngste Nachrichtengruppe, dann der übrige Verlauf von neu nach alt. Vor dem Verwerfen
+        ganzer Gruppen werden ältere Tool-Ausgaben gekürzt. Passt alles, bleibt die Liste unverändert.
+        """
+        budget = self.budget(tools)
+        costs = [count_message_tokens(message) for message in messages]
+        if sum(costs) <= budget:
+            return messages
+
+        groups = self._group(messages)
+        pinned = self._pinned_groups(messages, groups)
+        group_costs = [sum(costs[i] for i in group) for group in groups]
+        result: List[Optional[Dict[str, Any]]] = list(messages)
+        total = sum(group_costs)
+
+        # 1. Ältere Tool-Ausgaben kürzen (älteste zuerst, jüngste Gruppe bleibt unangetastet)
+        for g, group in enumerate(groups[:-1]):
+            if total <= budget:
+                break
+            for i in group:
+                message = result[i]
+                if message and message.get("role") == "tool" and len(message.get("content") or "") > TOOL_OUTPUT_KEEP_CHARS:
+                    shortened = dict(message, content=_truncate_text(message["content"], TOOL_OUTPUT_KEEP_CHARS))
+                    saved = costs[i] - count_message_tokens(shortened)
+                    result[i] = shortened
+                    costs[i] -= saved
+                    group_costs[g] -= saved
+                    total -= saved
+
+        # 2. Ganze Gruppen verwerfen (älteste zuerst), gepinnte bleiben erhalten
+        for g, group in enumerate(groups):
+            if total <= budget:
+                break
+            if g in pinned:
+                continue
+            for i in group:
+                result[i] = None
+            total -= group_costs[g]
+
+        # 3. Notfalls die größte verbliebene Nachricht auf das Restbudget kürzen. Führende
+        # System-Nachrichten bleiben möglichst unverändert, damit der Präfix vom Provider gecacht werden kann
+        if total > budget:
+            prefix = set(itertools.takewhile(lambda i: messages[i].get("role") == "system", range(len(messages))))
+            candidates = [i for i, message in enumerate(result) if message is not None and isinstance(message.get("content"), str)]
+            remaining = [i for i in candidates if i not in prefix] or candidates
+            if remaining:
+                largest = max(remaining, key=lambda i: costs[i])
+                overflow = total - budget
+                content = result[largest]["content"]
+                keep_tokens = max(0, costs[largest] - overflow - MESSAGE_OVERHEAD)
+                keep_chars = int(len(content) * keep_tokens / max(1, count_tokens(content)))
+                result[largest] = dict(result[largest], content=_truncate_text(content, keep_chars))
+
+        return [message for message in result if message is not None]
+
+    @staticmethod
+    def _group(messages: List[Dict[str, Any]]) -> List[List[int]]:
+        """Fasst Assistenten-Nachrichten mit Tool-Aufrufen und deren Tool-Antworten zu Gruppen zusammen."""
+        groups: List[List[int]] = []
+        for i, message in enumerate(messages):
+            if message.get("role") == "tool" and groups:
+                groups[-1].append(i)
+            else:
+                groups.append([i])
+        return groups
+
+    @staticmethod
+    def _pinned_groups(messages: List[Dict[str, Any]], groups: List[List[int]]) -> set:
+        pinned = {len(groups) - 1}
+        for g, group in enumerate(groups):
+            if messages[group[0]].get("role") != "system":
+                break
+            pinned.add(g)
+        last_user = max((g for g, group in enumerate(groups) if messages[group[0]].get("role") == "user"), default=None)
+        if last_user is not None:
+            pinned.add(last_user)
+        return pinned
@@ -0,0 +1,69 @@
+"""
+Begrenzt parallele Ausführung von LLM-Anfragen.
+Jeder Provider erhält eine eigene Semaphore, damit gleichzeitige Anfragen das
+konfigurierte Limit ("max_concurrency") nicht überschreiten.
+"""
+
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from config.settings import AVAILABLE_PROVIDERS, LLM_MAX_CONCURRENCY
+
+DEFAULT_CONCURRENCY = 4
+
+
+class RequestExecutor:
+    """Führt Koroutinen mit einem Parallelitätslimit pro Provider aus."""
+
+    def __init__(self, default_limit: int = DEFAULT_CONCURRENCY):
+        self.default_limit = default_limit
+        # Semaphoren sind an eine Event-Loop gebunden, daher eine Tabelle pro Loop
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+    def get_limit(self, provider: str) -> int:
+        """Hole das Parallelitätslimit für einen Provider."""
+        if LLM_MAX_CONCURRENCY > 0:
+            return LLM_MAX_CONCURRENCY
+        return int(AVAILABLE_PROVIDERS.get(provider, {}).get("max_concurrency", self.default_limit))
+
+    def _semaphore(self, provider: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        per_loop = self._semaphores.setdefault(loop, {})
+        if provider not in per_loop:
+            per_loop[provider] = asyncio.Semaphore(self.get_limit(provider))
+        return per_loop[provider]
+
+    @asynccontextmanager
+    async def slot(self, provider: str):
+        """Reserviert einen Ausführungsplatz für den Provider."""
+        async with self._semaphore(provider):
+            yield
+
+    async def submit(self, provider: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Führt eine Koroutine innerhalb des Provider-Limits aus."""
+        async with self.slot(provider):
+            return await factory()
+
+    async def gather(self, factories: Iterable[Callable[[], Awaitable[Any]]], provider: Optional[str] = None,
+                     return_exceptions: bool = True) -> List[Any]:
+        """Führt mehrere Koroutinen parallel aus; die Reihenfolge der Ergebnisse bleibt erhalten.
+
+        Ohne Provider wird kein eigener Platz reserviert, z. B. wenn die Koroutinen
+        bereits LLMManager.achat() verwenden, das selbst das Limit einhält.
+        """
+        if provider is not None:
+            coroutines = [self.submit(provider, factory) for factory in factories]
+        else:
+            coroutines = [factory() for factory in factories]
+        return await asyncio.gather(*coroutines, return_exceptions=return_exceptions)
+
+    def run_all(self, factories: Iterable[Callable[[], Awaitable[Any]]], provider: Optional[str] = None,
+                return_exceptions: bool = True) -> List[Any]:
+        """Synchroner Einstiegspunkt für Aufrufer ohne eigene Event-Loop."""
+        return asyncio.run(self.gather(list(factories), provider, return_exceptions))
+
+
+# Globale Instanz
+request_executor = RequestExecutor()
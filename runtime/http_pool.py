@@ -0,0 +1,78 @@
+"""
+Prozessweiter HTTP-Verbindungspool.
+Alle OpenAI-kompatiblen Clients (Chat, LangChain, Embeddings) teilen sich denselben
+Keep-Alive-Transport, damit TLS-Handshakes und Client-Aufbau nur einmal anfallen.
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
+
+from config.settings import (
+    HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE_CONNECTIONS, HTTP_KEEPALIVE_EXPIRY,
+    HTTP_TIMEOUT, HTTP2_ENABLED
+)
+
+_lock = threading.Lock()
+_sync_client: Optional[httpx.Client] = None
+# httpx.AsyncClient-Verbindungen sind an die Event-Loop gebunden, in der sie entstehen
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def _client_options() -> dict:
+    return {
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+        ),
+        "timeout": httpx.Timeout(HTTP_TIMEOUT, connect=10.0),
+        "http2": HTTP2_ENABLED and H2_AVAILABLE,
+        "follow_redirects": True
+    }
+
+
+def get_http_client() -> httpx.Client:
+    """Hole den gemeinsamen synchronen HTTP-Client."""
+    global _sync_client
+    with _lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(**_client_options())
+        return _sync_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Hole den gemeinsamen asynchronen HTTP-Client der laufenden Event-Loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(**_client_options())
+            _async_clients[loop] = client
+        return client
+
+
+async def aclose_async_http_client():
+    """Schließt den asynchronen Client der laufenden Event-Loop, bevor diese endet."""
+    with _lock:
+        client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def close_http_clients():
+    """Schließt den synchronen Pool, z. B. beim Beenden der Anwendung."""
+    global _sync_client
+    with _lock:
+        if _sync_client is not None:
+            _sync_client.close()
+            _sync_client = None
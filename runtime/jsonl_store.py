@@ -0,0 +1,62 @@
+"""
+Rotierende JSONL-Datei für lokale Protokolle.
+Ab einer Maximalgröße wird die aktuelle Datei zu "<name>.1" verschoben, ältere Dateien
+rücken nach ("<name>.2", ...) und die älteste wird verworfen.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+
+class RotatingJsonlStore:
+    """Hängt JSON-Datensätze zeilenweise an und rotiert die Datei nach Größe."""
+
+    def __init__(self, path: Path, max_bytes: int = 5 * 1024 * 1024, backups: int = 3):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+
+    def _backup_path(self, index: int) -> Path:
+        return self.path.with_name(f"{self.path.name}.{index}")
+
+    def _rotate(self):
+        for index in range(self.backups - 1, 0, -1):
+            source = self._backup_path(index)
+            if source.exists():
+                os.replace(source, self._backup_path(index + 1))
+        if self.backups > 0:
+            os.replace(self.path, self._backup_path(1))
+        else:
+            self.path.unlink()
+
+    def append(self, record: Dict[str, Any]):
+        """Schreibt einen Datensatz; Schreibfehler werden ignoriert, damit Protokollierung nie stört."""
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                if self.path.exists() and self.path.stat().st_size + len(line) > self.max_bytes:
+                    self._rotate()
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except OSError:
+                pass
+
+    def files(self) -> List[Path]:
+        """Alle vorhandenen Dateien, älteste zuerst."""
+        candidates = [self._backup_path(index) for index in range(self.backups, 0, -1)] + [self.path]
+        return [path for path in candidates if path.exists()]
+
+    def read(self) -> Iterator[Dict[str, Any]]:
+        """Liest alle Datensätze in Schreibreihenfolge; beschädigte Zeilen werden übersprungen."""
+        for path in self.files():
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
@@ -0,0 +1,248 @@
+"""
+Latenzbasiertes Routing über mehrere OpenAI-kompatible Provider.
+Pro Route (Provider + Modell) wird ein Latenz-Histogramm geführt. Die Route mit der
+niedrigsten p95-Latenz wird primär verwendet; überschreitet sie ihre p95-Deadline, startet
+eine abgesicherte ("hedged") Zweitanfrage an die nächste Route. Die erste gute Antwort gewinnt,
+die andere Anfrage wird abgebrochen. Schlägt eine Route fehl, wird sofort auf die nächste gewechselt;
+nur die letzte Route wiederholt Anfragen mit Backoff (siehe is_last_route).
+"""
+
+import asyncio
+import bisect
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Optional, Tuple
+
+from config.settings import (
+    AVAILABLE_PROVIDERS, LLM_ROUTING_ENABLED, LLM_FALLBACK_PROVIDERS, LLM_HEDGE_PERCENTILE,
+    LLM_HEDGE_DELAY, LLM_HEDGE_MIN_SAMPLES, get_provider_model
+)
+from runtime.scheduler import current_deadline, deadline_scope
+
+# Obergrenzen der Histogramm-Buckets in Sekunden (exponentiell, 0.1s bis ~5min)
+BUCKET_BOUNDS = [round(0.1 * 1.25 ** i, 3) for i in range(37)]
+HISTOGRAM_WINDOW = 200  # nur die letzten N Messungen zählen
+FAILURE_THRESHOLD = 3  # aufeinanderfolgende Fehler bis zur Abkühlphase
+COOLDOWN_SECONDS = 30.0
+
+# Ob hedged() nach einem Fehler der laufenden Anfrage noch auf eine weitere Route wechseln kann
+_last_route: contextvars.ContextVar[bool] = contextvars.ContextVar("llm_last_route", default=True)
+
+
+def is_last_route() -> bool:
+    """True außerhalb von hedged() und für die letzte Route; nur dann lohnen Wiederholungen mit Backoff."""
+    return _last_route.get()
+
+
+@dataclass(frozen=True)
+class Route:
+    provider: str
+    model: str
+
+    def __str__(self) -> str:
+        return f"{self.provider}:{self.model}"
+
+
+class LatencyHistogram:
+    """Histogramm über ein gleitendes Fenster der letzten Latenzen."""
+
+    def __init__(self, window: int = HISTOGRAM_WINDOW):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self._samples: deque = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        if len(self._samples) == self._samples.maxlen:
+            self.counts[self._samples[0]] -= 1
+        bucket = bisect.bisect_left(BUCKET_BOUNDS, seconds)
+        self._samples.append(bucket)
+        self.counts[bucket] += 1
+
+    @property
+    def count(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Obergrenze des Buckets, in dem das q-Quantil liegt (None ohne Messwerte)."""
+        if not self._samples:
+            return None
+        target = q * len(self._samples)
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return BUCKET_BOUNDS[bucket] if bucket < len(BUCKET_BOUNDS) else float("inf")
+        return float("inf")
+
+
+class ProviderRouter:
+    """Wählt Routen nach Latenz aus und führt abgesicherte Anfragen aus."""
+
+    def __init__(self, enabled: bool = LLM_ROUTING_ENABLED, fallbacks: Optional[List[str]] = None,
+                 hedge_percentile: float = LLM_HEDGE_PERCENTILE, hedge_delay: float = LLM_HEDGE_DELAY,
+                 min_samples: int = LLM_HEDGE_MIN_SAMPLES):
+        self.enabled = enabled
+        self.fallbacks = LLM_FALLBACK_PROVIDERS if fallbacks is None else fallbacks
+        self.hedge_percentile = hedge_percentile
+        self.hedge_delay = hedge_delay
+        self.min_samples = min_samples
+        self.histograms: Dict[Route, LatencyHistogram] = {}
+        self._failures: Dict[Route, int] = {}
+        self._cooldown_until: Dict[Route, float] = {}
+        self._routes: List[Route] = []
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {"hedged": 0, "hedge_wins": 0, "failovers": 0}
+
+    def configure(self, provider: str, model: str):
+        """Setzt die konfigurierte Primärroute und die verfügbaren Ausweichrouten."""
+        routes = [Route(provider, model)]
+        for entry in self.fallbacks:
+            name, _, fallback_model = entry.partition(":")
+            name = name.strip().lower()
+            config = AVAILABLE_PROVIDERS.get(name)
+            # Nur Provider mit hinterlegtem API-Schlüssel kommen in Frage
+            if not config or not os.getenv(config["api_key_env"]):
+                continue
+            route = Route(name, fallback_model.strip() or get_provider_model(name))
+            if route not in routes:
+                routes.append(route)
+        self._routes = routes
+
+    @property
+    def active(self) -> bool:
+        return self.enabled and len(self._routes) > 1
+
+    def _histogram(self, route: Route) -> LatencyHistogram:
+        with self._lock:
+            return self.histograms.setdefault(route, LatencyHistogram())
+
+    def p95(self, route: Route) -> Optional[float]:
+        """Latenz-Perzentil einer Route, sobald genug Messwerte vorliegen."""
+        histogram = self._histogram(route)
+        if histogram.count < self.min_samples:
+            return None
+        return histogram.percentile(self.hedge_percentile)
+
+    def rank(self) -> List[Route]:
+        """Routen in Reihenfolge der Bevorzugung.
+
+        Routen in der Abkühlphase kommen zuletzt, gemessene Routen nach p95-Latenz,
+        Routen ohne ausreichende Messwerte in konfigurierter Reihenfolge dahinter.
+        """
+        now = time.monotonic()
+
+        def key(indexed: Tuple[int, Route]):
+            index, route = indexed
+            latency = self.p95(route)
+            return (self._cooldown_until.get(route, 0.0) > now, latency is None, latency or 0.0, index)
+
+        return [route for _, route in sorted(enumerate(self._routes), key=key)]
+
+    def hedge_after(self, route: Route) -> float:
+        """Wartezeit, nach der eine abgesicherte Zweitanfrage gestartet wird."""
+        latency = self.p95(route)
+        return self.hedge_delay if latency is None else max(0.5, latency)
+
+    def record_success(self, route: Route, seconds: float):
+        self._histogram(route).record(seconds)
+        with self._lock:
+            self._failures.pop(route, None)
+            self._cooldown_until.pop(route, None)
+
+    def record_failure(self, route: Route):
+        with self._lock:
+            self._failures[route] = self._failures.get(route, 0) + 1
+            if self._failures[route] >= FAILURE_THRESHOLD:
+                self._cooldown_until[route] = time.monotonic() + COOLDOWN_SECONDS
+
+    async def _timed(self, route: Route, call: Callable[[Route], Awaitable[Any]]) -> Any:
+        start = time.monotonic()
+        try:
+            result = await call(route)
+        except asyncio.CancelledError:
+            # Abgebrochene Verlierer liefern keine aussagekräftige Latenz
+            raise
+        except Exception:
+            self.record_failure(route)
+            raise
+        self.record_success(route, time.monotonic() - start)
+        return result
+
+    async def hedged(self, call: Callable[[Route], Awaitable[Any]]) -> Any:
+        """Führt call(route) auf der bevorzugten Route aus, abgesichert durch die nächste Route.
+
+        Liefert das erste erfolgreiche Ergebnis; schlagen alle Routen fehl, wird der letzte Fehler geworfen.
+        """
+        routes = self.rank()
+        pending: Dict[asyncio.Task, Route] = {}
+        last_error: Optional[BaseException] = None
+        next_index = 0
+
+        def launch():
+            nonlocal next_index
+            route = routes[next_index]
+            next_index += 1
+            # Der Task übernimmt den Kontext beim Anlegen
+            token = _last_route.set(next_index == len(routes))
+            try:
+                pending[asyncio.ensure_future(self._timed(route, call))] = route
+            finally:
+                _last_route.reset(token)
+
+        launch()
+        try:
+            while pending:
+                # Solange weitere Routen bereitstehen, wird nur bis zur p95-Deadline der jüngsten gewartet
+                timeout = self.hedge_after(routes[next_index - 1]) if next_index < len(routes) else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.stats["hedged"] += 1
+                    launch()
+                    continue
+                for task in done:
+                    route = pending.pop(task)
+                    if task.exception() is None:
+                        if route != routes[0]:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+                    last_error = task.exception()
+                if not pending and next_index < len(routes):
+                    self.stats["failovers"] += 1
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+        assert last_error is not None
+        raise last_error
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Event-Loop in einem Hintergrund-Thread für Aufrufe aus synchronem Code."""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-router", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def run_sync(self, coroutine_factory: Callable[[], Coroutine[Any, Any, Any]]) -> Any:
+        """Führt eine Koroutine aus synchronem Code aus; die Deadline des Aufrufers wird übernommen."""
+        remaining = current_deadline() - time.monotonic()
+
+        async def scoped():
+            with deadline_scope(remaining):
+                return await coroutine_factory()
+
+        return asyncio.run_coroutine_threadsafe(scoped(), self._get_loop()).result()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "routes": [
+                {"route": str(route), "samples": self._histogram(route).count, "p95": self.p95(route)}
+                for route in self.rank()
+            ]
+        }
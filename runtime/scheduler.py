@@ -0,0 +1,232 @@
+"""
+Rate-Limit-bewusster Scheduler für LLM-Anfragen.
+Pro Provider drosseln ein Request- und ein Token-Bucket die Anfragen gleichmäßig unter das
+Provider-Limit. Fehlgeschlagene Anfragen (429, Timeouts, 5xx) werden mit exponentiellem
+Backoff und Jitter wiederholt, wobei "Retry-After" und die Deadline der Aufgabe eingehalten werden.
+"""
+
+import asyncio
+import contextvars
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import openai
+
+from config.settings import AVAILABLE_PROVIDERS, AGENT_TIMEOUT, MAX_RETRIES, LLM_RPM, LLM_TPM
+
+BACKOFF_BASE = 1.0  # Sekunden
+BACKOFF_MAX = 60.0  # Sekunden
+
+# Absolute Deadline (time.monotonic()) der aktuell laufenden Aufgabe
+_current_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("llm_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Die Anfrage konnte nicht innerhalb der Deadline abgeschlossen werden."""
+
+
+@contextmanager
+def deadline_scope(seconds: float):
+    """Setzt eine Deadline für alle LLM-Aufrufe innerhalb des Blocks.
+
+    Verschachtelte Scopes können die Deadline nur verkürzen, nie verlängern.
+    """
+    deadline = time.monotonic() + seconds
+    outer = _current_deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def current_deadline(default_timeout: float = AGENT_TIMEOUT) -> float:
+    """Liefert die Deadline des aktuellen Scopes oder eine neue ab jetzt."""
+    deadline = _current_deadline.get()
+    return deadline if deadline is not None else time.monotonic() + default_timeout
+
+
+class TokenBucket:
+    """Token-Bucket mit Rate pro Minute; Reservierungen dürfen den Bestand ins Minus ziehen."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Reserviert Tokens und liefert die Wartezeit in Sekunden, bis sie verfügbar sind."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # Anfragen größer als die Kapazität würden sonst nie bedient
+            amount = min(amount, self.capacity)
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def refund(self, amount: float):
+        """Gibt zu viel reservierte Tokens zurück (oder bucht nach, wenn amount negativ ist)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimitScheduler:
+    """Drosselt und wiederholt LLM-Anfragen pro Provider."""
+
+    def __init__(self, max_retries: int = MAX_RETRIES):
+        self.max_retries = max_retries
+        self._buckets: Dict[str, Dict[str, Optional[TokenBucket]]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "throttled_seconds": 0.0, "failures": 0}
+
+    def _get_buckets(self, provider: str) -> Dict[str, Optional[TokenBucket]]:
+        with self._lock:
+            if provider not in self._buckets:
+                limits = AVAILABLE_PROVIDERS.get(provider, {}).get("rate_limits", {})
+                rpm = LLM_RPM or limits.get("rpm", 0)
+                tpm = LLM_TPM or limits.get("tpm", 0)
+                self._buckets[provider] = {
+                    "requests": TokenBucket(rpm) if rpm else None,
+                    "tokens": TokenBucket(tpm) if tpm else None
+                }
+            return self._buckets[provider]
+
+    def _throttle_delay(self, provider: str, estimated_tokens: int) -> float:
+        buckets = self._get_buckets(provider)
+        delay = 0.0
+        if buckets["requests"]:
+            delay = max(delay, buckets["requests"].reserve(1))
+        if buckets["tokens"] and estimated_tokens:
+            delay = max(delay, buckets["tokens"].reserve(estimated_tokens))
+        return delay
+
+    def _release(self, provider: str, estimated_tokens: int):
+        """Gibt die Reservierung einer Anfrage, die nie gesendet wird, an beide Buckets zurück."""
+        buckets = self._get_buckets(provider)
+        if buckets["requests"]:
+            buckets["requests"].refund(1)
+        if buckets["tokens"] and estimated_tokens:
+            buckets["tokens"].refund(estimated_tokens)
+
+    def _acquire(self, provider: str, estimated_tokens: int, deadline: float) -> float:
+        """Reserviert Kapazität für einen Versuch und liefert die Wartezeit; wirft DeadlineExceeded ohne Reservierung."""
+        wait = self._throttle_delay(provider, estimated_tokens)
+        if wait:
+            try:
+                self._check_deadline(deadline, wait)
+            except DeadlineExceeded:
+                self._release(provider, estimated_tokens)
+                raise
+            self._count("throttled_seconds", wait)
+        self._count("requests")
+        return wait
+
+    def _count(self, key: str, amount: float = 1):
+        # Mehrere Threads und Event-Loops teilen sich den Scheduler
+        with self._lock:
+            self.stats[key] += amount
+
+    def record_usage(self, provider: str, estimated_tokens: int, actual_tokens: Optional[int]):
+        """Korrigiert den Token-Bucket um die tatsächlich verbrauchten Tokens."""
+        bucket = self._get_buckets(provider)["tokens"]
+        if bucket and actual_tokens is not None:
+            bucket.refund(estimated_tokens - actual_tokens)
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        if isinstance(error, (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError,
+                              openai.InternalServerError)):
+            return True
+        return isinstance(error, openai.APIStatusError) and error.status_code in (408, 409, 429, 500, 502, 503, 504)
+
+    @staticmethod
+    def retry_after(error: Exception) -> Optional[float]:
+        """Liest die vom Provider gewünschte Wartezeit aus den Antwort-Headern."""
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if not headers:
+            return None
+        for header, factor in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+            value = headers.get(header)
+            if value:
+                try:
+                    return max(0.0, float(value) * factor)
+                except ValueError:
+                    continue
+        return None
+
+    def backoff_delay(self, attempt: int, error: Exception) -> float:
+        """Exponentieller Backoff mit vollem Jitter; Retry-After hat Vorrang."""
+        requested = self.retry_after(error)
+        if requested is not None:
+            return requested
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+    def _check_deadline(self, deadline: float, wait: float):
+        if time.monotonic() + wait >= deadline:
+            raise DeadlineExceeded(f"Deadline würde nach {wait:.1f}s Wartezeit überschritten")
+
+    def run(self, provider: str, request: Callable[[float], Any], estimated_tokens: int = 0,
+            timeout: Optional[float] = None) -> Any:
+        """Führt request(verbleibende_zeit) gedrosselt und mit Wiederholungen aus."""
+        deadline = time.monotonic() + timeout if timeout else current_deadline()
+        attempt = 0
+        while True:
+            wait = self._acquire(provider, estimated_tokens, deadline)
+            if wait:
+                time.sleep(wait)
+            try:
+                return request(max(0.1, deadline - time.monotonic()))
+            except Exception as e:
+                delay = self._handle_failure(provider, estimated_tokens, attempt, e, deadline)
+                time.sleep(delay)
+                attempt += 1
+
+    async def arun(self, provider: str, request: Callable[[float], Awaitable[Any]], estimated_tokens: int = 0,
+                   timeout: Optional[float] = None, max_retries: Optional[int] = None) -> Any:
+        """Asynchrone Variante von run(); max_retries ersetzt für diesen Aufruf die Voreinstellung."""
+        deadline = time.monotonic() + timeout if timeout else current_deadline()
+        attempt = 0
+        while True:
+            wait = self._acquire(provider, estimated_tokens, deadline)
+            if wait:
+                await asyncio.sleep(wait)
+            try:
+                return await request(max(0.1, deadline - time.monotonic()))
+            except Exception as e:
+                delay = self._handle_failure(provider, estimated_tokens, attempt, e, deadline, max_retries)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def _handle_failure(self, provider: str, estimated_tokens: int, attempt: int, error: Exception, deadline: float,
+                        max_retries: Optional[int] = None) -> float:
+        """Entscheidet, ob wiederholt wird, und liefert die Wartezeit; wirft sonst den Fehler weiter."""
+        # Die Reservierung der fehlgeschlagenen Anfrage zählt nicht gegen das Token-Limit
+        self.record_usage(provider, estimated_tokens, 0)
+        if attempt >= (self.max_retries if max_retries is None else max_retries) or not self.is_retryable(error):
+            self._count("failures")
+            raise error
+        delay = self.backoff_delay(attempt, error)
+        if time.monotonic() + delay >= deadline:
+            self._count("failures")
+            raise DeadlineExceeded(f"Deadline überschritten nach {attempt + 1} Versuchen: {error}") from error
+        self._count("retries")
+        return delay
+
+
+# Globale Instanz
+rate_limit_scheduler = RateLimitScheduler()
@@ -0,0 +1,69 @@
+"""
+Single-Flight: Zusammenführen identischer, gleichzeitig laufender Anfragen.
+Die erste Anfrage zu einem Schlüssel führt den Aufruf aus, alle weiteren warten auf
+dasselbe Ergebnis (oder denselben Fehler), statt einen eigenen Upstream-Aufruf zu starten.
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Führt identische Aufrufe aus Threads und Event-Loops jeweils nur einmal gleichzeitig aus."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        # Futures gehören zu einer Event-Loop, daher eine Tabelle pro Loop
+        self._tasks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]" = weakref.WeakKeyDictionary()
+        self.stats = {"calls": 0, "coalesced": 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Führt fn() aus oder wartet auf den bereits laufenden Aufruf mit demselben Schlüssel."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats["calls"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Asynchrone Variante von do() für Aufrufe innerhalb derselben Event-Loop."""
+        tasks = self._tasks.setdefault(asyncio.get_running_loop(), {})
+        task = tasks.get(key)
+        if task is None:
+            self.stats["calls"] += 1
+            task = tasks[key] = asyncio.ensure_future(factory())
+            task.add_done_callback(lambda _: tasks.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+        # shield: bricht ein Wartender ab, läuft der gemeinsame Aufruf für die anderen weiter
+        return await asyncio.shield(task)
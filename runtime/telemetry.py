@@ -0,0 +1,137 @@
+"""
+Telemetrie der LLM-Aufrufe.
+Jeder Aufruf wird mit Dauer, Token-Verbrauch, geschätzten Kosten, Aufrufer und Ergebnis in
+einer rotierenden JSONL-Datei unter STATE_DIR protokolliert und kann pro Aufrufer ausgewertet werden.
+"""
+
+import asyncio
+import contextvars
+import math
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from config.settings import (
+    STATE_DIR, LLM_TELEMETRY_ENABLED, LLM_TELEMETRY_MAX_BYTES, LLM_TELEMETRY_BACKUPS, get_model_price
+)
+from runtime.jsonl_store import RotatingJsonlStore
+
+_current_caller: contextvars.ContextVar[str] = contextvars.ContextVar("llm_caller", default="unknown")
+
+
+@contextmanager
+def caller_scope(caller: str):
+    """Ordnet alle LLM-Aufrufe innerhalb des Blocks dem angegebenen Aufrufer zu."""
+    token = _current_caller.set(caller)
+    try:
+        yield
+    finally:
+        _current_caller.reset(token)
+
+
+def current_caller() -> str:
+    return _current_caller.get()
+
+
+def estimate_cost(provider: str, model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """Geschätzte Kosten in USD (None, wenn für das Modell kein Preis hinterlegt ist)."""
+    price = get_model_price(provider, model)
+    if price is None:
+        return None
+    return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+
+def usage_tokens(usage: Any) -> Dict[str, int]:
+    """Normalisiert das usage-Objekt einer API-Antwort (oder ein Dict, oder None) auf Token-Zahlen."""
+    if usage is not None and not isinstance(usage, dict):
+        usage = {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
+    return {
+        "prompt_tokens": (usage or {}).get("prompt_tokens") or 0,
+        "completion_tokens": (usage or {}).get("completion_tokens") or 0,
+    }
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Perzentil nach der Nearest-Rank-Methode."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+class LLMTelemetry:
+    """Protokolliert LLM-Aufrufe und wertet sie aus."""
+
+    def __init__(self, enabled: bool = LLM_TELEMETRY_ENABLED, store: Optional[RotatingJsonlStore] = None):
+        self.enabled = enabled
+        self.store = store or RotatingJsonlStore(STATE_DIR / "llm_telemetry.jsonl", LLM_TELEMETRY_MAX_BYTES, LLM_TELEMETRY_BACKUPS)
+
+    def record(self, provider: str, model: str, duration: float, outcome: str = "ok",
+               usage: Any = None, error: Optional[BaseException] = None, **extra: Any):
+        """Protokolliert einen Aufruf; usage ist das usage-Objekt der API-Antwort oder ein Dict."""
+        if not self.enabled:
+            return
+        tokens = usage_tokens(usage)
+        prompt_tokens, completion_tokens = tokens["prompt_tokens"], tokens["completion_tokens"]
+        record = {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "caller": current_caller(),
+            "provider": provider,
+            "model": model,
+            "duration_ms": round(duration * 1000, 1),
+            "outcome": outcome,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cost_usd": estimate_cost(provider, model, prompt_tokens, completion_tokens) if usage else None,
+            **extra
+        }
+        if error is not None:
+            record["error"] = f"{type(error).__name__}: {error}"[:500]
+        self.store.append(record)
+
+    @contextmanager
+    def measure(self, provider: str, model: str, **extra: Any):
+        """Misst einen Aufruf; das gelieferte Dict nimmt "usage" der Antwort auf."""
+        result: Dict[str, Any] = {"usage": None}
+        start = time.monotonic()
+        try:
+            yield result
+        except BaseException as e:
+            # Abgebrochene Anfragen (z. B. verlorene Hedging-Anfragen) sind keine Fehler
+            outcome = "cancelled" if isinstance(e, asyncio.CancelledError) else "error"
+            self.record(provider, model, time.monotonic() - start, outcome, error=e, **extra)
+            raise
+        self.record(provider, model, time.monotonic() - start, "ok", usage=result["usage"], **extra)
+
+    def read(self) -> Iterable[Dict[str, Any]]:
+        return self.store.read()
+
+    @staticmethod
+    def summarize(records: Iterable[Dict[str, Any]], group_by: str = "caller") -> List[Dict[str, Any]]:
+        """Fasst Datensätze pro Gruppe zusammen: Latenz-Perzentile, Tokens, Kosten und Fehler."""
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            groups.setdefault(str(record.get(group_by, "unknown")), []).append(record)
+
+        summary = []
+        for key, entries in sorted(groups.items()):
+            durations = [entry["duration_ms"] for entry in entries if entry.get("outcome") == "ok"]
+            costs = [entry["cost_usd"] for entry in entries if entry.get("cost_usd") is not None]
+            summary.append({
+                group_by: key,
+                "calls": len(entries),
+                "errors": sum(1 for entry in entries if entry.get("outcome") == "error"),
+                "p50_ms": percentile(durations, 0.50),
+                "p95_ms": percentile(durations, 0.95),
+                "p99_ms": percentile(durations, 0.99),
+                "prompt_tokens": sum(entry.get("prompt_tokens") or 0 for entry in entries),
+                "completion_tokens": sum(entry.get("completion_tokens") or 0 for entry in entries),
+                "cost_usd": sum(costs) if costs else None,
+                "cost_p95_usd": percentile(costs, 0.95),
+            })
+        return summary
+
+
+# Globale Instanz
+llm_telemetry = LLMTelemetry()
@@ -0,0 +1,69 @@
+"""
+Trace der Agenten-Sitzungen für die Fehlersuche.
+Pro Schritt werden nur die neu hinzugekommenen Nachrichten als einzelne Zeilen in eine
+rotierende JSONL-Datei unter STATE_DIR geschrieben. Aktiv nur mit DEBUG_MODE.
+"""
+
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from config.settings import STATE_DIR, DEBUG_MODE, AGENT_TRACE_MAX_BYTES, AGENT_TRACE_BACKUPS
+from runtime.jsonl_store import RotatingJsonlStore
+
+
+class TraceSession:
+    """Verfolgt, welche Nachrichten einer Sitzung bereits geschrieben wurden."""
+
+    def __init__(self, sink: "TraceSink", agent: str, task: str, written: int = 0):
+        self.sink = sink
+        self.id = uuid.uuid4().hex[:12]
+        # Bei fortgesetzten Verläufen sind die ersten Nachrichten bereits früher protokolliert
+        self.written = written
+        sink.write(self.id, "start", agent=agent, task=task)
+
+    def record_step(self, step: int, messages: List[Dict[str, Any]]):
+        """Schreibt die seit dem letzten Aufruf hinzugekommenen Nachrichten."""
+        for index in range(self.written, len(messages)):
+            self.sink.write(self.id, "message", step=step, index=index, message=messages[index])
+        self.written = len(messages)
+
+    def finish(self, status: str):
+        self.sink.write(self.id, "end", status=status)
+
+
+class TraceSink:
+    """Schreibt Trace-Ereignisse; ohne DEBUG_MODE ist jede Operation ein No-op."""
+
+    def __init__(self, enabled: bool = DEBUG_MODE, store: Optional[RotatingJsonlStore] = None):
+        self.enabled = enabled
+        self.store = store or RotatingJsonlStore(STATE_DIR / "agent_trace.jsonl", AGENT_TRACE_MAX_BYTES, AGENT_TRACE_BACKUPS)
+
+    def start(self, agent: str, task: str, written: int = 0) -> Optional[TraceSession]:
+        return TraceSession(self, agent, task, written) if self.enabled else None
+
+    def write(self, session_id: str, event: str, **data: Any):
+        self.store.append({"ts": datetime.now().isoformat(timespec="milliseconds"), "session": session_id, "event": event, **data})
+
+    def read(self) -> Iterable[Dict[str, Any]]:
+        return self.store.read()
+
+    def sessions(self) -> List[Dict[str, Any]]:
+        """Übersicht aller Sitzungen in der Reihenfolge ihres Starts."""
+        sessions: Dict[str, Dict[str, Any]] = {}
+        for record in self.read():
+            session = sessions.setdefault(record["session"], {"session": record["session"], "messages": 0, "status": None})
+            if record["event"] == "start":
+                session.update(started=record["ts"], agent=record.get("agent"), task=record.get("task"))
+            elif record["event"] == "message":
+                session["messages"] += 1
+            elif record["event"] == "end":
+                session["status"] = record.get("status")
+        return list(sessions.values())
+
+    def session_records(self, session_id: str) -> List[Dict[str, Any]]:
+        return [record for record in self.read() if record["session"] == session_id]
+
+
+# Globale Instanz
+trace_sink = TraceSink()
@@ -0,0 +1,18 @@
+"""
+Gemeinsame Fixtures der Tests
+"""
+
+import pytest
+
+import tools.bm25_index
+import tools.search_index
+
+
+@pytest.fixture(autouse=True)
+def isolated_search_index(tmp_path_factory, monkeypatch):
+    """Suchindizes landen in einem eigenen temporären Verzeichnis statt im echten SEARCH_INDEX_DIR"""
+    index_dir = tmp_path_factory.mktemp("search_index")
+    for module in (tools.search_index, tools.bm25_index):
+        monkeypatch.setattr(module, "SEARCH_INDEX_DIR", index_dir)
+        monkeypatch.setattr(module, "_indexes", {})
+    return index_dir
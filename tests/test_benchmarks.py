@@ -0,0 +1,64 @@
+"""
+Tests für den Stub-Server und die Auswertung der Benchmarks
+"""
+
+import pytest
+from openai import OpenAI
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.run import compare
+from llm import StreamedMessage
+
+
+@pytest.fixture
+def server():
+    with FakeOpenAIServer() as server:
+        yield server
+
+
+def test_scripted_tool_calls_are_streamed(server):
+    """Test dass skriptierte Tool-Aufrufe als Stream ankommen und sich zusammensetzen lassen"""
+    server.responder = lambda request: {"tool_calls": [{"name": "read_file", "arguments": {"path": "main.py"}}]}
+    client = OpenAI(api_key="test", base_url=server.base_url, max_retries=0)
+
+    message = StreamedMessage()
+    for chunk in client.chat.completions.create(model="m", messages=[{"role": "user", "content": "hi"}], stream=True):
+        message.add_chunk(chunk)
+
+    assert message.to_message()["tool_calls"][0]["function"] == {"name": "read_file", "arguments": '{"path": "main.py"}'}
+    assert message.finish_reason == "tool_calls"
+    assert message.usage is not None
+    assert server.stats["requests"] == 1
+
+
+def test_completions_and_embeddings(server):
+    """Test der nicht gestreamten Antworten und deterministischen Embeddings"""
+    client = OpenAI(api_key="test", base_url=server.base_url, max_retries=0)
+    response = client.chat.completions.create(model="m", messages=[{"role": "user", "content": "hi"}])
+    assert response.choices[0].message.content == "OK"
+
+    first = client.embeddings.create(model="e", input="text").data[0].embedding
+    assert len(first) == 1536
+    assert client.embeddings.create(model="e", input="text").data[0].embedding == first
+
+
+def test_compare_flags_slowdowns_and_extra_requests():
+    """Test dass Verlangsamungen über der Toleranz und zusätzliche LLM-Anfragen gemeldet werden"""
+    baseline = {"results": [
+        {"scenario": "a", "size": 1, "median_ms": 100.0, "llm_requests": 2},
+        {"scenario": "b", "size": 1, "median_ms": 100.0, "llm_requests": 2},
+        {"scenario": "c", "size": 1, "median_ms": 100.0, "llm_requests": 2},
+    ]}
+    results = [
+        {"scenario": "a", "size": 1, "median_ms": 110.0, "llm_requests": 2},
+        {"scenario": "b", "size": 1, "median_ms": 130.0, "llm_requests": 2},
+        {"scenario": "c", "size": 1, "median_ms": 90.0, "llm_requests": 3},
+    ]
+
+    regressions = compare(baseline, results, tolerance=0.2)
+
+    assert [entry["scenario"] for entry in regressions] == ["b", "c"]
+    assert results[0]["ratio"] == 1.1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
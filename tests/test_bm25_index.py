@@ -0,0 +1,81 @@
+"""
+Tests für die BM25-Rangfolge von codebase_search
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from tools.bm25_index import BM25Index, rank_chunks, tokenize
+
+
+class TestBM25Index:
+
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.db_path = self.temp_dir / "bm25.sqlite3"
+        self.root = self.temp_dir / "repo"
+        (self.root / "auth").mkdir(parents=True)
+        (self.root / "auth" / "session.py").write_text(
+            "class SessionManager:\n    def validate_token(self, token):\n        return check_token_expiry(token)\n",
+            encoding="utf-8")
+        (self.root / "auth" / "login.py").write_text(
+            "def loginUser(name, password):\n    token = issue_token(name)\n    return token\n", encoding="utf-8")
+        (self.root / "utils.py").write_text("def format_name(name):\n    return name.title()\n", encoding="utf-8")
+        (self.root / "logo.png").write_bytes(b"\x89PNG token token")
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_tokenize_splits_identifiers(self):
+        """Test dass camelCase und snake_case in Bestandteile zerlegt werden"""
+        assert tokenize("getUserName") == ["getusername", "get", "user", "name"]
+        assert tokenize("max_retries = HTTPServer()") == ["max_retries", "max", "retries", "httpserver", "http", "server"]
+        assert tokenize("a = 1") == []
+
+    def test_search_ranks_files_and_chunks(self):
+        """Test dass die relevanteste Datei zuerst kommt und Bezeichnerteile gefunden werden"""
+        root = str(self.root)
+        index = BM25Index(self.root, db_path=self.db_path)
+        ranking = index.search("validate session token", [root])
+
+        files = [result["file"] for result in ranking["results"]]
+        assert files == [os.path.join(root, "auth", "session.py"), os.path.join(root, "auth", "login.py")]
+        assert ranking["total_files_searched"] == 3
+        best = ranking["results"][0]
+        assert best["chunks"][0]["start_line"] == 1
+        assert best["matches"][0]["line"] == 2
+        # Nur Dateien unterhalb der Zielverzeichnisse
+        assert index.search("format name", [str(self.root / "auth")])["results"][0]["file"].endswith("login.py")
+        index.close()
+
+    def test_index_persists_and_updates_incrementally(self):
+        """Test dass nur geänderte Dateien neu indiziert und gelöschte entfernt werden"""
+        root = str(self.root)
+        first = BM25Index(self.root, db_path=self.db_path)
+        assert first.refresh() == 3
+        first.close()
+
+        second = BM25Index(self.root, db_path=self.db_path)
+        assert second.refresh() == 0
+        (self.root / "utils.py").write_text("def refresh_token_cache():\n    pass\n", encoding="utf-8")
+        os.remove(self.root / "auth" / "login.py")
+        files = [result["file"] for result in second.search("refresh token", [root])["results"]]
+        assert files == [os.path.join(root, "utils.py"), os.path.join(root, "auth", "session.py")]
+        assert second.stats["indexed"] == 1
+        second.close()
+
+    def test_unwritable_index_dir_falls_back_to_memory(self):
+        """Test dass ein nicht anlegbares Indexverzeichnis auf einen Speicher-Index ausweicht"""
+        (self.temp_dir / "blocked").write_text("kein Verzeichnis", encoding="utf-8")
+        index = BM25Index(self.root, db_path=self.temp_dir / "blocked" / "bm25.sqlite3")
+        ranking = index.search("validate session token", [str(self.root)])
+        assert ranking["results"][0]["file"].endswith("session.py")
+        assert index.db_path is None
+        index.close()
+
+    def test_rank_chunks_prefers_dense_block(self):
+        """Test dass der Block mit den meisten Anfrageterme vorne steht"""
+        lines = ["x = 1"] * 10 + ["cache_key = build_cache_key()"] + ["y = 2"] * 10
+        chunks = rank_chunks(lines, {"cache": 1.0, "key": 0.5}, chunk_lines=5)
+        assert [(chunk["start_line"], chunk["end_line"]) for chunk in chunks] == [(11, 15)]
@@ -0,0 +1,86 @@
+"""
+Tests für die Budgets der Agenten-Schleife
+"""
+
+import pytest
+from agents.base_agent import Task
+from agents.tool_agent import ToolAgent
+from runtime.budget import AgentBudget, BudgetTracker
+
+
+def test_budget_from_context():
+    """Test dass Budgets als Objekt, Dict oder gar nicht übergeben werden können"""
+    assert AgentBudget.from_context(None) == AgentBudget()
+    assert AgentBudget.from_context({"max_steps": 3}).max_steps == 3
+    budget = AgentBudget(max_tokens=100)
+    assert AgentBudget.from_context(budget) is budget
+    with pytest.raises(ValueError):
+        AgentBudget.from_context({"max_stepz": 3})
+
+
+def test_tracker_reports_token_limit_and_steps():
+    """Test dass Token-Verbrauch gezählt und das erschöpfte Limit gemeldet wird"""
+    tracker = BudgetTracker(AgentBudget(max_tokens=100))
+    tracker.record_llm(0, 0.2, {"prompt_tokens": 60, "completion_tokens": 10})
+    tracker.record_tools(0.1, 2)
+    assert tracker.check() is None
+    assert tracker.remaining_tokens() == 30
+    tracker.record_llm(1, 0.2, {"prompt_tokens": 25, "completion_tokens": 5})
+    assert tracker.check() == "max_tokens"
+
+    report = tracker.report()
+    assert report["used"]["tokens"] == 100
+    assert report["steps"][0] == {"step": 0, "llm_ms": 200.0, "tool_ms": 100.0, "tool_calls": 2,
+                                  "prompt_tokens": 60, "completion_tokens": 10}
+
+
+def test_agent_answers_without_tools_in_last_step(monkeypatch):
+    """Test dass der letzte erlaubte Schritt ohne Tools abgeschlossen wird"""
+    agent = ToolAgent()
+    finals = []
+
+    def fake_complete(messages, step, tracker=None, final=False):
+        finals.append(final)
+        tracker.record_llm(step, 0.01, {"prompt_tokens": 10, "completion_tokens": 5})
+        if final:
+            return {"role": "assistant", "content": "zwischenstand"}
+        call = {"id": f"c{step}", "type": "function", "function": {"name": "list_dir", "arguments": '{"DirectoryPath": "."}'}}
+        return {"role": "assistant", "content": None, "tool_calls": [call]}
+
+    monkeypatch.setattr(agent, "_complete", fake_complete)
+    result = agent.process_task(Task(description="aufgabe", context={"budget": {"max_steps": 3}}))
+
+    assert finals == [False, False, True]
+    assert result["status"] == "completed"
+    assert result["final_response"] == "zwischenstand"
+    # Die Antwort im letzten erlaubten Schritt hält das Budget ein
+    assert result["budget"]["exhausted"] is None
+    assert [step["tool_calls"] for step in result["budget"]["steps"]] == [1, 1, 0]
+
+
+def test_agent_reports_max_steps_when_final_step_calls_tools(monkeypatch):
+    """Test dass das Schrittlimit erst als erschöpft gilt, wenn auch der letzte Schritt keine Antwort liefert"""
+    agent = ToolAgent()
+
+    def fake_complete(messages, step, tracker=None, final=False):
+        tracker.record_llm(step, 0.01, {"prompt_tokens": 10, "completion_tokens": 5})
+        call = {"id": f"c{step}", "type": "function", "function": {"name": "list_dir", "arguments": '{"DirectoryPath": "."}'}}
+        return {"role": "assistant", "content": None, "tool_calls": [call]}
+
+    monkeypatch.setattr(agent, "_complete", fake_complete)
+    result = agent.process_task(Task(description="aufgabe", context={"budget": {"max_steps": 2}}))
+
+    assert result["status"] == "max_steps_reached"
+    assert result["budget"]["exhausted"] == "max_steps"
+
+
+def test_final_step_has_no_side_effects():
+    """Test dass final_step das anstehende Limit meldet, ohne das Budget als erschöpft zu markieren"""
+    tracker = BudgetTracker(AgentBudget(max_steps=2))
+    tracker.record_llm(0, 0.1, {})
+    assert tracker.final_step() == "max_steps"
+    assert tracker.exhausted is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
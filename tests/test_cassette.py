@@ -0,0 +1,68 @@
+"""
+Tests für das Aufzeichnen und Abspielen von LLM-Anfragen
+"""
+
+import asyncio
+import pytest
+from openai.types.chat import ChatCompletion
+from runtime.cassette import Cassette, CassetteMiss
+from tests.test_llm_streaming import make_chunk
+
+MESSAGES = [{"role": "user", "content": "hallo"}]
+
+
+def make_completion(text):
+    return ChatCompletion.model_validate({
+        "id": "cmpl", "object": "chat.completion", "created": 0, "model": "test",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": text}}],
+        "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+    })
+
+
+def test_record_then_replay_in_order(tmp_path):
+    """Test dass Antworten aufgezeichnet und in Aufnahmereihenfolge abgespielt werden"""
+    path = tmp_path / "cassette.jsonl"
+    answers = iter(["eins", "zwei"])
+    recorder = Cassette(path, mode="record")
+    for _ in range(2):
+        recorder.create("openai", lambda **kw: make_completion(next(answers)), messages=MESSAGES, model="m", timeout=5)
+
+    player = Cassette(path, mode="replay")
+    # Der Timeout gehört nicht zum Schlüssel
+    replies = [player.create("openai", None, messages=MESSAGES, model="m", timeout=t).choices[0].message.content
+               for t in (1, 2, 3)]
+    assert replies == ["eins", "zwei", "zwei"]
+    assert player.stats["replayed"] == 3
+
+    with pytest.raises(CassetteMiss):
+        player.create("openai", None, messages=MESSAGES, model="anderes")
+
+
+def test_streams_are_recorded_chunk_by_chunk(tmp_path):
+    """Test dass Streams erst nach vollständigem Lesen aufgezeichnet und als Chunks abgespielt werden"""
+    path = tmp_path / "cassette.jsonl"
+    chunks = [make_chunk({"content": "Hal"}), make_chunk({"content": "lo"}, finish_reason="stop")]
+    recorder = Cassette(path, mode="record")
+    stream = recorder.create("openai", lambda **kw: iter(chunks), messages=MESSAGES, model="m", stream=True)
+    assert not path.exists()
+    assert [c.choices[0].delta.content for c in stream] == ["Hal", "lo"]
+
+    player = Cassette(path, mode="replay")
+    replayed = player.create("openai", None, messages=MESSAGES, model="m", stream=True)
+    assert [c.choices[0].delta.content for c in replayed] == ["Hal", "lo"]
+
+
+def test_async_replay(tmp_path):
+    """Test das asynchrone Aufzeichnen und Abspielen"""
+    path = tmp_path / "cassette.jsonl"
+
+    async def create(**kw):
+        return make_completion("async")
+
+    asyncio.run(Cassette(path, mode="record").acreate("openai", create, messages=MESSAGES, model="m"))
+    response = asyncio.run(Cassette(path, mode="replay").acreate("openai", create, messages=MESSAGES, model="m"))
+    assert response.choices[0].message.content == "async"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
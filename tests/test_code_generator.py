@@ -0,0 +1,46 @@
+"""
+Tests für den Umgang der Agenten mit API-Fehlern beim Schreiben von LLM-Ausgaben
+"""
+
+from agents.code_generator import CodeGenerator
+from agents.debugger import Debugger
+from llm import API_ERROR_PREFIX
+from tools.file_tools import file_manager
+
+ERROR_RESPONSE = f"{API_ERROR_PREFIX}: 429 Too Many Requests"
+
+
+class TestErrorResponses:
+
+    def setup_method(self):
+        self.generator = CodeGenerator()
+        self.generator.get_llm_response = lambda prompt, **kwargs: ERROR_RESPONSE
+
+    def test_refactor_keeps_file_on_error_response(self, tmp_path):
+        """Test dass eine Fehlermeldung der API vorhandenen Code nicht überschreibt"""
+        source = tmp_path / "app.py"
+        source.write_text("def main():\n    return 42\n", encoding="utf-8")
+        result = self.generator.refactor_code("Aufräumen", {"file_path": str(source)})
+        assert result == {"success": False, "error": ERROR_RESPONSE}
+        assert source.read_text(encoding="utf-8") == "def main():\n    return 42\n"
+        assert not (tmp_path / "app.py.backup").exists()
+
+    def test_generation_writes_nothing_on_error_response(self, tmp_path):
+        """Test dass bei API-Fehlern keine neuen Dateien entstehen"""
+        context = {"project_path": str(tmp_path), "filename": "main.py"}
+        assert self.generator.general_code_generation("Rechner", context)["success"] is False
+        assert self.generator.implement_feature("Rechner", context)["success"] is False
+        assert self.generator.create_module("Rechner", {**context, "module_name": "calc"})["success"] is False
+        assert list(tmp_path.iterdir()) == []
+
+    def test_debugger_does_not_apply_error_response(self, tmp_path, monkeypatch):
+        """Test dass der Debugger eine Fehlermeldung nicht als Fix anwendet"""
+        monkeypatch.setattr(file_manager, "base_path", tmp_path)
+        source = tmp_path / "projects" / "demo" / "src" / "main.py"
+        source.parent.mkdir(parents=True)
+        source.write_text("x = 1\n", encoding="utf-8")
+        debugger = Debugger()
+        debugger.get_llm_response = lambda prompt, **kwargs: ERROR_RESPONSE
+        result = debugger.fix_performance_issue("Zu langsam", {"project_name": "demo", "target_file": "main.py"})
+        assert result["success"] is False
+        assert source.read_text(encoding="utf-8") == "x = 1\n"
@@ -0,0 +1,110 @@
+"""
+Tests für die token-bewusste Kontextfenster-Verwaltung
+"""
+
+import pytest
+import runtime.context_window as context_window
+from runtime.context_window import ContextWindowManager, count_message_tokens, compact_history
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(context_window, "get_context_window", lambda provider, model: 2000)
+    # Deterministische Zählung, unabhängig davon ob tiktoken verfügbar ist
+    monkeypatch.setattr(context_window, "count_tokens", lambda text: -(-len(text or "") // 3))
+    return ContextWindowManager("moonshot", "moonshot-v1-8k", reserve_tokens=200)
+
+
+def tool_turn(call_id, content):
+    return [
+        {"role": "assistant", "content": None, "tool_calls": [
+            {"id": call_id, "type": "function", "function": {"name": "read_file", "arguments": "{}"}}
+        ]},
+        {"role": "tool", "tool_call_id": call_id, "name": "read_file", "content": content},
+    ]
+
+
+def test_messages_within_budget_are_unchanged(manager):
+    """Test dass kleine Konversationen nicht verändert werden"""
+    messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "hallo"}]
+    assert manager.fit(messages) is messages
+
+
+def test_old_tool_outputs_are_truncated_first(manager):
+    """Test dass ältere Tool-Ausgaben vor dem Verwerfen gekürzt werden"""
+    messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "aufgabe"}]
+    messages += tool_turn("a", "x" * 6000)
+    messages += tool_turn("b", "kurz")
+
+    fitted = manager.fit(messages)
+
+    assert len(fitted) == len(messages)
+    assert "gekürzt" in fitted[3]["content"]
+    assert fitted[5]["content"] == "kurz"
+    assert sum(count_message_tokens(m) for m in fitted) <= manager.budget()
+
+
+def test_oldest_groups_are_dropped_with_their_tool_results(manager):
+    """Test dass Tool-Antworten nie ohne ihren Assistenten-Aufruf übrig bleiben"""
+    messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "aufgabe"}]
+    for i in range(6):
+        messages += tool_turn(f"call_{i}", "y" * 1900)
+
+    fitted = manager.fit(messages)
+
+    assert fitted[0]["role"] == "system"
+    assert fitted[1]["content"] == "aufgabe"
+    assert fitted[-1]["tool_call_id"] == "call_5"
+    call_ids = {tc["id"] for m in fitted for tc in m.get("tool_calls") or []}
+    assert all(m["tool_call_id"] in call_ids for m in fitted if m["role"] == "tool")
+    assert sum(count_message_tokens(m) for m in fitted) <= manager.budget()
+
+
+def test_tools_reduce_the_budget(manager):
+    """Test dass Tool-Schemata vom Budget abgezogen werden"""
+    tools = [{"type": "function", "function": {"name": "t", "description": "z" * 900}}]
+    assert manager.budget(tools) < manager.budget()
+
+
+def test_system_prefix_is_kept_byte_identical(manager):
+    """Test dass beim Notkürzen die Nutzernachricht statt des System-Prompts gekürzt wird"""
+    system = {"role": "system", "content": "s" * 3000}
+    messages = [system, {"role": "user", "content": "u" * 3000}]
+
+    fitted = manager.fit(messages)
+
+    assert fitted[0] == system
+    assert "gekürzt" in fitted[1]["content"]
+
+
+def test_compact_history_stubs_old_tool_outputs_then_drops_turns():
+    """Test dass ältere Runden erst gekürzt und dann entfernt werden, die letzten Runden nie"""
+    history = [{"role": "system", "content": "sys"}]
+    for turn in range(4):
+        history.append({"role": "user", "content": f"frage {turn}"})
+        history += tool_turn(f"call_{turn}", "z" * 4000)
+        history.append({"role": "assistant", "content": f"antwort {turn}"})
+
+    compact_history(history, max_tokens=100000, keep_turns=2)
+    assert len(history) == 17
+    assert "gekürzt" in history[3]["content"] and len(history[3]["content"]) < 400
+    assert history[-2]["content"] == "z" * 4000
+
+    compact_history(history, max_tokens=200, keep_turns=2)
+    assert history[0]["content"] == "sys"
+    assert [m["content"] for m in history if m["role"] == "user"] == ["frage 2", "frage 3"]
+
+
+def test_estimate_without_tokenizer_is_conservative(monkeypatch):
+    """Test dass die Schätzung ohne tiktoken Code und nicht-lateinische Texte nicht unterschätzt"""
+    monkeypatch.setattr(context_window, "_get_encoding", lambda: None)
+    context_window.count_tokens.cache_clear()
+    try:
+        assert context_window.count_tokens("x" * 100) == 44
+        assert context_window.count_tokens("数据库连接失败") == 8
+    finally:
+        context_window.count_tokens.cache_clear()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
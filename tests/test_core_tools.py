@@ -10,6 +10,7 @@ import sys
 import datetime
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from tools.core_tools import CoreTools
+from tools.file_tools import FileManager
 
 
 class TestCoreTools:
@@ -61,6 +62,23 @@ class TestCoreTools:
         assert len(results) > 0
         assert "TestClass" in results[0]["content"]
     
+    def test_search_code_is_unlimited_by_default(self):
+        """Test dass die Code-Suche ohne Limits nichts stillschweigend abschneidet"""
+        test_file = Path(self.temp_dir) / "many_matches.py"
+        test_file.write_text("value = 1\n" * 250)
+        
+        assert len(self.tools.search_code("value", str(self.temp_dir))) == 250
+        assert len(self.tools.search_code("value", str(self.temp_dir), max_results=10)) == 10
+    
+    def test_search_files_is_unlimited_by_default(self):
+        """Test dass die Textsuche ohne Limits alle Dateien liefert"""
+        for i in range(60):
+            (Path(self.temp_dir) / f"notes_{i}.txt").write_text("todo: aufräumen\n")
+        
+        manager = FileManager(self.temp_dir)
+        assert len(manager.search_files("todo")) == 60
+        assert len(manager.search_files("todo", max_files=5)) == 5
+    
     def test_run_cmd(self):
         """Test das Ausführen von Kommandos"""
         result = self.tools.run_cmd("echo 'test'", timeout=5)
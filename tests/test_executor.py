@@ -0,0 +1,65 @@
+"""
+Tests für den parallelen LLM-Request-Executor
+"""
+
+import asyncio
+import pytest
+from runtime.executor import RequestExecutor
+
+
+def test_provider_limit_is_respected(monkeypatch):
+    """Test dass nie mehr Anfragen als erlaubt gleichzeitig laufen"""
+    executor = RequestExecutor()
+    monkeypatch.setattr(executor, "get_limit", lambda provider: 2)
+    state = {"running": 0, "peak": 0}
+
+    async def fake_request(value):
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        await asyncio.sleep(0.01)
+        state["running"] -= 1
+        return value
+
+    factories = [lambda value=value: fake_request(value) for value in range(6)]
+    results = executor.run_all(factories, provider="openai")
+
+    assert results == list(range(6))
+    assert state["peak"] == 2
+
+
+def test_exceptions_are_returned_in_order():
+    """Test dass Fehler einzelner Anfragen die anderen nicht abbrechen"""
+    executor = RequestExecutor()
+
+    async def failing():
+        raise RuntimeError("kaputt")
+
+    async def ok():
+        return "ok"
+
+    results = executor.run_all([ok, failing, ok], provider="moonshot")
+    assert results[0] == "ok"
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] == "ok"
+
+
+def test_generate_many_closes_clients_of_its_loop(monkeypatch):
+    """Test dass generate_many die Clients seiner Event-Loop vor deren Ende schließt"""
+    from llm import llm_manager
+    clients = []
+
+    async def fake_response(system_prompt, user_prompt, **kwargs):
+        clients.append(llm_manager._get_async_client("openai"))
+        return user_prompt
+
+    monkeypatch.setattr(llm_manager, "agenerate_response", fake_response)
+    for _ in range(2):
+        assert llm_manager.generate_many([{"system_prompt": "s", "user_prompt": "a"},
+                                          {"system_prompt": "s", "user_prompt": "b"}]) == ["a", "b"]
+    assert clients[0] is clients[1] and clients[2] is clients[3] and clients[0] is not clients[2]
+    assert all(client.is_closed() for client in clients)
+    assert len(llm_manager._async_clients) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,53 @@
+"""
+Tests für die lokale Intent-Erkennung und die Modell-Stufen
+"""
+
+import pytest
+import config.settings as settings
+from agents.intent_classifier import classify_intent, PROJECT, QUESTION
+
+
+@pytest.mark.parametrize("text", [
+    "erstelle eine website für meinen Bäcker",
+    "baue eine app die Notizen speichert",
+    "mache ein tool zum Umbenennen von Dateien",
+    "Create a REST API for a todo list",
+])
+def test_build_requests_are_projects(text):
+    assert classify_intent(text) == PROJECT
+
+
+@pytest.mark.parametrize("text", [
+    "was ist Python?",
+    "wie funktioniert das?",
+    "was siehst du hier?",
+    "hallo",
+])
+def test_questions_are_questions(text):
+    assert classify_intent(text) == QUESTION
+
+
+@pytest.mark.parametrize("text", [
+    "kannst du mir eine app bauen?",
+    "ich brauche eine website für meinen verein",
+    "Taschenrechner in Python bitte",
+    "Notizverwaltung mit SQLite",
+])
+def test_ambiguous_input_is_left_to_the_llm(text):
+    assert classify_intent(text) is None
+
+
+def test_call_sites_resolve_models_by_tier(monkeypatch):
+    """Test dass schnelle Aufrufstellen das schnelle Modell und andere das konfigurierte Modell erhalten"""
+    monkeypatch.delenv("LLM_MODEL_FAST", raising=False)
+    monkeypatch.delenv("LLM_MODEL_LARGE", raising=False)
+    monkeypatch.setenv("OPENAI_MODEL", "gpt-4o")
+    assert settings.get_call_site_model("openai", "intent") == "gpt-4o-mini"
+    assert settings.get_call_site_model("openai", "code_generation") == "gpt-4o"
+    assert settings.get_call_site_model("openai", "unbekannt") == "gpt-4o"
+    monkeypatch.setenv("LLM_MODEL_LARGE", "gpt-4-turbo")
+    assert settings.get_call_site_model("openai", "code_generation") == "gpt-4-turbo"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
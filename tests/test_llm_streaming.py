@@ -0,0 +1,51 @@
+"""
+Tests für das Zusammensetzen gestreamter LLM-Antworten
+"""
+
+import pytest
+from openai.types.chat import ChatCompletionChunk
+from llm import StreamedMessage
+
+
+def make_chunk(delta, finish_reason=None):
+    return ChatCompletionChunk.model_validate({
+        "id": "chunk",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": "test",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+    })
+
+
+def test_content_is_accumulated():
+    """Test dass Text-Fragmente als Ereignisse geliefert und zusammengesetzt werden"""
+    message = StreamedMessage()
+    events = message.add_chunk(make_chunk({"role": "assistant", "content": "Hal"}))
+    events += message.add_chunk(make_chunk({"content": "lo"}, finish_reason="stop"))
+
+    assert [e["text"] for e in events] == ["Hal", "lo"]
+    assert message.to_message() == {"role": "assistant", "content": "Hallo"}
+    assert message.finish_reason == "stop"
+
+
+def test_tool_call_arguments_are_assembled():
+    """Test das Zusammensetzen fragmentierter Tool-Aufruf-Argumente"""
+    message = StreamedMessage()
+    message.add_chunk(make_chunk({"tool_calls": [
+        {"index": 0, "id": "call_1", "type": "function", "function": {"name": "read_file", "arguments": ""}}
+    ]}))
+    message.add_chunk(make_chunk({"tool_calls": [{"index": 0, "function": {"arguments": '{"path": '}}]}))
+    events = message.add_chunk(make_chunk({"tool_calls": [{"index": 0, "function": {"arguments": '"main.py"}'}}]}))
+
+    assert events[-1]["arguments"] == '{"path": "main.py"}'
+    result = message.to_message()
+    assert result["content"] is None
+    assert result["tool_calls"] == [{
+        "id": "call_1",
+        "type": "function",
+        "function": {"name": "read_file", "arguments": '{"path": "main.py"}'}
+    }]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,93 @@
+"""
+Tests für das spekulative Vorladen von Dateien
+"""
+
+import os
+from tools.prefetch import FileWarmCache, Prefetcher
+
+
+class InlineExecutor:
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+def make_prefetcher(cache=None, enabled=True, max_files=3):
+    return Prefetcher(cache or FileWarmCache(), enabled=enabled, max_files=max_files, executor=InlineExecutor())
+
+
+def test_listing_ranks_entrypoints_first():
+    """Test dass Einstiegspunkte vor anderen Textdateien stehen und Binärdateien fehlen"""
+    result = {"status": "success", "path": "/repo", "items": [
+        {"name": "utils.py", "type": "file"},
+        {"name": "logo.png", "type": "file"},
+        {"name": "src", "type": "directory"},
+        {"name": "main.py", "type": "file"},
+        {"name": "README.md", "type": "file"},
+    ]}
+    paths = make_prefetcher().candidates("list_dir", {"DirectoryPath": "/repo"}, result)
+    assert paths == [os.path.join("/repo", name) for name in ("main.py", "README.md", "utils.py")]
+
+
+def test_search_ranks_files_by_matches():
+    """Test dass Suchtreffer nach Anzahl der Treffer sortiert und begrenzt werden"""
+    result = {"status": "success", "results": [
+        {"file": f"f{i}.py", "total_matches": i} for i in range(5)
+    ]}
+    assert make_prefetcher().candidates("grep_search", {}, result) == ["f4.py", "f3.py", "f2.py"]
+    assert make_prefetcher().candidates("grep_search", {}, {"status": "error"}) == []
+    assert make_prefetcher().candidates("view_file", {}, result) == []
+
+
+def test_warmed_file_is_a_hit_until_it_changes(tmp_path):
+    """Test dass vorgewärmte Dateien Treffer liefern und Änderungen erkannt werden"""
+    path = tmp_path / "mod.py"
+    path.write_text("def alt():\n    pass\n", encoding="utf-8")
+    cache = FileWarmCache()
+    prefetcher = make_prefetcher(cache)
+    scheduled = prefetcher.schedule("list_dir", {}, {"status": "success", "path": str(tmp_path),
+                                                    "items": [{"name": "mod.py", "type": "file"}]})
+    assert scheduled == [str(path)]
+    assert cache.stats["warmed"] == 1
+
+    assert cache.read_text(path) == "def alt():\n    pass\n"
+    assert [s["name"] for s in cache.symbols(path) if s["type"] == "FunctionDef"] == ["alt"]
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 0
+
+    path.write_text("def neu_und_laenger():\n    pass\n", encoding="utf-8")
+    assert "neu_und_laenger" in cache.read_text(path)
+    assert cache.stats["misses"] == 1
+
+
+def test_symbols_none_on_syntax_error(tmp_path):
+    """Test dass fehlerhafte Python-Dateien keine Symboltabelle liefern"""
+    path = tmp_path / "broken.py"
+    path.write_text("def kaputt(:\n", encoding="utf-8")
+    assert FileWarmCache().symbols(path) is None
+
+
+def test_disabled_prefetcher_schedules_nothing(tmp_path):
+    """Test dass ein deaktivierter Prefetcher nichts vorlädt"""
+    cache = FileWarmCache()
+    result = {"status": "success", "results": [{"file": str(tmp_path / "a.py"), "total_matches": 1}]}
+    assert make_prefetcher(cache, enabled=False).schedule("grep_search", {}, result) == []
+    assert cache.stats["warmed"] == 0
+
+
+def test_large_files_are_not_kept(tmp_path, monkeypatch):
+    """Test dass Dateien über der Größengrenze gelesen, aber nicht im Cache gehalten werden"""
+    monkeypatch.setattr("tools.prefetch.MAX_PREFETCH_BYTES", 100)
+    large = tmp_path / "daten.log"
+    large.write_text("x" * 200, encoding="utf-8")
+    cache = FileWarmCache()
+    assert cache.read_text(large) == "x" * 200
+    assert str(large) not in cache._entries
+
+
+def test_cache_is_bounded_by_total_bytes(tmp_path):
+    """Test dass die ältesten Einträge über der Byte-Grenze verdrängt werden"""
+    cache = FileWarmCache(max_bytes=250)
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (tmp_path / name).write_text("x" * 100, encoding="utf-8")
+        cache.read_text(tmp_path / name)
+    assert list(cache._entries) == [str(tmp_path / "b.txt"), str(tmp_path / "c.txt")]
+    assert cache._bytes == 200
@@ -0,0 +1,65 @@
+"""
+Tests für den persistenten LLM-Antwort-Cache
+"""
+
+import time
+import pytest
+from memory.response_cache import ResponseCache, make_request_key
+
+
+class TestResponseCache:
+
+    def setup_method(self):
+        self.messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "hallo"}]
+
+    def test_request_key_is_stable(self):
+        """Test dass gleiche Anfragen denselben Schlüssel erzeugen"""
+        key_a = make_request_key("openai", "gpt-4o", 0.1, self.messages)
+        key_b = make_request_key("openai", "gpt-4o", 0.1, [dict(m) for m in self.messages])
+        assert key_a == key_b
+        assert key_a != make_request_key("openai", "gpt-4o", 0.2, self.messages)
+        assert key_a != make_request_key("moonshot", "gpt-4o", 0.1, self.messages)
+
+    def test_hit_and_miss_counters(self, tmp_path):
+        """Test Treffer- und Fehlschlagzähler"""
+        cache = ResponseCache(tmp_path / "cache.sqlite3")
+        assert cache.get("key") is None
+        cache.set("key", "antwort")
+        assert cache.get("key") == "antwort"
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["entries"] == 1
+
+    def test_entry_limit_evicts_least_recently_used(self, tmp_path):
+        """Test die Verdrängung nach Anzahl der Einträge"""
+        cache = ResponseCache(tmp_path / "cache.sqlite3", max_entries=2)
+        cache.set("a", "1")
+        time.sleep(0.01)
+        cache.set("b", "2")
+        time.sleep(0.01)
+        cache.get("a")
+        time.sleep(0.01)
+        cache.set("c", "3")
+
+        assert cache.get("a") == "1"
+        assert cache.get("b") is None
+        assert cache.get("c") == "3"
+
+    def test_expired_entries_are_ignored(self, tmp_path):
+        """Test die Altersverdrängung"""
+        cache = ResponseCache(tmp_path / "cache.sqlite3", max_age=1)
+        cache.set("key", "alt")
+        cache._connection().execute("UPDATE responses SET created = created - 10")
+        assert cache.get("key") is None
+
+    def test_disabled_cache_bypasses_storage(self, tmp_path):
+        """Test den Bypass-Schalter"""
+        cache = ResponseCache(tmp_path / "cache.sqlite3", enabled=False)
+        assert cache.set("key", "wert") is False
+        assert cache.get("key") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,64 @@
+"""
+Tests für die seitenweise Ausgabe großer Tool-Ergebnisse
+"""
+
+import json
+import pytest
+from tools.result_pager import ResultPager
+
+
+def test_small_results_are_unchanged():
+    pager = ResultPager(max_chars=2000)
+    result = {"status": "success", "content": "kurz"}
+    assert pager.paginate(result) is result
+
+
+def test_large_text_is_paged_with_continuation_handle():
+    """Test dass große Texte gekürzt und vollständig über Seiten abrufbar sind"""
+    pager = ResultPager(max_chars=3000)
+    text = "".join(f"Zeile {i}\n" for i in range(2000))
+    first = pager.paginate({"status": "success", "content": text, "path": "gross.txt"})
+
+    assert len(json.dumps(first)) <= 3000
+    assert first["paged"] is True and first["has_more"] is True
+    assert "truncated" not in first
+    assert first["path"] == "gross.txt"
+    handle = first["continuation"]["handle"]
+
+    pages = [first["content"]]
+    for page in range(2, first["total_pages"] + 1):
+        pages.append(pager.fetch(handle, page)["content"])
+    assert "".join(pages) == text
+    assert pager.fetch(handle, first["total_pages"])["has_more"] is False
+
+
+def test_large_lists_are_paged_by_items():
+    pager = ResultPager(max_chars=2000)
+    items = [{"file": f"datei_{i}.py", "line": i} for i in range(300)]
+    first = pager.paginate({"status": "success", "results": items})
+
+    collected = list(first["results"])
+    for page in range(2, first["total_pages"] + 1):
+        collected += pager.fetch(first["continuation"]["handle"], page)["results"]
+    assert collected == items
+
+
+def test_tool_truncation_is_kept_on_every_page():
+    """Test dass truncated/truncated_reason der Suche nicht von den Seitenangaben überschrieben werden"""
+    pager = ResultPager(max_chars=2000)
+    items = [{"file": f"datei_{i}.py", "line": i} for i in range(300)]
+    first = pager.paginate({"status": "success", "results": items, "truncated": True, "truncated_reason": "max_results"})
+    last = pager.fetch(first["continuation"]["handle"], first["total_pages"])
+
+    for page in (first, last):
+        assert page["truncated"] is True
+        assert page["truncated_reason"] == "max_results"
+    assert last["has_more"] is False
+
+
+def test_unknown_handle_is_an_error():
+    assert ResultPager().fetch("res_999", 2)["status"] == "error"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
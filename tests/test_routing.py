@@ -0,0 +1,105 @@
+"""
+Tests für das latenzbasierte Provider-Routing
+"""
+
+import asyncio
+import pytest
+from runtime.routing import LatencyHistogram, ProviderRouter, Route, is_last_route
+
+PRIMARY = Route("openai", "gpt-4o")
+SECONDARY = Route("moonshot", "moonshot-v1-32k")
+
+
+@pytest.fixture
+def router():
+    router = ProviderRouter(enabled=True, fallbacks=[], hedge_delay=0.05, min_samples=3)
+    router._routes = [PRIMARY, SECONDARY]
+    return router
+
+
+def test_histogram_percentile_uses_sliding_window():
+    """Test dass nur die jüngsten Messwerte in das Perzentil eingehen"""
+    histogram = LatencyHistogram(window=10)
+    for _ in range(10):
+        histogram.record(30.0)
+    for _ in range(10):
+        histogram.record(0.2)
+    assert histogram.count == 10
+    assert histogram.percentile(0.95) < 0.3
+
+
+def test_slow_primary_is_hedged_and_cancelled(router):
+    """Test dass die Zweitanfrage gewinnt und die langsame Anfrage abgebrochen wird"""
+    cancelled = []
+
+    async def call(route):
+        if route == PRIMARY:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(route)
+                raise
+        return str(route)
+
+    assert asyncio.run(router.hedged(call)) == str(SECONDARY)
+    assert cancelled == [PRIMARY]
+    assert router.stats["hedged"] == 1
+    assert router.stats["hedge_wins"] == 1
+
+
+def test_failed_primary_fails_over_immediately(router):
+    """Test dass bei einem Fehler sofort die nächste Route versucht wird"""
+    async def call(route):
+        if route == PRIMARY:
+            raise RuntimeError("Provider down")
+        return "ok"
+
+    assert asyncio.run(router.hedged(call)) == "ok"
+    assert router.stats["failovers"] == 1
+    assert router.stats["hedged"] == 0
+
+
+def test_only_last_route_may_retry(router):
+    """Test dass nur die letzte Route Wiederholungen mit Backoff einplanen darf"""
+    seen = {}
+
+    async def call(route):
+        seen[route] = is_last_route()
+        if route == PRIMARY:
+            raise RuntimeError("Provider down")
+        return "ok"
+
+    assert asyncio.run(router.hedged(call)) == "ok"
+    assert seen == {PRIMARY: False, SECONDARY: True}
+    assert is_last_route() is True
+
+
+def test_all_routes_failing_raises_last_error(router):
+    """Test dass ohne funktionierende Route ein Fehler geworfen wird"""
+    async def call(route):
+        raise RuntimeError(str(route))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(router.hedged(call))
+
+
+def test_faster_route_becomes_primary(router):
+    """Test dass die Route mit der niedrigsten p95-Latenz bevorzugt wird"""
+    assert router.rank() == [PRIMARY, SECONDARY]
+    for _ in range(3):
+        router.record_success(PRIMARY, 20.0)
+        router.record_success(SECONDARY, 1.0)
+    assert router.rank() == [SECONDARY, PRIMARY]
+    assert router.hedge_after(SECONDARY) == pytest.approx(1.0, rel=0.25)
+
+
+def test_run_sync_from_synchronous_code(router):
+    """Test dass synchroner Code abgesicherte Anfragen ausführen kann"""
+    async def call(route):
+        return route.provider
+
+    assert router.run_sync(lambda: router.hedged(call)) == "openai"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,161 @@
+"""
+Tests für den gemeinsamen Datei-Scanner
+"""
+
+import os
+import re
+import time
+from itertools import count, islice
+from tools.scanner import IgnoreRules, Scanner, SearchLimits, grep_file, is_binary
+
+
+def make_repo(tmp_path):
+    root = tmp_path / "repo"
+    for directory in (".git", "src/build", "node_modules/pkg", "docs", "logs"):
+        (root / directory).mkdir(parents=True)
+    (root / ".gitignore").write_text("build/\n*.log\n!keep.log\n/docs/tmp*\n", encoding="utf-8")
+    (root / "src" / ".ignore").write_text("secret.py\n", encoding="utf-8")
+    for name in ("src/app.py", "src/secret.py", "src/tmp_notes.md", "src/build/out.py", "node_modules/pkg/index.js",
+                 "docs/tmp_draft.md", "docs/guide.md", "debug.log", "keep.log", "logs/run.log"):
+        (root / name).write_text("value = 1\n", encoding="utf-8")
+    return root
+
+
+def test_ignore_rules_follow_gitignore_semantics():
+    """Test dass Anker, Verzeichnismuster, ** und Negation wie bei git ausgewertet werden"""
+    rules = IgnoreRules("/repo", ["# Kommentar", "build/", "/dist", "docs/**/*.tmp", "*.log", "!keep.log"])
+    assert rules.match("/repo/src/build", is_dir=True) is True
+    assert rules.match("/repo/src/build", is_dir=False) is None
+    assert rules.match("/repo/dist", is_dir=True) is True
+    assert rules.match("/repo/src/dist", is_dir=True) is None
+    assert rules.match("/repo/docs/a/b/x.tmp", is_dir=False) is True
+    assert rules.match("/repo/x/debug.log", is_dir=False) is True
+    assert rules.match("/repo/keep.log", is_dir=False) is False
+
+
+def test_walk_prunes_ignored_and_default_directories(tmp_path):
+    """Test dass ignorierte Dateien und Verzeichnisse nie geliefert werden"""
+    root = make_repo(tmp_path)
+    files = [os.path.relpath(path, root) for path in Scanner().files(str(root))]
+    assert files == [".gitignore", "keep.log", os.path.join("docs", "guide.md"),
+                     os.path.join("src", ".ignore"), os.path.join("src", "app.py"), os.path.join("src", "tmp_notes.md")]
+    # Ignore-Dateien der Elternverzeichnisse gelten auch beim Scan eines Unterverzeichnisses
+    assert [os.path.basename(path) for path in Scanner().files(str(root / "docs"))] == ["guide.md"]
+    assert len(list(Scanner().files(str(root), respect_ignore=False))) == 11
+
+
+def test_map_keeps_order_in_process_pool(tmp_path):
+    """Test dass parallele Ergebnisse in Eingabereihenfolge geliefert werden"""
+    paths = []
+    for i in range(12):
+        path = tmp_path / f"file_{i}.py"
+        path.write_text("def f():\n    return 1\n" * (i % 3), encoding="utf-8")
+        paths.append(str(path))
+    scanner = Scanner(workers=2, min_parallel_files=1)
+    try:
+        hits = list(scanner.grep(paths, r"def \w+", 0))
+    finally:
+        scanner.shutdown()
+    assert [path for path, _ in hits] == [path for i, path in enumerate(paths) if i % 3]
+    assert [len(matches) for _, matches in hits] == [1, 2] * 4
+
+
+def test_grep_file_first_only(tmp_path):
+    """Test dass first_only nach dem ersten Treffer abbricht"""
+    path = tmp_path / "a.txt"
+    path.write_text("alpha\nbeta\nalphabet\n", encoding="utf-8")
+    assert [match["line"] for match in grep_file(str(path), "alpha")] == [1, 3]
+    assert grep_file(str(path), "ALPHA", flags=re.IGNORECASE, first_only=True) == [{"line": 1, "content": "alpha", "match": "alpha"}]
+    assert grep_file(str(tmp_path / "fehlt.txt"), "alpha") == []
+
+
+def test_grep_file_skips_binaries(tmp_path):
+    """Test dass Dateien mit NUL-Bytes im ersten Block nicht durchsucht werden"""
+    path = tmp_path / "image.png"
+    path.write_bytes(b"\x89PNG\x00\x00alpha\n")
+    assert is_binary(str(path))
+    assert grep_file(str(path), "alpha") == []
+    assert grep_file(str(path), ".*") == []
+
+
+def test_grep_file_mmap_matches_streaming(tmp_path, monkeypatch):
+    """Test dass mmap-Suche, Byte-Vorfilter und zeilenweises Lesen dieselben Treffer liefern"""
+    lines = [f"zeile {i}: {'Fehler beim Laden' if i % 500 == 7 else 'ok'} ä\r" for i in range(5000)]
+    path = tmp_path / "app.log"
+    path.write_bytes("\n".join(lines).encode("utf-8"))
+    expected = [i + 1 for i in range(5000) if i % 500 == 7]
+
+    monkeypatch.setattr("tools.scanner.SCAN_MMAP_MIN_BYTES", 1024)
+    mapped = grep_file(str(path), r"Fehler \w+ Laden ä$")
+    assert [match["line"] for match in mapped] == expected
+    assert mapped[0] == {"line": 8, "content": "zeile 7: Fehler beim Laden ä", "match": "Fehler beim Laden ä"}
+    # Ohne ableitbares Literal wird die Datei zeilenweise gestreamt
+    assert [match["line"] for match in grep_file(str(path), r"F\w+r beim")] == expected
+    assert grep_file(str(path), "FEHLER", flags=re.IGNORECASE, first_only=True)[0]["line"] == 8
+
+
+def test_grep_file_respects_size_limit(tmp_path, monkeypatch):
+    """Test dass Dateien über SCAN_MAX_FILE_BYTES übersprungen werden"""
+    path = tmp_path / "big.txt"
+    path.write_text("alpha\n" * 100, encoding="utf-8")
+    monkeypatch.setattr("tools.scanner.SCAN_MAX_FILE_BYTES", 100)
+    assert grep_file(str(path), "alpha") == []
+
+
+def test_map_consumes_input_lazily_and_stops_when_closed():
+    """Test dass map die Eingabe nur nach Bedarf liest, auch im Prozess-Pool"""
+    consumed = []
+
+    def numbers():
+        for i in count():
+            consumed.append(i)
+            yield -i
+
+    assert list(islice(Scanner(workers=1).map(abs, numbers()), 3)) == [0, 1, 2]
+    consumed.clear()
+    scanner = Scanner(workers=2, min_parallel_files=8)
+    try:
+        results = scanner.map(abs, numbers())
+        assert list(islice(results, 20)) == list(range(20))
+        results.close()
+    finally:
+        scanner.shutdown()
+    # Höchstens der Anlauf und das Fenster ausstehender Pakete wurden gelesen
+    assert len(consumed) < 40
+
+
+def test_search_limits_stop_and_report_truncation():
+    """Test dass SearchLimits nach genug Treffern abbricht, kürzt und die Quelle schließt"""
+    produced = []
+
+    def hits():
+        for i in count():
+            produced.append(i)
+            yield f"file_{i}.py", [{"line": line} for line in range(3)]
+
+    collected, reason = SearchLimits(max_results=7, max_files=0, time_budget=0).collect_hits(hits())
+    assert reason == "max_results"
+    assert [len(matches) for _, matches in collected] == [3, 3, 1]
+    assert len(produced) == 3
+    collected, reason = SearchLimits(max_results=0, max_files=2, time_budget=0).collect_hits(hits())
+    assert (len(collected), reason) == (2, "max_files")
+    # Genau ausgeschöpfte Grenzen ohne weitere Treffer gelten nicht als gekürzt
+    collected, reason = SearchLimits(max_results=6, max_files=2, time_budget=0).collect_hits(iter(list(islice(hits(), 2))))
+    assert (len(collected), reason) == (2, None)
+    assert SearchLimits(max_results=2, time_budget=0).collect(iter("abc")) == (["a", "b"], "max_results")
+
+
+def test_search_limits_time_budget():
+    """Test dass ein abgelaufenes Zeitbudget die Suche auch ohne Treffer beendet"""
+    limits = SearchLimits(max_results=0, max_files=0, time_budget=1, started=time.monotonic() - 5)
+    hits = ((f"file_{i}.py", []) for i in limits.within_budget(count()))
+    assert limits.collect_hits(hits) == ([], "time_budget")
+
+
+def test_process_pool_does_not_fork():
+    """Test dass der Pool nicht per fork aus dem mehrthreadigen Hauptprozess startet"""
+    scanner = Scanner(workers=2)
+    try:
+        assert scanner._executor()._mp_context.get_start_method() in ("forkserver", "spawn")
+    finally:
+        scanner.shutdown()
@@ -0,0 +1,105 @@
+"""
+Tests für den Rate-Limit-Scheduler
+"""
+
+import asyncio
+import time
+import httpx
+import openai
+import pytest
+from runtime.scheduler import RateLimitScheduler, TokenBucket, DeadlineExceeded, deadline_scope, current_deadline
+
+
+def rate_limit_error(retry_after="0"):
+    response = httpx.Response(429, headers={"retry-after": retry_after},
+                              request=httpx.Request("POST", "http://localhost/v1/chat/completions"))
+    return openai.RateLimitError("zu viele Anfragen", response=response, body=None)
+
+
+def test_token_bucket_reports_wait_time():
+    """Test dass ein leerer Bucket eine Wartezeit liefert"""
+    bucket = TokenBucket(rate_per_minute=60)
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0, abs=0.05)
+    bucket.refund(1)
+    assert bucket.reserve(1) == pytest.approx(1.0, abs=0.05)
+
+
+def test_retries_rate_limit_errors_with_retry_after():
+    """Test dass 429-Fehler wiederholt werden"""
+    scheduler = RateLimitScheduler(max_retries=3)
+    attempts = []
+
+    def request(timeout):
+        attempts.append(timeout)
+        if len(attempts) < 3:
+            raise rate_limit_error()
+        return "ok"
+
+    assert scheduler.run("unknown", request, timeout=10) == "ok"
+    assert len(attempts) == 3
+    assert scheduler.stats["retries"] == 2
+
+
+def test_non_retryable_errors_are_raised_immediately():
+    """Test dass andere Fehler nicht wiederholt werden"""
+    scheduler = RateLimitScheduler(max_retries=3)
+
+    def request(timeout):
+        raise ValueError("kaputt")
+
+    with pytest.raises(ValueError):
+        scheduler.run("unknown", request, timeout=10)
+    assert scheduler.stats["requests"] == 1
+
+
+def test_max_retries_override_fails_fast():
+    """Test dass max_retries=0 einen 429-Fehler ohne Backoff weiterreicht"""
+    scheduler = RateLimitScheduler(max_retries=3)
+
+    async def request(timeout):
+        raise rate_limit_error(retry_after="5")
+
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(scheduler.arun("unknown", request, timeout=10, max_retries=0))
+    assert scheduler.stats["requests"] == 1
+    assert scheduler.stats["retries"] == 0
+
+
+def test_retry_after_beyond_deadline_raises():
+    """Test dass Wartezeiten jenseits der Deadline nicht abgewartet werden"""
+    scheduler = RateLimitScheduler(max_retries=3)
+
+    def request(timeout):
+        raise rate_limit_error(retry_after="30")
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        scheduler.run("unknown", request, timeout=1)
+    assert time.monotonic() - start < 1
+
+
+def test_requests_rejected_at_deadline_release_their_reservation():
+    """Test dass an der Deadline abgewiesene Anfragen keine Bucket-Kapazität verbrauchen"""
+    scheduler = RateLimitScheduler()
+    scheduler._buckets["limited"] = {"requests": TokenBucket(60, capacity=1), "tokens": TokenBucket(600, capacity=100)}
+    assert scheduler.run("limited", lambda timeout: "ok", estimated_tokens=100, timeout=10) == "ok"
+    for _ in range(5):
+        with pytest.raises(DeadlineExceeded):
+            scheduler.run("limited", lambda timeout: "ok", estimated_tokens=100, timeout=0.5)
+    # Nur die erste Anfrage belastet die Buckets
+    assert scheduler._buckets["limited"]["requests"].tokens == pytest.approx(0, abs=0.1)
+    assert scheduler._buckets["limited"]["tokens"].tokens == pytest.approx(0, abs=1)
+    assert scheduler.stats["requests"] == 1
+
+
+def test_nested_deadline_scopes_only_shorten():
+    """Test die Weitergabe der Deadline an verschachtelte Aufrufe"""
+    with deadline_scope(5) as outer:
+        with deadline_scope(100) as inner:
+            assert inner == outer
+            assert current_deadline() == outer
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
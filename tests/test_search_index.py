@@ -0,0 +1,113 @@
+"""
+Tests für den persistenten Trigramm-Index
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from tools import search_index
+from tools.search_index import TrigramIndex, claim_index_file, required_literals
+
+
+class TestTrigramIndex:
+
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.db_path = self.temp_dir / "index.sqlite3"
+        self.root = self.temp_dir / "repo"
+        (self.root / "pkg").mkdir(parents=True)
+        (self.root / "pkg" / "models.py").write_text("class UserModel:\n    pass\n", encoding="utf-8")
+        (self.root / "pkg" / "views.py").write_text("def render_page(request):\n    return None\n", encoding="utf-8")
+        (self.root / "README.md").write_text("Dokumentation ohne Code\n", encoding="utf-8")
+        (self.root / ".git").mkdir()
+        (self.root / ".git" / "HEAD").write_text("class UserModel in git\n", encoding="utf-8")
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_required_literals_from_regex(self):
+        """Test dass aus Mustern nur zwingend vorkommende Literale abgeleitet werden"""
+        assert required_literals("class.*Test") == [["class", "Test"]]
+        assert required_literals(r"\bdef (render)_page") == [["def render_page"]]
+        assert required_literals("abc|defg") == [["abc"], ["defg"]]
+        assert required_literals("ab|defg") is None
+        assert required_literals("[a-z]+") is None
+        assert required_literals("a.b", regex=False) == [["a.b"]]
+
+    def test_candidates_narrow_to_matching_files(self):
+        """Test dass nur Dateien mit passenden Trigrammen geliefert werden"""
+        index = TrigramIndex(self.root, db_path=self.db_path)
+        base = str(self.root)
+        assert index.candidates(base, r"class\s+UserModel") == [os.path.join(base, "pkg", "models.py")]
+        assert index.candidates(base, "RENDER_PAGE", ignore_case=True) == [os.path.join(base, "pkg", "views.py")]
+        assert index.candidates(base, "gibt es nicht", regex=False) == []
+        # Ohne ableitbare Literale sind alle Dateien Kandidaten, Versionsverwaltung ausgenommen
+        assert len(index.candidates(base, ".*")) == 3
+        index.close()
+
+    def test_index_persists_and_updates_incrementally(self):
+        """Test dass der Index gespeichert und nur geänderte Dateien neu indiziert werden"""
+        first = TrigramIndex(self.root, db_path=self.db_path)
+        assert first.refresh() == 3
+        first.close()
+
+        second = TrigramIndex(self.root, db_path=self.db_path)
+        assert second.refresh() == 0
+        (self.root / "pkg" / "views.py").write_text("def render_page(request):\n    return UserModel()\n", encoding="utf-8")
+        os.remove(self.root / "README.md")
+        second.mark_stale()
+        assert second.candidates(str(self.root / "pkg"), "UserModel") == [
+            os.path.join(str(self.root / "pkg"), name) for name in ("models.py", "views.py")
+        ]
+        assert second.stats["indexed"] == 1
+        assert second.candidates(str(self.root), "Dokumentation") == []
+        second.close()
+
+    def test_refresh_is_rate_limited_until_marked_stale(self):
+        """Test dass kurz hintereinander folgende Abfragen den Baum nicht erneut durchlaufen"""
+        index = TrigramIndex(self.root, db_path=self.db_path, refresh_interval=60)
+        base = str(self.root)
+        assert index.candidates(base, "UserModel") == [os.path.join(base, "pkg", "models.py")]
+        (self.root / "pkg" / "views.py").write_text("x = UserModel()\n", encoding="utf-8")
+        assert index.candidates(base, "UserModel") == [os.path.join(base, "pkg", "models.py")]
+        index.mark_stale()
+        assert len(index.candidates(base, "UserModel")) == 2
+        index.close()
+
+    def test_signature_without_numpy_matches(self, monkeypatch):
+        """Test dass die Signatur ohne numpy dieselben Bits setzt"""
+        data = b"class UserModel:\n    def render_page(self):\n        return None\n"
+        expected = search_index.signature(data)
+        monkeypatch.setattr(search_index, "NUMPY_AVAILABLE", False)
+        assert search_index.signature(data) == expected
+
+    def test_disabled_index_returns_all_files(self):
+        """Test dass ein deaktivierter Index alle Dateien ohne Datenbank liefert"""
+        index = TrigramIndex(self.root, db_path=self.db_path, enabled=False)
+        assert len(index.candidates(str(self.root), "UserModel")) == 3
+        assert not self.db_path.exists()
+
+    def test_unwritable_index_dir_falls_back_to_walk(self):
+        """Test dass ein nicht anlegbares Indexverzeichnis die Suche nicht scheitern lässt"""
+        (self.temp_dir / "blocked").write_text("kein Verzeichnis", encoding="utf-8")
+        index = TrigramIndex(self.root, db_path=self.temp_dir / "blocked" / "index.sqlite3")
+        assert len(index.candidates(str(self.root), "UserModel")) == 3
+        assert len(list(index.iter_candidates(str(self.root), "UserModel"))) == 3
+        assert index.enabled is False
+
+    def test_claim_evicts_unused_and_oversized_indexes(self):
+        """Test dass lange ungenutzte und die ältesten Indizes über der Größengrenze gelöscht werden"""
+        index_dir = self.temp_dir / "indexes"
+        index_dir.mkdir()
+        now = time.time()
+        ages = {"expired": 40 * 86400, "old": 3 * 86400, "recent": 86400, "current": 0}
+        for name, age in ages.items():
+            path = index_dir / f"{name}.sqlite3"
+            path.write_bytes(b"x" * 400 * 1024)
+            os.utime(path, (now - age, now - age))
+        (index_dir / "old.sqlite3-wal").write_bytes(b"x" * 1024)
+
+        claim_index_file(index_dir / "current.sqlite3", max_size_mb=1, max_age=30 * 86400)
+        assert sorted(path.name for path in index_dir.iterdir()) == ["current.sqlite3", "recent.sqlite3"]
@@ -0,0 +1,65 @@
+"""
+Tests für das Zusammenführen identischer LLM-Anfragen
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+from runtime.singleflight import SingleFlight
+
+
+def test_concurrent_threads_share_one_call():
+    """Test dass parallele Threads mit gleichem Schlüssel nur einen Aufruf auslösen"""
+    flight = SingleFlight()
+    calls = []
+
+    def upstream():
+        calls.append(1)
+        time.sleep(0.1)
+        return "antwort"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", upstream))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["antwort"] * 5
+    assert len(calls) == 1
+    assert flight.stats == {"calls": 1, "coalesced": 4}
+
+
+def test_errors_are_shared_and_key_is_released():
+    """Test dass Fehler an alle Wartenden gehen und danach neu angefragt wird"""
+    flight = SingleFlight()
+
+    def failing():
+        raise RuntimeError("kaputt")
+
+    with pytest.raises(RuntimeError):
+        flight.do("key", failing)
+    assert flight.do("key", lambda: "ok") == "ok"
+
+
+def test_async_waiters_share_one_call():
+    """Test das Zusammenführen innerhalb einer Event-Loop"""
+    flight = SingleFlight()
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    async def main():
+        return await asyncio.gather(*(flight.ado("key", upstream) for _ in range(4)), flight.ado("other", upstream))
+
+    results = asyncio.run(main())
+    assert results[:4] == [results[0]] * 4
+    assert len(calls) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
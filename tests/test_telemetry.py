@@ -0,0 +1,69 @@
+"""
+Tests für die LLM-Telemetrie und den rotierenden JSONL-Speicher
+"""
+
+import pytest
+from runtime.jsonl_store import RotatingJsonlStore
+from runtime.telemetry import LLMTelemetry, caller_scope
+
+
+@pytest.fixture
+def telemetry(tmp_path):
+    return LLMTelemetry(enabled=True, store=RotatingJsonlStore(tmp_path / "telemetry.jsonl"))
+
+
+def test_store_rotates_and_reads_in_order(tmp_path):
+    """Test dass die Datei nach Größe rotiert und alle Datensätze lesbar bleiben"""
+    store = RotatingJsonlStore(tmp_path / "log.jsonl", max_bytes=200, backups=2)
+    for i in range(20):
+        store.append({"i": i, "padding": "x" * 20})
+
+    records = [record["i"] for record in store.read()]
+    assert len(store.files()) == 3
+    assert records == sorted(records)
+    assert records[-1] == 19
+    assert 0 not in records
+
+
+def test_measure_records_caller_usage_and_cost(telemetry):
+    """Test dass Dauer, Aufrufer, Tokens und Kosten protokolliert werden"""
+    with caller_scope("CodeGenerator"):
+        with telemetry.measure("openai", "gpt-4o") as measured:
+            measured["usage"] = {"prompt_tokens": 1000, "completion_tokens": 500}
+
+    record = next(iter(telemetry.read()))
+    assert record["caller"] == "CodeGenerator"
+    assert record["outcome"] == "ok"
+    assert record["cost_usd"] == pytest.approx((1000 * 2.5 + 500 * 10.0) / 1_000_000)
+
+
+def test_errors_are_recorded_and_reraised(telemetry):
+    """Test dass fehlgeschlagene Aufrufe protokolliert und weitergereicht werden"""
+    with pytest.raises(RuntimeError):
+        with telemetry.measure("moonshot", "moonshot-v1-8k"):
+            raise RuntimeError("kaputt")
+
+    record = next(iter(telemetry.read()))
+    assert record["outcome"] == "error"
+    assert "kaputt" in record["error"]
+
+
+def test_summary_per_caller(telemetry):
+    """Test die Auswertung von Perzentilen und Token-Summen pro Aufrufer"""
+    for duration in range(1, 101):
+        with caller_scope("ToolAgent"):
+            telemetry.record("openai", "gpt-4o", duration / 1000, usage={"prompt_tokens": 10, "completion_tokens": 1})
+    with caller_scope("Debugger"):
+        telemetry.record("openai", "gpt-4o", 0.5, "error", error=RuntimeError("x"))
+
+    summary = {row["caller"]: row for row in telemetry.summarize(telemetry.read())}
+    assert summary["ToolAgent"]["p50_ms"] == 50
+    assert summary["ToolAgent"]["p95_ms"] == 95
+    assert summary["ToolAgent"]["p99_ms"] == 99
+    assert summary["ToolAgent"]["prompt_tokens"] == 1000
+    assert summary["Debugger"]["errors"] == 1
+    assert summary["Debugger"]["p50_ms"] is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
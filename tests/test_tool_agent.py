@@ -30,3 +30,79 @@ def test_browser_preview(tmp_path):
     result = agent.browser_preview(str(dir_path), port=0)
     assert result["status"] == "success"
 
+
+
+def make_tool_call(call_id, name, arguments="{}"):
+    return {"id": call_id, "type": "function", "function": {"name": name, "arguments": arguments}}
+
+
+def test_read_only_tools_run_in_parallel_and_keep_order():
+    import threading
+    import time
+    agent = ToolAgent()
+    log = []
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+
+    def slow_read(tag):
+        def run():
+            with lock:
+                running["now"] += 1
+                running["peak"] = max(running["peak"], running["now"])
+            time.sleep(0.05)
+            with lock:
+                running["now"] -= 1
+                log.append(tag)
+            return {"status": "success", "tag": tag}
+        return run
+
+    def write():
+        with lock:
+            log.append("write")
+            assert running["now"] == 0
+        return {"status": "success", "tag": "write"}
+
+    agent.available_functions = {
+        "read_file": slow_read("r1"), "grep_search": slow_read("r2"),
+        "write_file": write, "list_dir": slow_read("r3"),
+    }
+    calls = [make_tool_call("a", "read_file"), make_tool_call("b", "grep_search"),
+             make_tool_call("c", "write_file"), make_tool_call("d", "list_dir")]
+
+    messages = agent._execute_tool_calls(calls)
+
+    assert [m["tool_call_id"] for m in messages] == ["a", "b", "c", "d"]
+    assert running["peak"] == 2
+    assert log.index("write") == 2
+    assert log[-1] == "r3"
+
+
+def test_persistent_agent_continues_conversation(monkeypatch):
+    agent = ToolAgent(chat_mode=True, persistent=True)
+    seen = []
+
+    def fake_complete(messages, step, **kwargs):
+        seen.append([m["content"] for m in messages])
+        return {"role": "assistant", "content": f"antwort {len(seen)}"}
+
+    monkeypatch.setattr(agent, "_complete", fake_complete)
+    from agents.base_agent import Task
+    agent.process_task(Task(description="erste frage", task_type="chat"))
+    result = agent.process_task(Task(description="folgefrage", task_type="chat"))
+
+    assert result["final_response"] == "antwort 2"
+    assert seen[1][1:] == ["erste frage", "antwort 1", "folgefrage"]
+    assert agent.conversation[-1]["content"] == "antwort 2"
+
+
+def test_grep_search_stops_at_max_results(tmp_path):
+    """Test dass grep_search nach MaxResults Treffern abbricht und die Kürzung meldet"""
+    for i in range(5):
+        (tmp_path / f"module_{i}.py").write_text("def handler():\n    return handler\n", encoding="utf-8")
+    agent = ToolAgent()
+    result = agent.grep_search(str(tmp_path), "handler", False, [], False, MaxResults=3)
+    assert result["status"] == "success"
+    assert [hit["total_matches"] for hit in result["results"]] == [2, 1]
+    assert result["truncated"] is True and result["truncated_reason"] == "max_results"
+    complete = agent.grep_search(str(tmp_path), "handler", False, [], False, MaxResults=0, MaxFiles=0)
+    assert len(complete["results"]) == 5 and complete["truncated"] is False
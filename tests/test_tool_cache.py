@@ -0,0 +1,109 @@
+"""
+Tests für den Sitzungs-Cache der Tool-Ergebnisse
+"""
+
+import pytest
+from tools.tool_cache import ToolResultCache
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "main.py").write_text("print('hallo')")
+    return tmp_path
+
+
+def test_repeated_reads_are_served_from_cache(project):
+    """Test dass identische Aufrufe ohne Änderungen aus dem Cache kommen"""
+    cache = ToolResultCache()
+    cache.set("read_file", {"path": "src/main.py"}, {"status": "success", "content": "print('hallo')"})
+
+    assert cache.get("read_file", {"path": "src/main.py"})["content"] == "print('hallo')"
+    assert cache.get("read_file", {"path": "src/other.py"}) is None
+    assert cache.stats["hits"] == 1
+
+
+def test_external_changes_invalidate_by_mtime_and_size(project):
+    """Test dass geänderte Dateien nicht aus dem Cache geliefert werden"""
+    cache = ToolResultCache()
+    cache.set("read_file", {"path": "src/main.py"}, {"status": "success"})
+    (project / "src" / "main.py").write_text("print('geändert')")
+
+    assert cache.get("read_file", {"path": "src/main.py"}) is None
+
+
+def test_writes_invalidate_reads_and_enclosing_searches(project):
+    """Test dass schreibende Tools Lese- und Suchergebnisse der betroffenen Pfade verwerfen"""
+    cache = ToolResultCache()
+    cache.set("read_file", {"path": "src/main.py"}, {"status": "success"})
+    cache.set("grep_search", {"SearchPath": str(project / "src"), "Query": "hallo"}, {"status": "success"})
+    cache.set("list_dir", {"DirectoryPath": str(project / "docs")}, {"status": "success"})
+
+    cache.after_call("write_to_file", {"TargetFile": str(project / "src" / "main.py")})
+
+    assert cache.get("read_file", {"path": "src/main.py"}) is None
+    assert cache.get("grep_search", {"SearchPath": str(project / "src"), "Query": "hallo"}) is None
+    assert cache.get("list_dir", {"DirectoryPath": str(project / "docs")}) is not None
+
+
+def test_directory_searches_check_top_level_and_expire(project):
+    """Test dass Änderungen auf oberster Ebene sofort und tiefer im Baum nach Ablauf auffallen"""
+    (project / "src" / "pkg").mkdir()
+    nested = project / "src" / "pkg" / "a.py"
+    nested.write_text("x = 1\n")
+    cache = ToolResultCache(directory_ttl=60)
+    args = {"SearchPath": str(project / "src"), "Query": "hallo"}
+    cache.set("grep_search", args, {"status": "success", "results": []})
+    assert cache.get("grep_search", args) is not None
+
+    (project / "src" / "neu.py").write_text("print('hallo')\n")
+    assert cache.get("grep_search", args) is None
+
+    expiring = ToolResultCache(directory_ttl=0)
+    expiring.set("grep_search", args, {"status": "success", "results": []})
+    nested.write_text("print('hallo')\n")
+    assert expiring.get("grep_search", args) is None
+
+
+def test_changes_during_the_call_invalidate_the_result(project):
+    """Test dass der vor dem Aufruf ermittelte Fingerprint gespeichert wird"""
+    cache = ToolResultCache()
+    args = {"path": "src/main.py"}
+    result, fingerprint = cache.lookup("read_file", args)
+    assert result is None
+    # Das Tool liest den alten Stand, währenddessen ändert sich die Datei
+    (project / "src" / "main.py").write_text("print('während des Aufrufs geändert')")
+    cache.set("read_file", args, {"status": "success", "content": "print('hallo')"}, fingerprint)
+    assert cache.get("read_file", args) is None
+
+
+def test_dependency_analysis_is_treated_as_write(project):
+    """Test dass analyze_dependencies nicht gecacht wird und Einträge im Projekt verwirft"""
+    cache = ToolResultCache()
+    args = {"project_path": str(project), "output_format": "json"}
+    cache.set("analyze_dependencies", args, {"status": "success"})
+    assert cache.get("analyze_dependencies", args) is None
+
+    cache.set("list_dir", {"DirectoryPath": str(project)}, {"status": "success"})
+    cache.after_call("analyze_dependencies", args)
+    assert cache.get("list_dir", {"DirectoryPath": str(project)}) is None
+
+
+def test_shell_commands_clear_everything(project):
+    """Test dass Befehle den gesamten Cache leeren"""
+    cache = ToolResultCache()
+    cache.set("list_dir", {"DirectoryPath": "."}, {"status": "success"})
+    cache.after_call("run_shell_command", {"command": "echo hi"})
+
+    assert cache.get("list_dir", {"DirectoryPath": "."}) is None
+
+
+def test_errors_are_not_cached(project):
+    cache = ToolResultCache()
+    cache.set("read_file", {"path": "fehlt.py"}, {"status": "error", "message": "nicht gefunden"})
+    assert cache.get("read_file", {"path": "fehlt.py"}) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
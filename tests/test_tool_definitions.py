@@ -0,0 +1,20 @@
+"""
+Tests für die zwischengespeicherten Tool-Schemata
+"""
+
+from tools.tool_definitions import get_tool_definitions, CHAT_SAFE_TOOL_NAMES
+from runtime.context_window import serialize_tools
+
+
+def test_definitions_are_built_once():
+    """Test dass jeder Aufruf dieselbe Liste liefert (stabiler Prompt-Präfix)"""
+    assert get_tool_definitions() is get_tool_definitions()
+    assert get_tool_definitions(chat_safe=True) is get_tool_definitions(chat_safe=True)
+    assert serialize_tools(get_tool_definitions()) is serialize_tools(get_tool_definitions())
+
+
+def test_chat_safe_definitions_only_contain_chat_safe_tools():
+    names = [tool["function"]["name"] for tool in get_tool_definitions(chat_safe=True)]
+    assert names and set(names) <= CHAT_SAFE_TOOL_NAMES
+    assert "write_file" not in names
+    assert "run_shell_command" not in names
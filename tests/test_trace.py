@@ -0,0 +1,31 @@
+"""
+Tests für den inkrementellen Trace der Agenten-Sitzungen
+"""
+
+from runtime.jsonl_store import RotatingJsonlStore
+from runtime.trace import TraceSink
+
+
+def test_only_new_messages_are_written_per_step(tmp_path):
+    """Test dass jede Nachricht genau einmal protokolliert wird"""
+    sink = TraceSink(enabled=True, store=RotatingJsonlStore(tmp_path / "trace.jsonl"))
+    session = sink.start("ToolAgent", "aufgabe")
+    messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "aufgabe"}]
+    messages.append({"role": "assistant", "content": None, "tool_calls": []})
+    session.record_step(0, messages)
+    messages.append({"role": "tool", "content": "ergebnis"})
+    session.record_step(1, messages)
+    session.finish("completed")
+
+    records = sink.session_records(session.id)
+    assert [r["index"] for r in records if r["event"] == "message"] == [0, 1, 2, 3]
+    assert sink.sessions() == [{
+        "session": session.id, "messages": 4, "status": "completed",
+        "started": records[0]["ts"], "agent": "ToolAgent", "task": "aufgabe"
+    }]
+
+
+def test_disabled_sink_writes_nothing(tmp_path):
+    sink = TraceSink(enabled=False, store=RotatingJsonlStore(tmp_path / "trace.jsonl"))
+    assert sink.start("ToolAgent", "aufgabe") is None
+    assert sink.sessions() == []
@@ -0,0 +1,310 @@
+"""
+BM25-Rangfolge für codebase_search über einen persistenten invertierten Token-Index.
+Bezeichner werden in ihre Bestandteile zerlegt (camelCase, snake_case), Dateien mit ihren
+Termhäufigkeiten in SQLite unter SEARCH_INDEX_DIR abgelegt und anhand von mtime und Größe inkrementell
+aktualisiert. Eine Anfrage liest nur die Posting-Listen ihrer Terme; erst die bestplatzierten Dateien
+werden geöffnet und in Abschnitte (Chunks) zerlegt, die ebenfalls nach BM25 bewertet werden.
+"""
+
+import hashlib
+import heapq
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from config.settings import SEARCH_INDEX_ENABLED, SEARCH_INDEX_DIR, SEARCH_INDEX_MAX_FILE_BYTES
+from tools.scanner import BINARY_SNIFF_BYTES, looks_binary, scanner
+from tools.search_index import claim_index_file, index_root, is_under, walk_files
+
+CODE_EXTENSIONS = ('.py', '.js', '.ts', '.java', '.cpp', '.c', '.h', '.html', '.css', '.md', '.txt')
+# Übliche BM25-Parameter
+K1 = 1.2
+B = 0.75
+CHUNK_LINES = 40
+
+PathLike = Union[str, Path]
+
+_WORD = re.compile(r"\w+")
+_PART = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def _split(word: str) -> List[str]:
+    # camelCase wird nur in ASCII-Bezeichnern getrennt, sonst nur an Unterstrichen
+    parts = [part.lower() for part in (_PART.findall(word) if word.isascii() else word.split("_")) if part]
+    tokens = [word.lower()] if len(parts) > 1 else []
+    tokens.extend(part for part in parts if len(part) > 1)
+    return tokens
+
+
+def tokenize(text: str) -> List[str]:
+    """Kleingeschriebene Terme; zusammengesetzte Bezeichner liefern sich selbst und ihre Bestandteile.
+
+    "getUserName" -> ["getusername", "get", "user", "name"], "max_retries" -> ["max_retries", "max", "retries"]
+    """
+    return [token for word in _WORD.findall(text) for token in _split(word)]
+
+
+def count_terms(text: str) -> Counter:
+    """Termhäufigkeiten eines Textes; jeder Bezeichner wird nur einmal zerlegt."""
+    counts: Counter = Counter()
+    for word, occurrences in Counter(_WORD.findall(text)).items():
+        for token in _split(word):
+            counts[token] += occurrences
+    return counts
+
+
+def read_terms(item: Tuple[str, int], max_file_bytes: int) -> Counter:
+    """Termhäufigkeiten von (Pfad, Größe); läuft bei vielen Dateien im Prozess-Pool des Scanners."""
+    path, size = item
+    if size > max_file_bytes:
+        return Counter()
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return Counter()
+    if looks_binary(data[:BINARY_SNIFF_BYTES]):
+        return Counter()
+    return count_terms(data.decode("utf-8", errors="ignore"))
+
+
+def bm25(tf: int, idf: float, length: int, avg_length: float) -> float:
+    return idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / (avg_length or 1)))
+
+
+def rank_chunks(lines: List[str], idf: Dict[str, float], chunk_lines: int = CHUNK_LINES) -> List[Dict[str, Any]]:
+    """Bewertet aufeinanderfolgende Zeilenblöcke einer Datei mit BM25, bester Block zuerst."""
+    chunks = []
+    for start in range(0, len(lines), chunk_lines):
+        counts = count_terms("\n".join(lines[start:start + chunk_lines]))
+        chunks.append((start, counts, sum(counts.values())))
+    avg_length = sum(length for _, _, length in chunks) / len(chunks) if chunks else 0
+    ranked = [
+        {
+            "start_line": start + 1,
+            "end_line": min(start + chunk_lines, len(lines)),
+            "score": round(sum(bm25(counts[term], weight, length, avg_length) for term, weight in idf.items() if counts[term]), 3),
+        }
+        for start, counts, length in chunks
+    ]
+    return sorted((chunk for chunk in ranked if chunk["score"] > 0), key=lambda chunk: chunk["score"], reverse=True)
+
+
+class BM25Index:
+    """Invertierter Token-Index über alle Code-Dateien unterhalb von root, persistent in SQLite."""
+
+    def __init__(self, root: PathLike, db_path: Optional[PathLike] = None, enabled: bool = SEARCH_INDEX_ENABLED,
+                 max_file_bytes: int = SEARCH_INDEX_MAX_FILE_BYTES):
+        self.root = os.path.abspath(root)
+        digest = hashlib.sha256(self.root.encode("utf-8")).hexdigest()[:16]
+        # Ohne Persistenz lebt der Index nur im Speicher dieses Prozesses
+        self.db_path = (Path(db_path) if db_path else SEARCH_INDEX_DIR / f"{digest}.bm25.sqlite3") if enabled else None
+        self.max_file_bytes = max_file_bytes
+        # Pfad -> [id, mtime_ns, Größe, Anzahl Tokens]
+        self._files: Optional[Dict[str, List[int]]] = None
+        self._paths: Dict[int, str] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.stats = {"queries": 0, "indexed": 0}
+
+    def _connection(self) -> sqlite3.Connection:
+        """Öffnet die Datenbank beim ersten Zugriff und legt das Schema an."""
+        if self._conn is None:
+            if self.db_path is not None:
+                try:
+                    self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                    self._conn = self._create_schema(sqlite3.connect(str(self.db_path), timeout=5, check_same_thread=False))
+                except (OSError, sqlite3.Error) as e:
+                    # Der Index beschleunigt nur; ohne Datenbank lebt er wie bei abgeschalteter Persistenz im Speicher
+                    print(f"⚠️  BM25-Index nicht speicherbar, wird im Speicher gehalten: {e}")
+                    self.db_path = None
+            if self._conn is None:
+                self._conn = self._create_schema(sqlite3.connect(":memory:", check_same_thread=False))
+        return self._conn
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection) -> sqlite3.Connection:
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, mtime_ns INTEGER NOT NULL, "
+                "size INTEGER NOT NULL, length INTEGER NOT NULL, terms TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS postings ("
+                "term TEXT NOT NULL, file_id INTEGER NOT NULL, tf INTEGER NOT NULL, "
+                "PRIMARY KEY (term, file_id)) WITHOUT ROWID"
+            )
+            conn.commit()
+        except sqlite3.Error:
+            conn.close()
+            raise
+        return conn
+
+    def _load(self) -> Dict[str, List[int]]:
+        if self._files is None:
+            rows = self._connection().execute("SELECT id, path, mtime_ns, size, length FROM files").fetchall()
+            self._files = {path: [file_id, mtime_ns, size, length] for file_id, path, mtime_ns, size, length in rows}
+            self._paths = {file_id: path for file_id, path, _, _, _ in rows}
+        return self._files
+
+    def refresh(self, base: Optional[PathLike] = None) -> int:
+        """Gleicht den Index unterhalb von base mit dem Dateisystem ab; liefert die Zahl neu indizierter Dateien."""
+        base = os.path.abspath(base) if base else self.root
+        with self._lock:
+            return self._refresh(base)
+
+    def _refresh(self, base: str) -> int:
+        files = self._load()
+        found = {path: file_stat for path, file_stat in walk_files(base).items() if path.endswith(CODE_EXTENSIONS)}
+        changed = [
+            (path, file_stat) for path, file_stat in found.items()
+            if files.get(path, [None, None, None])[1:3] != [file_stat.st_mtime_ns, file_stat.st_size]
+        ]
+        removed = [path for path in files if is_under(path, base) and path not in found]
+        if not changed and not removed:
+            return 0
+
+        conn = self._connection()
+        try:
+            for path in removed:
+                file_id = files.pop(path)[0]
+                del self._paths[file_id]
+                self._delete_postings(conn, file_id)
+                conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+            postings = []
+            items = [(path, file_stat.st_size) for path, file_stat in changed]
+            for (path, file_stat), terms in zip(changed, scanner.map(read_terms, items, self.max_file_bytes)):
+                entry = [None, file_stat.st_mtime_ns, file_stat.st_size, sum(terms.values())]
+                if path in files:
+                    entry[0] = files[path][0]
+                    self._delete_postings(conn, entry[0])
+                    conn.execute("UPDATE files SET mtime_ns = ?, size = ?, length = ?, terms = ? WHERE id = ?",
+                                 (*entry[1:], " ".join(terms), entry[0]))
+                else:
+                    entry[0] = conn.execute(
+                        "INSERT INTO files (path, mtime_ns, size, length, terms) VALUES (?, ?, ?, ?, ?)",
+                        (path, *entry[1:], " ".join(terms))
+                    ).lastrowid
+                postings.extend((term, entry[0], tf) for term, tf in terms.items())
+                files[path] = entry
+                self._paths[entry[0]] = path
+            # In Schlüsselreihenfolge eingefügt wächst der B-Baum fast nur am Ende
+            postings.sort()
+            conn.executemany("INSERT INTO postings (term, file_id, tf) VALUES (?, ?, ?)", postings)
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            # Der Speicherstand ist nicht mehr sicher synchron und wird beim nächsten Zugriff neu geladen
+            self._files = None
+            print(f"⚠️  BM25-Index nicht beschreibbar: {e}")
+            return 0
+        self.stats["indexed"] += len(changed)
+        return len(changed)
+
+    @staticmethod
+    def _delete_postings(conn: sqlite3.Connection, file_id: int):
+        """Entfernt die Postings einer Datei über ihre gespeicherte Termliste.
+
+        Ein zweiter Index über file_id würde jedes Einfügen etwa verdreifachen.
+        """
+        row = conn.execute("SELECT terms FROM files WHERE id = ?", (file_id,)).fetchone()
+        if row and row[0]:
+            conn.executemany("DELETE FROM postings WHERE term = ? AND file_id = ?",
+                             [(term, file_id) for term in row[0].split(" ")])
+
+    def _idf(self, terms: Iterable[str]) -> Tuple[Dict[str, float], Dict[str, List[Tuple[int, int]]]]:
+        """Inverse Dokumenthäufigkeit und Posting-Liste je Anfrageterm."""
+        total = len(self._files)
+        idf, postings = {}, {}
+        for term in terms:
+            rows = self._connection().execute("SELECT file_id, tf FROM postings WHERE term = ?", (term,)).fetchall()
+            if rows:
+                idf[term] = math.log(1 + (total - len(rows) + 0.5) / (len(rows) + 0.5))
+                postings[term] = rows
+        return idf, postings
+
+    def search(self, query: str, directories: Iterable[PathLike], limit: int = 10) -> Dict[str, Any]:
+        """Die nach BM25 relevantesten Dateien unterhalb von directories mit ihren besten Abschnitten."""
+        # Treffer werden in der Schreibweise des jeweiligen Verzeichnisses geliefert
+        bases = {os.path.abspath(directory): str(directory) for directory in directories}
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            for base in bases:
+                self._refresh(base)
+            in_scope = {
+                file_id: (path, length) for path, (file_id, _, _, length) in self._files.items()
+                if any(is_under(path, base) for base in bases)
+            }
+            avg_length = sum(entry[3] for entry in self._files.values()) / len(self._files) if self._files else 0
+            idf, postings = self._idf(terms)
+            self.stats["queries"] += 1
+
+        scores: Dict[int, float] = defaultdict(float)
+        for term, rows in postings.items():
+            for file_id, tf in rows:
+                if file_id in in_scope:
+                    scores[file_id] += bm25(tf, idf[term], in_scope[file_id][1], avg_length)
+        ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return {
+            "results": [self._describe(in_scope[file_id][0], score, idf, bases) for file_id, score in ranked],
+            "total_files_searched": len(in_scope),
+            "total_files_matched": len(scores),
+        }
+
+    @staticmethod
+    def _describe(path: str, score: float, idf: Dict[str, float], bases: Dict[str, str]) -> Dict[str, Any]:
+        """Liest eine Trefferdatei und liefert ihre besten Abschnitte und Zeilen."""
+        try:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                lines = f.read().split("\n")
+        except OSError:
+            lines = []
+        relevant_lines = []
+        for i, line in enumerate(lines, 1):
+            line_terms = set(tokenize(line)) & idf.keys()
+            if line_terms:
+                relevant_lines.append({
+                    "line": i,
+                    "content": line.strip(),
+                    "relevance": round(sum(idf[term] for term in line_terms), 3)
+                })
+        relevant_lines.sort(key=lambda match: match["relevance"], reverse=True)
+        base = next(base for base in bases if is_under(path, base))
+        return {
+            "file": os.path.join(bases[base], os.path.relpath(path, base)),
+            "score": round(score, 3),
+            "chunks": rank_chunks(lines, idf)[:3],
+            "matches": relevant_lines[:5],
+            "total_matches": len(relevant_lines),
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+                # Ein reiner Speicher-Index ist mit der Verbindung verloren
+                if self.db_path is None:
+                    self._files = None
+
+
+_indexes: Dict[str, BM25Index] = {}
+_indexes_lock = threading.Lock()
+
+
+def bm25_index_for(path: PathLike) -> BM25Index:
+    """BM25-Index, dessen Wurzel path enthält."""
+    path = os.path.abspath(path)
+    with _indexes_lock:
+        root = index_root(path, _indexes)
+        if root not in _indexes:
+            _indexes[root] = BM25Index(root)
+            if _indexes[root].db_path is not None:
+                claim_index_file(_indexes[root].db_path)
+        return _indexes[root]
@@ -1,3 +1,4 @@
+import shlex
 import subprocess
 import sys
 import os
@@ -83,8 +84,11 @@ class CodeExecutor:
             ps_command = f'powershell.exe -Command "{command}"'
             cmd_parts = [ps_command]
         else:
-            # Fallback for other systems
-            cmd_parts = command.split()
+            # Fallback for other systems (Anführungszeichen wie in einer POSIX-Shell auflösen)
+            try:
+                cmd_parts = shlex.split(command)
+            except ValueError as e:
+                return {"success": False, "stdout": "", "stderr": str(e), "return_code": 1}
         
         return self._run_command(cmd_parts, working_dir)
 
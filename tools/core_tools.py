@@ -13,6 +13,9 @@ from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 import ast
 
+from tools.search_index import search_index_for
+from tools.scanner import SearchLimits
+
 
 class CoreTools:
     """Sammlung von Core Development Tools"""
@@ -99,28 +102,38 @@ class CoreTools:
             self._log_action("append_file", {"path": path}, f"error: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    def search_code(self, pattern: str, path: str = None) -> List[Dict[str, Any]]:
-        """Grep-ähnliche Suche mit Regex-Pattern"""
+    def search_code(self, pattern: str, path: str = None, max_results: Optional[int] = None,
+                    time_budget: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Grep-ähnliche Suche mit Regex-Pattern (bricht nach max_results Treffern oder time_budget Sekunden ab)
+
+        Ohne Angabe ist die Suche unbegrenzt: die Ergebnisliste kann eine Kürzung nicht anzeigen.
+        """
         try:
-            results = []
             search_path = Path(path) if path else Path(".")
+            limits = SearchLimits(max_results or 0, 0, time_budget or 0)
             
-            for file_path in search_path.rglob("*.py"):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        lines = f.readlines()
-                    
+            def matches():
+                candidates = search_index_for(search_path).iter_candidates(search_path, pattern, ignore_case=True)
+                for candidate in limits.within_budget(candidates):
+                    file_path = Path(candidate)
+                    if file_path.suffix != ".py":
+                        continue
+                    try:
+                        with open(file_path, 'r', encoding='utf-8') as f:
+                            lines = f.readlines()
+                    except (UnicodeDecodeError, PermissionError):
+                        continue
                     for line_num, line in enumerate(lines, 1):
                         if re.search(pattern, line, re.IGNORECASE):
-                            results.append({
+                            yield {
                                 "file": str(file_path),
                                 "line": line_num,
                                 "content": line.strip()
-                            })
-                except (UnicodeDecodeError, PermissionError):
-                    continue
+                            }
             
-            self._log_action("search_code", {"pattern": pattern, "path": str(search_path)}, f"found {len(results)} matches")
+            results, truncated = limits.collect(matches())
+            summary = f"found {len(results)} matches" + (f" (truncated: {truncated})" if truncated else "")
+            self._log_action("search_code", {"pattern": pattern, "path": str(search_path)}, summary)
             return results
         except Exception as e:
             self._log_action("search_code", {"pattern": pattern, "path": str(search_path)}, f"error: {str(e)}")
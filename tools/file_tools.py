@@ -1,9 +1,13 @@
 import os
+import re
 import json
 import shutil
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 import glob
+from tools.prefetch import file_warm_cache
+from tools.search_index import search_index_for
+from tools.scanner import scanner, SearchLimits
 
 class FileManager:
     def __init__(self, base_path: Optional[str] = None):
@@ -20,9 +24,8 @@ class FileManager:
     def read_file(self, file_path: str) -> str:
         """Lese Datei-Inhalt"""
         try:
-            full_path = self.base_path / file_path
-            with open(full_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            # Vom Prefetcher vorgeladene Dateien kommen aus dem Speicher
+            return file_warm_cache.read_text(self.base_path / file_path)
         except Exception as e:
             return f"Fehler beim Lesen: {str(e)}"
     
@@ -119,30 +122,26 @@ class FileManager:
             print(f"Fehler beim Erstellen: {str(e)}")
             return False
     
-    def search_files(self, search_term: str, directory: str = ".") -> List[Dict[str, Any]]:
-        """Suche in Dateien nach Text"""
+    def search_files(self, search_term: str, directory: str = ".", max_results: Optional[int] = None,
+                     max_files: Optional[int] = None, time_budget: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Suche in Dateien nach Text (bricht nach max_results Treffern, max_files Dateien oder time_budget Sekunden ab)
+
+        Ohne Angabe ist die Suche unbegrenzt: die Ergebnisliste kann eine Kürzung nicht anzeigen.
+        """
         results = []
         try:
+            limits = SearchLimits(max_results or 0, max_files or 0, time_budget or 0)
             search_path = self.base_path / directory
-            for file_path in search_path.rglob("*"):
-                if file_path.is_file():
-                    try:
-                        content = file_path.read_text(encoding='utf-8')
-                        if search_term in content:
-                            lines = content.split('\n')
-                            matches = []
-                            for i, line in enumerate(lines, 1):
-                                if search_term in line:
-                                    matches.append({
-                                        "line": i,
-                                        "content": line.strip()
-                                    })
-                            results.append({
-                                "file": str(file_path.relative_to(self.base_path)),
-                                "matches": matches
-                            })
-                    except Exception:
-                        continue
+            candidates = search_index_for(search_path).iter_candidates(search_path, search_term, regex=False)
+            # Binärdateien werden übersprungen, große Dateien per mmap durchsucht
+            hits, truncated = limits.collect_hits(scanner.grep(limits.within_budget(candidates), re.escape(search_term)))
+            for candidate, matches in hits:
+                results.append({
+                    "file": str(Path(candidate).relative_to(self.base_path)),
+                    "matches": [{"line": match["line"], "content": match["content"]} for match in matches]
+                })
+            if truncated:
+                print(f"Suche gekürzt ({truncated}): {len(results)} Dateien")
         except Exception as e:
             print(f"Fehler bei Suche: {str(e)}")
         return results
@@ -0,0 +1,194 @@
+"""
+Spekulatives Vorladen (Read-Ahead) für wahrscheinliche nächste Tool-Aufrufe.
+Nach Auflistungen und Suchen werden Inhalte und Python-Symboltabellen der aussichtsreichsten
+Dateien in einem Hintergrund-Thread gelesen, während der nächste LLM-Schritt noch läuft.
+Lesende Tools holen Dateien über den FileWarmCache und treffen so die vorgewärmten Einträge.
+"""
+
+import ast
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import TOOL_PREFETCH, TOOL_PREFETCH_MAX_FILES
+
+# Dateien, die nach einer Auflistung meist als Nächstes gelesen werden
+ENTRYPOINT_NAMES = (
+    "main.py", "__main__.py", "app.py", "manage.py", "__init__.py", "setup.py", "pyproject.toml",
+    "README.md", "package.json", "index.js", "index.ts", "requirements.txt",
+)
+TEXT_EXTENSIONS = (".py", ".md", ".toml", ".json", ".js", ".ts", ".tsx", ".jsx", ".yaml", ".yml", ".cfg", ".txt", ".html", ".css")
+# Größere Dateien werden weder spekulativ gelesen noch im Cache gehalten
+MAX_PREFETCH_BYTES = 1024 * 1024
+# Obergrenze für die Summe der zwischengespeicherten Dateigrößen
+MAX_CACHE_BYTES = 32 * 1024 * 1024
+
+Fingerprint = Tuple[int, int]
+
+
+def _fingerprint(path: str) -> Optional[Fingerprint]:
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+
+def _python_symbols(content: str) -> Optional[List[Dict[str, Any]]]:
+    """Module, Klassen und Funktionen einer Python-Datei mit Zeilenbereichen (None bei Syntaxfehlern)."""
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None
+    total_lines = len(content.split("\n"))
+    return [
+        {
+            "type": type(node).__name__,
+            "name": getattr(node, "name", "module"),
+            "line": getattr(node, "lineno", 1),
+            "end_line": getattr(node, "end_lineno", total_lines),
+        }
+        for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef, ast.Module))
+    ]
+
+
+class FileWarmCache:
+    """Dateiinhalte und Symboltabellen, gültig solange mtime und Größe der Datei unverändert sind."""
+
+    def __init__(self, max_bytes: int = MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Fingerprint, str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "warmed": 0}
+
+    def _lookup(self, path: str, fingerprint: Optional[Fingerprint]) -> Optional[Tuple[Fingerprint, str, Any]]:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == fingerprint:
+                self._entries.move_to_end(path)
+                return entry
+        return None
+
+    def _load(self, path: str, fingerprint: Optional[Fingerprint]) -> str:
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        # Große Dateien werden geliefert, aber nicht gehalten
+        if fingerprint is not None and fingerprint[1] <= MAX_PREFETCH_BYTES:
+            with self._lock:
+                previous = self._entries.pop(path, None)
+                if previous is not None:
+                    self._bytes -= previous[0][1]
+                # Symboltabelle wird erst bei Bedarf berechnet (Platzhalter: False)
+                self._entries[path] = (fingerprint, content, False)
+                self._bytes += fingerprint[1]
+                while self._bytes > self.max_bytes and len(self._entries) > 1:
+                    _, (evicted, _, _) = self._entries.popitem(last=False)
+                    self._bytes -= evicted[1]
+        return content
+
+    def read_text(self, path: Any) -> str:
+        """Liest eine Textdatei (UTF-8); Fehler werden wie bei open() ausgelöst."""
+        path = os.path.abspath(path)
+        fingerprint = _fingerprint(path)
+        entry = self._lookup(path, fingerprint)
+        with self._lock:
+            self.stats["hits" if entry else "misses"] += 1
+        return entry[1] if entry else self._load(path, fingerprint)
+
+    def symbols(self, path: Any) -> Optional[List[Dict[str, Any]]]:
+        """Symboltabelle einer Python-Datei aus dem Cache oder frisch berechnet."""
+        path = os.path.abspath(path)
+        fingerprint = _fingerprint(path)
+        entry = self._lookup(path, fingerprint)
+        content = entry[1] if entry else self._load(path, fingerprint)
+        if entry and entry[2] is not False:
+            return entry[2]
+        symbols = _python_symbols(content)
+        with self._lock:
+            if path in self._entries and self._entries[path][0] == fingerprint:
+                self._entries[path] = (fingerprint, content, symbols)
+        return symbols
+
+    def warm(self, path: str):
+        """Lädt Inhalt und (bei Python-Dateien) Symboltabelle vor; Fehler werden ignoriert."""
+        path = os.path.abspath(path)
+        fingerprint = _fingerprint(path)
+        if fingerprint is None or fingerprint[1] > MAX_PREFETCH_BYTES:
+            return
+        entry = self._lookup(path, fingerprint)
+        if entry and (entry[2] is not False or not path.endswith(".py")):
+            return
+        try:
+            if path.endswith(".py"):
+                self.symbols(path)
+            else:
+                self._load(path, fingerprint)
+        except (OSError, UnicodeDecodeError):
+            return
+        with self._lock:
+            self.stats["warmed"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+def _rank_listing(directory: str, items: List[Dict[str, Any]]) -> List[str]:
+    """Einstiegspunkte zuerst, danach Textdateien in Auflistungsreihenfolge."""
+    files = [item["name"] for item in items if item.get("type") == "file" and item.get("name")]
+    entrypoints = [name for name in ENTRYPOINT_NAMES if name in files]
+    others = [name for name in files if name not in entrypoints and name.endswith(TEXT_EXTENSIONS)]
+    return [os.path.join(directory, name) for name in entrypoints + others]
+
+
+class Prefetcher:
+    """Leitet aus Auflistungs- und Suchergebnissen die wahrscheinlich nächsten Dateien ab und wärmt sie vor."""
+
+    def __init__(self, cache: "FileWarmCache", enabled: bool = TOOL_PREFETCH, max_files: int = TOOL_PREFETCH_MAX_FILES,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        self.cache = cache
+        self.enabled = enabled
+        self.max_files = max_files
+        # Ein Thread genügt: die Arbeit ist I/O-gebunden und soll lesende Tools nicht verdrängen
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+
+    def candidates(self, tool_name: str, args: Dict[str, Any], result: Any) -> List[str]:
+        if not isinstance(result, dict) or result.get("status") != "success":
+            return []
+        if tool_name in ("list_directory", "list_dir"):
+            directory = result.get("path") or args.get("path") or args.get("DirectoryPath") or "."
+            paths = _rank_listing(directory, result.get("items") or [])
+        elif tool_name == "grep_search":
+            hits = sorted(result.get("results") or [], key=lambda hit: hit.get("total_matches", 0), reverse=True)
+            paths = [hit["file"] for hit in hits if hit.get("file")]
+        elif tool_name == "codebase_search":
+            # Bereits nach BM25 sortiert
+            paths = [hit["file"] for hit in result.get("results") or [] if hit.get("file")]
+        elif tool_name == "find_by_name":
+            base = args.get("SearchDirectory") or "."
+            paths = [
+                hit["path"] if os.path.isabs(hit["path"]) else os.path.join(base, hit["path"])
+                for hit in result.get("results") or [] if hit.get("type") == "file" and hit.get("path")
+            ]
+        else:
+            return []
+        return paths[:self.max_files]
+
+    def schedule(self, tool_name: str, args: Dict[str, Any], result: Any) -> List[str]:
+        """Plant das Vorwärmen der Kandidaten im Hintergrund und liefert sie zurück."""
+        if not self.enabled:
+            return []
+        paths = self.candidates(tool_name, args, result)
+        for path in paths:
+            self.executor.submit(self.cache.warm, path)
+        return paths
+
+
+# Globale Instanzen
+file_warm_cache = FileWarmCache()
+prefetcher = Prefetcher(file_warm_cache)
@@ -0,0 +1,114 @@
+"""
+Seitenweise Ausgabe großer Tool-Ergebnisse.
+Überschreitet ein Tool-Ergebnis das Zeichenbudget, wird das größte Feld (Text oder Liste)
+auf die erste Seite gekürzt und ein Fortsetzungs-Handle beigefügt. Das vollständige Ergebnis
+bleibt im Speicher; weitere Seiten holt das Modell mit dem Tool fetch_result_page ab.
+Die Felder truncated/truncated_reason gehören dem Tool (vorzeitig beendete Suche) und werden auf
+jeder Seite unverändert mitgeliefert; die Seitenangaben stehen in paged, has_more und page.
+"""
+
+import itertools
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import TOOL_OUTPUT_MAX_CHARS
+
+# Platz für Status, Handle und Hinweis im gekürzten Ergebnis
+ENVELOPE_RESERVE = 600
+# Felder des Tool-Ergebnisses, die auch auf abgerufenen Folgeseiten erscheinen
+CARRIED_FIELDS = ("truncated", "truncated_reason")
+
+
+def _size(value: Any) -> int:
+    return len(json.dumps(value, ensure_ascii=False, default=str))
+
+
+def _split_text(text: str, page_chars: int) -> List[str]:
+    """Teilt Text in Seiten, möglichst an Zeilenumbrüchen."""
+    pages = []
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + page_chars)
+        if end < len(text):
+            newline = text.rfind("\n", start + page_chars // 2, end)
+            if newline != -1:
+                end = newline + 1
+        pages.append(text[start:end])
+        start = end
+    return pages or [""]
+
+
+def _split_list(items: List[Any], page_chars: int) -> List[List[Any]]:
+    """Teilt eine Liste in Seiten, deren serialisierte Größe das Budget nicht überschreitet."""
+    pages: List[List[Any]] = [[]]
+    used = 0
+    for item in items:
+        cost = _size(item) + 1
+        if pages[-1] and used + cost > page_chars:
+            pages.append([])
+            used = 0
+        pages[-1].append(item)
+        used += cost
+    return pages
+
+
+class ResultPager:
+    """Kürzt übergroße Tool-Ergebnisse und verwaltet die Fortsetzungs-Handles einer Sitzung."""
+
+    def __init__(self, max_chars: int = TOOL_OUTPUT_MAX_CHARS, max_results: int = 32):
+        self.max_chars = max_chars
+        self.max_results = max_results
+        self._results: "OrderedDict[str, Tuple[str, List[Any], Dict[str, Any]]]" = OrderedDict()
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _largest_field(result: Dict[str, Any]) -> Optional[str]:
+        fields = [key for key, value in result.items() if isinstance(value, (str, list)) and value]
+        return max(fields, key=lambda key: _size(result[key]), default=None)
+
+    def paginate(self, result: Any) -> Any:
+        """Liefert das Ergebnis unverändert oder dessen erste Seite mit Fortsetzungs-Handle."""
+        if self.max_chars <= 0 or _size(result) <= self.max_chars:
+            return result
+        if not isinstance(result, dict):
+            result = {"content": result if isinstance(result, (str, list)) else json.dumps(result, ensure_ascii=False, default=str)}
+
+        field = self._largest_field(result)
+        if field is None:
+            return result
+        rest = {key: value for key, value in result.items() if key != field}
+        page_chars = max(1000, self.max_chars - _size(rest) - ENVELOPE_RESERVE)
+        value = result[field]
+        pages: List[Any] = _split_text(value, page_chars) if isinstance(value, str) else _split_list(value, page_chars)
+        if len(pages) == 1:
+            return result
+
+        handle = f"res_{next(self._counter)}"
+        with self._lock:
+            self._results[handle] = (field, pages, {key: rest[key] for key in CARRIED_FIELDS if key in rest})
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+        return {**rest, field: pages[0], **self._continuation(handle, 1, len(pages))}
+
+    @staticmethod
+    def _continuation(handle: str, page: int, total_pages: int) -> Dict[str, Any]:
+        info: Dict[str, Any] = {"paged": True, "has_more": page < total_pages, "page": page, "total_pages": total_pages}
+        if page < total_pages:
+            info["continuation"] = {"handle": handle, "next_page": page + 1}
+            info["note"] = f"Ausgabe gekürzt. Weitere Seiten mit fetch_result_page(handle='{handle}', page={page + 1})."
+        return info
+
+    def fetch(self, handle: str, page: int) -> Dict[str, Any]:
+        """Liefert eine Seite (ab 1) eines zuvor gekürzten Ergebnisses."""
+        with self._lock:
+            entry = self._results.get(handle)
+        if entry is None:
+            return {"status": "error", "message": f"Unbekanntes oder abgelaufenes Handle: {handle}"}
+        field, pages, carried = entry
+        if not 1 <= page <= len(pages):
+            return {"status": "error", "message": f"Seite {page} existiert nicht (1-{len(pages)})."}
+        return {"status": "success", "handle": handle, **carried, field: pages[page - 1],
+                **self._continuation(handle, page, len(pages))}
@@ -0,0 +1,458 @@
+"""
+Gemeinsamer Datei-Scanner für Suchen und Analysen.
+Verzeichnisse werden beim Abstieg beschnitten: Versionsverwaltung, virtuelle Umgebungen, Caches
+und alles, was .gitignore oder eigene Ignore-Dateien ausschließen, wird gar nicht erst betreten.
+Das Lesen und Durchsuchen der gefundenen Dateien verteilt Scanner.map auf einen Prozess-Pool;
+die Ergebnisse kommen in Eingabereihenfolge und werden geliefert, sobald sie vorliegen.
+Binärdateien werden am ersten Block erkannt und übersprungen, große Dateien per mmap durchsucht.
+SearchLimits beendet eine Suche nach genug Treffern, Dateien oder Zeit und schließt dabei die Pipeline.
+"""
+
+import ast
+import mmap
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import chain, islice, tee
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Pattern, Sequence, Tuple, Union
+
+from config.settings import (
+    SCAN_IGNORE_FILES, SCAN_WORKERS, SCAN_MIN_PARALLEL_FILES, SCAN_MMAP_MIN_BYTES, SCAN_MAX_FILE_BYTES,
+    SEARCH_MAX_RESULTS, SEARCH_MAX_FILES, SEARCH_TIME_BUDGET
+)
+
+# Werden unabhängig von Ignore-Dateien nie durchsucht
+DEFAULT_PRUNE_DIRS = frozenset({
+    ".git", ".hg", ".svn", "node_modules", "venv", ".venv", "__pycache__",
+    ".mypy_cache", ".pytest_cache", ".ruff_cache", ".tox", ".eggs",
+})
+# Obergrenze für die Größe eines Arbeitspakets im Pool
+MAX_CHUNK_SIZE = 256
+# Erster Block, in dem nach NUL-Bytes gesucht wird
+BINARY_SNIFF_BYTES = 8192
+COUNT_BLOCK_BYTES = 1024 * 1024
+
+PathLike = Union[str, Path]
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """Übersetzt ein gitignore-Muster in einen regulären Ausdruck über "/"-getrennte Pfade."""
+    regex, i = [], 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            regex.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            regex.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            regex.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            body = pattern[i + 1:end]
+            regex.append("[" + ("^" + body[1:] if body.startswith("!") else body) + "]")
+            i = end + 1
+        else:
+            if pattern[i] == "\\" and i + 1 < len(pattern):
+                i += 1
+            regex.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(regex)
+
+
+class IgnoreRules:
+    """Muster einer Ignore-Datei (gitignore-Syntax), bezogen auf das Verzeichnis der Datei."""
+
+    def __init__(self, base: str, lines: Iterable[str]):
+        self.base = base
+        # (Muster, negiert, nur Verzeichnisse)
+        self.rules: List[Tuple[Pattern, bool, bool]] = []
+        for line in lines:
+            line = line.rstrip("\r\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            line = line.rstrip() if not line.endswith("\\ ") else line
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            # Muster mit "/" am Anfang oder in der Mitte gelten relativ zum Verzeichnis der Ignore-Datei
+            anchored = "/" in line
+            regex = _glob_to_regex(line.lstrip("/"))
+            self.rules.append((re.compile(regex if anchored else "(?:.*/)?" + regex), negate, dir_only))
+
+    @classmethod
+    def from_file(cls, path: str) -> Optional["IgnoreRules"]:
+        try:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                rules = cls(os.path.dirname(path), f.readlines())
+        except OSError:
+            return None
+        return rules if rules.rules else None
+
+    def match(self, path: str, is_dir: bool) -> Optional[bool]:
+        """True = ignoriert, False = ausdrücklich wieder aufgenommen, None = kein Muster trifft zu."""
+        relative = os.path.relpath(path, self.base).replace(os.sep, "/")
+        result = None
+        for regex, negate, dir_only in self.rules:
+            if (is_dir or not dir_only) and regex.fullmatch(relative):
+                result = not negate
+        return result
+
+
+def _ignored(rules: Sequence[IgnoreRules], path: str, is_dir: bool) -> bool:
+    # Tiefer liegende Ignore-Dateien haben Vorrang, innerhalb einer Datei die letzte passende Zeile
+    for rule_set in reversed(rules):
+        result = rule_set.match(path, is_dir)
+        if result is not None:
+            return result
+    return False
+
+
+def _apply_chunk(func: Callable[..., Any], items: List[Any], args: Tuple[Any, ...]) -> List[Any]:
+    return [func(item, *args) for item in items]
+
+
+def looks_binary(block: bytes) -> bool:
+    """Binärdatei-Erkennung wie bei git und ripgrep: ein NUL-Byte im ersten Block."""
+    return b"\0" in block
+
+
+def is_binary(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return looks_binary(f.read(BINARY_SNIFF_BYTES))
+    except OSError:
+        return False
+
+
+@lru_cache(maxsize=64)
+def _line_filter(pattern: str, flags: int) -> Tuple[Pattern, Optional[Pattern]]:
+    """Regex für die Zeilen und ein Byte-Vorfilter aus Literalen, die jeder Treffer enthalten muss."""
+    # Lokaler Import: search_index nutzt seinerseits den Scanner
+    from tools.search_index import required_literals
+
+    regex = re.compile(pattern, flags)
+    alternatives = required_literals(pattern, ignore_case=bool(regex.flags & re.IGNORECASE))
+    if alternatives is None:
+        return regex, None
+    # Je Alternative genügt ihr längstes Literal; ohne passendes Literal kann eine Zeile nicht treffen
+    literals = sorted({max(runs, key=len).encode("utf-8") for runs in alternatives}, key=len, reverse=True)
+    prefilter = re.compile(b"|".join(re.escape(literal) for literal in literals), re.IGNORECASE if regex.flags & re.IGNORECASE else 0)
+    return regex, prefilter
+
+
+def _count_newlines(data: Any, start: int, end: int) -> int:
+    # In Blöcken, damit große Abstände zwischen Treffern keine großen Kopien erzeugen
+    count = 0
+    for offset in range(start, end, COUNT_BLOCK_BYTES):
+        count += data[offset:min(offset + COUNT_BLOCK_BYTES, end)].count(b"\n")
+    return count
+
+
+def _match_line(regex: Pattern, raw: bytes, number: int) -> Optional[Dict[str, Any]]:
+    line = raw.decode("utf-8", errors="ignore").rstrip("\r\n")
+    found = regex.search(line)
+    return {"line": number, "content": line.strip(), "match": found.group()} if found else None
+
+
+def _grep_prefiltered(data: Any, regex: Pattern, prefilter: Pattern, first_only: bool) -> List[Dict[str, Any]]:
+    """Sucht Vorfilter-Treffer auf Byte-Ebene und dekodiert nur deren Zeilen."""
+    matches = []
+    line_number, counted_to, position = 1, 0, 0
+    while True:
+        hit = prefilter.search(data, position)
+        if hit is None:
+            break
+        start = data.rfind(b"\n", 0, hit.start()) + 1
+        end = data.find(b"\n", hit.end())
+        end = len(data) if end == -1 else end
+        line_number += _count_newlines(data, counted_to, start)
+        counted_to = start
+        match = _match_line(regex, data[start:end], line_number)
+        if match:
+            matches.append(match)
+            if first_only:
+                break
+        position = end + 1
+    return matches
+
+
+def grep_file(path: str, pattern: str, flags: int = 0, first_only: bool = False) -> List[Dict[str, Any]]:
+    """Zeilen einer Textdatei, in denen pattern vorkommt (Zeilennummer, Inhalt, Treffer).
+
+    Binärdateien und Dateien über SCAN_MAX_FILE_BYTES liefern keine Treffer. Lässt sich aus dem Muster
+    ein Literal ableiten, wird auf Byte-Ebene (ab SCAN_MMAP_MIN_BYTES per mmap) danach gesucht und nur
+    die betroffene Zeile dekodiert; sonst wird die Datei zeilenweise gestreamt.
+    """
+    regex, prefilter = _line_filter(pattern, flags)
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if (SCAN_MAX_FILE_BYTES and size > SCAN_MAX_FILE_BYTES) or looks_binary(f.read(BINARY_SNIFF_BYTES)):
+                return []
+            f.seek(0)
+            if prefilter is None:
+                matches = []
+                for number, raw in enumerate(f, 1):
+                    match = _match_line(regex, raw, number)
+                    if match:
+                        matches.append(match)
+                        if first_only:
+                            break
+                return matches
+            if size < SCAN_MMAP_MIN_BYTES:
+                return _grep_prefiltered(f.read(), regex, prefilter, first_only)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return _grep_prefiltered(data, regex, prefilter, first_only)
+    except (OSError, ValueError):
+        return []
+
+
+def _close(iterator: Iterator[Any]):
+    # Schließt Generatoren, damit Verzeichnisabstieg und Pool-Arbeit sofort enden
+    close = getattr(iterator, "close", None)
+    if close:
+        close()
+
+
+@dataclass
+class SearchLimits:
+    """Abbruchgrenzen einer Suche: Treffer, Dateien mit Treffern und Sekunden (0 = unbegrenzt).
+
+    Die Zeit läuft ab dem Anlegen, zählt also auch das Auffrischen des Index mit.
+    """
+
+    max_results: int = SEARCH_MAX_RESULTS
+    max_files: int = SEARCH_MAX_FILES
+    time_budget: float = SEARCH_TIME_BUDGET
+    started: float = field(default_factory=time.monotonic)
+    timed_out: bool = field(default=False, init=False)
+
+    @classmethod
+    def of(cls, max_results: Optional[int] = None, max_files: Optional[int] = None,
+           time_budget: Optional[float] = None) -> "SearchLimits":
+        """Limits aus Tool-Parametern; None übernimmt die Voreinstellung."""
+        return cls(
+            SEARCH_MAX_RESULTS if max_results is None else max_results,
+            SEARCH_MAX_FILES if max_files is None else max_files,
+            SEARCH_TIME_BUDGET if time_budget is None else time_budget,
+        )
+
+    def expired(self) -> bool:
+        if self.time_budget and time.monotonic() - self.started > self.time_budget:
+            self.timed_out = True
+        return self.timed_out
+
+    def within_budget(self, items: Iterable[Any]) -> Iterator[Any]:
+        """Reicht items weiter, bis die Zeit abgelaufen ist; begrenzt auch Dateien ohne Treffer."""
+        for item in items:
+            if self.expired():
+                return
+            yield item
+
+    def collect_hits(self, hits: Iterator[Tuple[str, List[Any]]]) -> Tuple[List[Tuple[str, List[Any]]], Optional[str]]:
+        """Sammelt (Pfad, Treffer) bis zu den Grenzen und schließt danach hits.
+
+        Liefert die Treffer und den Abbruchgrund ("max_results", "max_files", "time_budget") oder None,
+        wenn die Suche vollständig ist. Gekürzt wird erst, wenn tatsächlich ein weiterer Treffer vorliegt.
+        """
+        collected: List[Tuple[str, List[Any]]] = []
+        total, reason = 0, None
+        try:
+            for path, matches in hits:
+                if self.max_results and total >= self.max_results:
+                    reason = "max_results"
+                elif self.max_files and len(collected) >= self.max_files:
+                    reason = "max_files"
+                if reason:
+                    break
+                if self.max_results and total + len(matches) > self.max_results:
+                    collected.append((path, matches[:self.max_results - total]))
+                    reason = "max_results"
+                    break
+                collected.append((path, matches))
+                total += len(matches)
+                if self.expired():
+                    break
+        finally:
+            _close(hits)
+        return collected, reason or ("time_budget" if self.timed_out else None)
+
+    def collect(self, items: Iterator[Any]) -> Tuple[List[Any], Optional[str]]:
+        """Wie collect_hits für Suchen mit einem Ergebnis je Eintrag (z. B. Dateinamen)."""
+        collected: List[Any] = []
+        reason = None
+        try:
+            for item in items:
+                if self.max_results and len(collected) >= self.max_results:
+                    reason = "max_results"
+                    break
+                collected.append(item)
+                if self.expired():
+                    break
+        finally:
+            _close(items)
+        return collected, reason or ("time_budget" if self.timed_out else None)
+
+
+def python_outline(path: str) -> Optional[Dict[str, List[str]]]:
+    """Imports, Funktionen und Klassen einer Python-Datei (None, wenn sie nicht lesbar oder parsebar ist)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+    except (OSError, SyntaxError, ValueError):
+        return None
+    outline: Dict[str, List[str]] = {"imports": [], "functions": [], "classes": []}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            outline["imports"].extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            outline["imports"].extend(f"{node.module or ''}.{alias.name}" for alias in node.names)
+        elif isinstance(node, ast.FunctionDef):
+            outline["functions"].append(node.name)
+        elif isinstance(node, ast.ClassDef):
+            outline["classes"].append(node.name)
+    return outline
+
+
+class Scanner:
+    """Beschnittener Verzeichnisabstieg und geordnete, parallele Verarbeitung von Dateien."""
+
+    def __init__(self, ignore_files: Sequence[str] = tuple(SCAN_IGNORE_FILES), prune_dirs: Iterable[str] = DEFAULT_PRUNE_DIRS,
+                 workers: int = SCAN_WORKERS, min_parallel_files: int = SCAN_MIN_PARALLEL_FILES):
+        self.ignore_files = tuple(ignore_files)
+        self.prune_dirs = frozenset(prune_dirs)
+        self.workers = workers or os.cpu_count() or 1
+        self.min_parallel_files = min_parallel_files
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _inherited_rules(self, base: str) -> List[IgnoreRules]:
+        """Ignore-Dateien von base und seinen Elternverzeichnissen bis zur Wurzel des Repositorys."""
+        directories = [base]
+        current = base
+        while not os.path.isdir(os.path.join(current, ".git")):
+            parent = os.path.dirname(current)
+            if parent == current:
+                # Kein Repository: nur die Ignore-Dateien von base selbst
+                directories = [base]
+                break
+            directories.append(parent)
+            current = parent
+        rules = []
+        for directory in reversed(directories):
+            for name in self.ignore_files:
+                rule_set = IgnoreRules.from_file(os.path.join(directory, name))
+                if rule_set:
+                    rules.append(rule_set)
+        return rules
+
+    def walk(self, base: PathLike, respect_ignore: bool = True) -> Iterator[Tuple[str, List[str], List[str]]]:
+        """Wie os.walk (top-down, sortiert), aber ohne ausgeschlossene Verzeichnisse und Dateien.
+
+        Wie bei os.walk kann der Aufrufer dirnames verkleinern, um weitere Verzeichnisse zu überspringen.
+        """
+        base = os.path.abspath(base) if not isinstance(base, str) else base
+        rules_by_dir: Dict[str, List[IgnoreRules]] = {}
+        base_rules = self._inherited_rules(os.path.abspath(base)) if respect_ignore else []
+        for dirpath, dirnames, filenames in os.walk(base):
+            rules = rules_by_dir.pop(dirpath, None)
+            if rules is None:
+                rules = base_rules
+            elif respect_ignore:
+                own = [IgnoreRules.from_file(os.path.join(dirpath, name)) for name in self.ignore_files if name in filenames]
+                rules = rules + [rule_set for rule_set in own if rule_set]
+            dirnames[:] = sorted(
+                name for name in dirnames
+                if name not in self.prune_dirs and not (rules and _ignored(rules, os.path.join(dirpath, name), True))
+            )
+            filenames = sorted(name for name in filenames if not (rules and _ignored(rules, os.path.join(dirpath, name), False)))
+            for name in dirnames:
+                rules_by_dir[os.path.join(dirpath, name)] = rules
+            yield dirpath, dirnames, filenames
+
+    def files(self, base: PathLike, suffixes: Optional[Sequence[str]] = None, respect_ignore: bool = True) -> Iterator[str]:
+        """Alle nicht ausgeschlossenen Dateien unterhalb von base, optional nach Endungen gefiltert."""
+        for dirpath, _, filenames in self.walk(base, respect_ignore):
+            for name in filenames:
+                if not suffixes or name.endswith(tuple(suffixes)):
+                    yield os.path.join(dirpath, name)
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Kein fork: Aufrufer laufen in Tool-Threads neben httpx/asyncio, und ein geforktes Kind
+                # könnte von dort gehaltene Sperren erben. Der Forkserver ist selbst einthreadig und hat
+                # dieses Modul bereits geladen; die Worker importieren die Funktionen auf Modulebene.
+                if "forkserver" in multiprocessing.get_all_start_methods():
+                    context = multiprocessing.get_context("forkserver")
+                    context.set_forkserver_preload([__name__])
+                else:
+                    context = multiprocessing.get_context("spawn")
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._pool
+
+    def map(self, func: Callable[..., Any], items: Iterable[Any], *args: Any) -> Iterator[Any]:
+        """func(item, *args) für alle items, in Eingabereihenfolge und gestreamt.
+
+        items wird erst beim Verbrauch gelesen. Ab min_parallel_files Einträgen laufen die Aufrufe
+        paketweise im Prozess-Pool; func muss dann eine Funktion auf Modulebene sein. Es sind höchstens
+        zwei Pakete je Worker unterwegs, und beim Schließen des Generators werden ausstehende Pakete
+        verworfen. Ist kein Pool verfügbar, wird im eigenen Prozess gearbeitet.
+        """
+        iterator = iter(items)
+        head = list(islice(iterator, self.min_parallel_files))
+        if self.workers <= 1 or len(head) < self.min_parallel_files:
+            for item in chain(head, iterator):
+                yield func(item, *args)
+            return
+        try:
+            pool = self._executor()
+        except (OSError, RuntimeError) as e:
+            print(f"⚠️  Prozess-Pool nicht verfügbar, Dateien werden seriell gelesen: {e}")
+            for item in chain(head, iterator):
+                yield func(item, *args)
+            return
+        size = max(1, min(MAX_CHUNK_SIZE, len(head) // (self.workers * 4)))
+        chunks = iter(lambda: list(islice(iterator, size)), [])
+        pending: Deque[Future] = deque()
+        try:
+            for chunk in chain((head[start:start + size] for start in range(0, len(head), size)), chunks):
+                pending.append(pool.submit(_apply_chunk, func, chunk, args))
+                if len(pending) >= self.workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def grep(self, paths: Iterable[str], pattern: str, flags: int = 0, first_only: bool = False) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """(Pfad, Treffer) für jede Datei mit mindestens einem Treffer, in Eingabereihenfolge und gestreamt."""
+        paths, searched = tee(paths)
+        for path, matches in zip(paths, self.map(grep_file, searched, pattern, flags, first_only)):
+            if matches:
+                yield path, matches
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+
+# Globale Instanz
+scanner = Scanner()
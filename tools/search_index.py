@@ -0,0 +1,413 @@
+"""
+Persistenter Trigramm-Index für die Textsuche im Arbeitsverzeichnis.
+Für jede Datei wird eine Signatur ihrer Byte-Trigramme (Bitmenge, Groß-/Kleinschreibung ignoriert)
+in einer SQLite-Datenbank unter SEARCH_INDEX_DIR abgelegt und anhand von mtime und Größe inkrementell
+aktualisiert. Eine Suche leitet aus dem Muster die zwingend vorkommenden Literale ab und liest nur die
+Dateien, deren Signatur alle zugehörigen Trigramme enthält; die eigentlichen Treffer prüft der Aufrufer.
+Indizes, die lange nicht genutzt wurden oder SEARCH_INDEX_MAX_SIZE_MB überschreiten, werden gelöscht.
+Der Abgleich mit dem Dateisystem läuft höchstens alle SEARCH_INDEX_REFRESH_INTERVAL Sekunden und
+außerhalb der Index-Sperre; schreibende Tools erzwingen über mark_indexes_stale() den nächsten Abgleich.
+"""
+
+import hashlib
+import os
+import sqlite3
+import stat
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+try:
+    from re import _parser as sre_parse  # Python >= 3.11
+    from re import _constants as sre_constants
+except ImportError:  # pragma: no cover
+    import sre_parse
+    import sre_constants
+
+from config.settings import (
+    SEARCH_INDEX_ENABLED, SEARCH_INDEX_DIR, SEARCH_INDEX_MAX_FILE_BYTES, SEARCH_INDEX_MAX_SIZE_MB, SEARCH_INDEX_MAX_AGE,
+    SEARCH_INDEX_REFRESH_INTERVAL
+)
+from tools.scanner import BINARY_SNIFF_BYTES, looks_binary, scanner
+
+# Signaturbreite in Bits als Zweierpotenz: etwa vier Bits pro Trigramm, begrenzt nach unten und oben
+MIN_SIGNATURE_BITS = 8
+MAX_SIGNATURE_BITS = 16
+
+PathLike = Union[str, Path]
+# Pfad -> (mtime_ns, Größe, Signaturbreite in Bits als Exponent, Signatur oder None = nicht indiziert)
+Entry = Tuple[int, int, int, Optional[int]]
+
+
+def _bit(gram: bytes, bits: int) -> int:
+    """Position eines Trigramms in einer Signatur der Breite 2**bits (obere Bits eines Fibonacci-Hashes)."""
+    return ((int.from_bytes(gram, "little") * 2654435761) & 0xFFFFFFFF) >> (32 - bits)
+
+
+def _trigrams(data: bytes) -> set:
+    data = data.lower()
+    return {data[i:i + 3] for i in range(len(data) - 2)}
+
+
+def signature(data: bytes) -> Tuple[int, int]:
+    """Trigramm-Signatur eines Dateiinhalts als (Breite in Bits als Exponent, Bitmenge).
+
+    Mit numpy vektorisiert, sonst mit derselben Kodierung in reinem Python.
+    """
+    if not NUMPY_AVAILABLE:
+        grams = _trigrams(data)
+        bits = min(MAX_SIGNATURE_BITS, max(MIN_SIGNATURE_BITS, (4 * len(grams)).bit_length()))
+        bitset = 0
+        for gram in grams:
+            bitset |= 1 << _bit(gram, bits)
+        return bits, bitset
+    codes = np.frombuffer(data.lower(), dtype=np.uint8).astype(np.uint64)
+    # Gleiche Kodierung wie _bit(): int.from_bytes(trigramm, "little")
+    grams = np.unique(codes[:-2] | (codes[1:-1] << 8) | (codes[2:] << 16)) if len(codes) >= 3 else codes[:0]
+    bits = min(MAX_SIGNATURE_BITS, max(MIN_SIGNATURE_BITS, (4 * len(grams)).bit_length()))
+    bitmap = np.zeros(1 << bits, dtype=bool)
+    bitmap[((grams * 2654435761) & 0xFFFFFFFF) >> (32 - bits)] = True
+    return bits, int.from_bytes(np.packbits(bitmap, bitorder="little").tobytes(), "little")
+
+
+def _literal_chars(items, ignore_case: bool) -> List[Optional[str]]:
+    """Zeichen einer Sequenz in Reihenfolge; None markiert alles, was kein festes Zeichen ist."""
+    chars: List[Optional[str]] = []
+    for op, arg in items:
+        if op is sre_constants.LITERAL:
+            char = chr(arg)
+            # Zeilenumbrüche werden beim Lesen normalisiert, der Index schreibt nur ASCII klein
+            chars.append(None if char in "\r\n" or (ignore_case and not char.isascii()) else char)
+        elif op is sre_constants.AT:
+            # Anker verbrauchen keine Zeichen
+            continue
+        elif op is sre_constants.SUBPATTERN and not any(sub_op is sre_constants.BRANCH for sub_op, _ in arg[-1]):
+            # Gruppen ohne Alternativen gehören zur umgebenden Sequenz
+            chars.extend(_literal_chars(list(arg[-1]), ignore_case))
+        else:
+            chars.append(None)
+    return chars
+
+
+def _literal_runs(items, ignore_case: bool) -> List[str]:
+    """Zusammenhängende Literale einer Sequenz, die in jedem Treffer vorkommen müssen."""
+    runs = "".join(char if char is not None else "\0" for char in _literal_chars(items, ignore_case)).split("\0")
+    return [run for run in runs if run]
+
+
+def required_literals(pattern: str, regex: bool = True, ignore_case: bool = False) -> Optional[List[List[str]]]:
+    """Alternativen aus Literalen, von denen mindestens eine vollständig in jedem Treffer vorkommt.
+
+    None bedeutet, dass sich aus dem Muster keine Einschränkung ableiten lässt.
+    """
+    if not regex:
+        alternatives = [[part for part in pattern.replace("\r", "\n").split("\n") if part]]
+    else:
+        try:
+            parsed = sre_parse.parse(pattern)
+        except Exception:
+            return None
+        ignore_case = ignore_case or bool(parsed.state.flags & sre_constants.SRE_FLAG_IGNORECASE)
+        items = list(parsed)
+        if len(items) == 1 and items[0][0] is sre_constants.BRANCH:
+            alternatives = [_literal_runs(list(branch), ignore_case) for branch in items[0][1][1]]
+        else:
+            alternatives = [_literal_runs(items, ignore_case)]
+
+    alternatives = [[run for run in runs if len(run.encode("utf-8")) >= 3] for runs in alternatives]
+    # Eine Alternative ohne Trigramme kann überall passen
+    if not alternatives or any(not runs for runs in alternatives):
+        return None
+    return alternatives
+
+
+def is_under(path: str, base: str) -> bool:
+    return path == base or path.startswith(base.rstrip(os.sep) + os.sep)
+
+
+def walk_files(base: str) -> Dict[str, os.stat_result]:
+    """Alle nicht ausgeschlossenen regulären Dateien unterhalb von base mit ihrem stat-Ergebnis."""
+    found = {}
+    for path in scanner.files(base):
+        try:
+            file_stat = os.stat(path)
+        except OSError:
+            continue
+        if stat.S_ISREG(file_stat.st_mode):
+            found[path] = file_stat
+    return found
+
+
+def index_file(item: Tuple[str, int, int], max_file_bytes: int) -> Entry:
+    """Index-Eintrag für (Pfad, mtime_ns, Größe); läuft bei vielen Dateien im Prozess-Pool des Scanners."""
+    path, mtime_ns, size = item
+    if size > max_file_bytes:
+        return mtime_ns, size, 0, None
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return mtime_ns, size, 0, None
+    if looks_binary(data[:BINARY_SNIFF_BYTES]):
+        # Leere Signatur: Binärdateien sind nur Kandidaten, wenn das Muster keine Literale hat
+        return mtime_ns, size, MIN_SIGNATURE_BITS, 0
+    bits, bitset = signature(data)
+    return mtime_ns, size, bits, bitset
+
+
+def index_root(path: str, roots: Iterable[str]) -> str:
+    """Wurzel für einen Index über path: eine bestehende Wurzel, das Arbeitsverzeichnis oder path selbst."""
+    for root in roots:
+        if is_under(path, root):
+            return root
+    cwd = os.getcwd()
+    return cwd if is_under(path, cwd) else path
+
+
+class TrigramIndex:
+    """Trigramm-Signaturen aller Dateien unterhalb von root, persistent in SQLite."""
+
+    def __init__(self, root: PathLike, db_path: Optional[PathLike] = None, enabled: bool = SEARCH_INDEX_ENABLED,
+                 max_file_bytes: int = SEARCH_INDEX_MAX_FILE_BYTES, refresh_interval: float = SEARCH_INDEX_REFRESH_INTERVAL):
+        self.root = os.path.abspath(root)
+        digest = hashlib.sha256(self.root.encode("utf-8")).hexdigest()[:16]
+        self.db_path = Path(db_path) if db_path else SEARCH_INDEX_DIR / f"{digest}.sqlite3"
+        self.enabled = enabled
+        self.max_file_bytes = max_file_bytes
+        self.refresh_interval = refresh_interval
+        self._files: Optional[Dict[str, Entry]] = None
+        # Verzeichnis -> Zeitpunkt des letzten vollständigen Abgleichs (time.monotonic)
+        self._refreshed: Dict[str, float] = {}
+        self._generation = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.stats = {"queries": 0, "indexed": 0, "candidates": 0}
+
+    def _connection(self) -> sqlite3.Connection:
+        """Öffnet die Datenbank beim ersten Zugriff und legt das Schema an."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), timeout=5, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, "
+                "bits INTEGER NOT NULL, signature BLOB)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _load(self) -> Dict[str, Entry]:
+        if self._files is None:
+            self._files = {}
+            try:
+                conn = self._connection()
+            except (OSError, sqlite3.Error) as e:
+                # Der Index beschleunigt nur; ohne Datenbank wird wie bei abgeschaltetem Index durchsucht
+                print(f"⚠️  Suchindex nicht verfügbar, Dateien werden direkt durchsucht: {e}")
+                self.enabled = False
+                self._conn = None
+                return self._files
+            try:
+                rows = conn.execute("SELECT path, mtime_ns, size, bits, signature FROM files").fetchall()
+            except sqlite3.Error as e:
+                print(f"⚠️  Suchindex nicht lesbar, wird neu aufgebaut: {e}")
+                rows = []
+            for path, mtime_ns, size, bits, blob in rows:
+                self._files[path] = (mtime_ns, size, bits, int.from_bytes(blob, "little") if blob is not None else None)
+        return self._files
+
+    def _open(self):
+        """Lädt den Index vor der ersten Abfrage; schaltet ihn ab, wenn die Datenbank nicht zu öffnen ist."""
+        if self.enabled and self._files is None:
+            with self._lock:
+                self._load()
+
+    def refresh(self, base: Optional[PathLike] = None) -> int:
+        """Gleicht den Index unterhalb von base mit dem Dateisystem ab; liefert die Zahl neu indizierter Dateien."""
+        base = os.path.abspath(base) if base else self.root
+        with self._lock:
+            self._load()
+        return self._refresh(base)
+
+    def mark_stale(self):
+        """Erzwingt bei der nächsten Abfrage einen Abgleich, auch innerhalb von refresh_interval."""
+        with self._lock:
+            self._refreshed.clear()
+            self._generation += 1
+
+    def _is_fresh(self, base: str) -> bool:
+        now = time.monotonic()
+        return any(is_under(base, done) and now - at < self.refresh_interval for done, at in self._refreshed.items())
+
+    def _refresh(self, base: str) -> int:
+        """Durchläuft den Baum ohne Sperre; nur das Übernehmen der Änderungen ist serialisiert."""
+        started = time.monotonic()
+        with self._lock:
+            generation = self._generation
+            known = {path: entry[:2] for path, entry in self._files.items() if is_under(path, base)}
+        found = walk_files(base)
+        stale = [
+            (path, file_stat.st_mtime_ns, file_stat.st_size) for path, file_stat in found.items()
+            if known.get(path, (None, None)) != (file_stat.st_mtime_ns, file_stat.st_size)
+        ]
+        changed = {item[0]: entry for item, entry in zip(stale, scanner.map(index_file, stale, self.max_file_bytes))}
+        removed = [path for path in known if path not in found]
+
+        with self._lock:
+            # Ein Schreibzugriff während des Durchlaufs ist womöglich nicht erfasst
+            if generation == self._generation:
+                self._refreshed[base] = started
+            if not changed and not removed:
+                return 0
+            self._files.update(changed)
+            for path in removed:
+                self._files.pop(path, None)
+            try:
+                conn = self._connection()
+                conn.executemany(
+                    "INSERT OR REPLACE INTO files (path, mtime_ns, size, bits, signature) VALUES (?, ?, ?, ?, ?)",
+                    [(path, mtime_ns, size, bits, bitset.to_bytes((1 << bits) // 8, "little") if bitset is not None else None)
+                     for path, (mtime_ns, size, bits, bitset) in changed.items()]
+                )
+                conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+                conn.commit()
+            except (OSError, sqlite3.Error) as e:
+                print(f"⚠️  Suchindex nicht beschreibbar: {e}")
+            self.stats["indexed"] += len(changed)
+        return len(changed)
+
+    def candidates(self, path: PathLike, pattern: str, regex: bool = True, ignore_case: bool = False) -> List[str]:
+        """Dateien unterhalb von path, die das Muster enthalten können, sortiert und in der Schreibweise von path."""
+        self._open()
+        if not self.enabled:
+            base = os.path.abspath(path)
+            matches = sorted(walk_files(base))
+            with self._lock:
+                self.stats["queries"] += 1
+                self.stats["candidates"] += len(matches)
+            return [os.path.join(str(path), os.path.relpath(match, base)) for match in matches]
+        return list(self.iter_candidates(path, pattern, regex, ignore_case))
+
+    def iter_candidates(self, path: PathLike, pattern: str, regex: bool = True, ignore_case: bool = False) -> Iterator[str]:
+        """Wie candidates, aber als Generator für abbrechbare Suchen.
+
+        Ohne Index wird der Verzeichnisbaum erst beim Verbrauch durchlaufen (Reihenfolge von Scanner.walk),
+        sodass ein vorzeitiges Ende der Suche auch den Abstieg beendet.
+        """
+        base = os.path.abspath(path)
+        self._open()
+        if not self.enabled:
+            for match in scanner.files(base):
+                yield os.path.join(str(path), os.path.relpath(match, base))
+            return
+        alternatives = required_literals(pattern, regex, ignore_case)
+        with self._lock:
+            fresh = self._is_fresh(base)
+        if not fresh:
+            self._refresh(base)
+        with self._lock:
+            masks: Dict[int, List[int]] = {}
+            matches = []
+            for file_path, (_, _, bits, bitset) in self._files.items():
+                if not is_under(file_path, base):
+                    continue
+                if bitset is not None and alternatives is not None:
+                    if bits not in masks:
+                        masks[bits] = [self._mask(runs, bits) for runs in alternatives]
+                    if not any(bitset & mask == mask for mask in masks[bits]):
+                        continue
+                matches.append(file_path)
+            matches.sort()
+            self.stats["queries"] += 1
+            self.stats["candidates"] += len(matches)
+        for match in matches:
+            yield os.path.join(str(path), os.path.relpath(match, base))
+
+    @staticmethod
+    def _mask(runs: List[str], bits: int) -> int:
+        mask = 0
+        for run in runs:
+            for gram in _trigrams(run.encode("utf-8")):
+                mask |= 1 << _bit(gram, bits)
+        return mask
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Datenbanken, die in diesem Prozess geöffnet wurden und nicht gelöscht werden dürfen
+_claimed: Set[str] = set()
+_claimed_lock = threading.Lock()
+
+
+def claim_index_file(db_path: Path, max_size_mb: float = SEARCH_INDEX_MAX_SIZE_MB, max_age: int = SEARCH_INDEX_MAX_AGE):
+    """Markiert eine Index-Datenbank als genutzt und räumt ihr Verzeichnis auf.
+
+    Die mtime einer Datenbank gilt als letzte Nutzung. Zuerst werden Indizes gelöscht, die länger als
+    max_age ungenutzt sind, danach die ältesten, bis das Verzeichnis unter max_size_mb liegt.
+    Indizes, die dieser Prozess geöffnet hat, bleiben erhalten.
+    """
+    now = time.time()
+    with _claimed_lock:
+        _claimed.add(str(db_path))
+        try:
+            os.utime(db_path, (now, now))
+        except OSError:
+            pass
+        try:
+            databases = []
+            for path in db_path.parent.glob("*.sqlite3"):
+                files = [path] + [Path(f"{path}{suffix}") for suffix in ("-wal", "-shm", "-journal")]
+                sizes = [file.stat().st_size for file in files if file.exists()]
+                databases.append((path.stat().st_mtime, sum(sizes), path, files))
+        except OSError:
+            return
+        total = sum(size for _, size, _, _ in databases)
+        max_bytes = max_size_mb * 1024 * 1024
+        # Am längsten ungenutzte zuerst
+        for mtime, size, path, files in sorted(databases, key=lambda database: database[0]):
+            expired = max_age and now - mtime > max_age
+            if str(path) in _claimed or not (expired or total > max_bytes):
+                continue
+            try:
+                for file in files:
+                    if file.exists():
+                        file.unlink()
+            except OSError:
+                continue
+            total -= size
+
+
+_indexes: Dict[str, TrigramIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def mark_indexes_stale():
+    """Nach Schreibzugriffen: alle Indizes gleichen sich bei der nächsten Abfrage wieder ab."""
+    with _indexes_lock:
+        indexes = list(_indexes.values())
+    for index in indexes:
+        index.mark_stale()
+
+
+def search_index_for(path: PathLike) -> TrigramIndex:
+    """Trigramm-Index, dessen Wurzel path enthält."""
+    path = os.path.abspath(path)
+    with _indexes_lock:
+        root = index_root(path, _indexes)
+        if root not in _indexes:
+            _indexes[root] = TrigramIndex(root)
+            if _indexes[root].enabled:
+                claim_index_file(_indexes[root].db_path)
+        return _indexes[root]
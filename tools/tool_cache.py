@@ -0,0 +1,201 @@
+"""
+Sitzungs-Cache für Tool-Ergebnisse.
+Lesende Tools (Dateien lesen, suchen, auflisten) werden pro Tool-Name und Argumenten
+zwischengespeichert. Jeder Eintrag merkt sich mtime und Größe der betroffenen Pfade und wird
+ungültig, sobald sich diese ändern oder ein schreibendes Tool einen der Pfade berührt.
+Bei Verzeichnissen wird nur das Verzeichnis selbst und seine oberste Ebene geprüft; Änderungen
+tiefer im Baum fallen spätestens nach TOOL_CACHE_DIR_TTL Sekunden auf.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import TOOL_CACHE_DIR_TTL
+
+# Cachebare Tools und die Argumente, die Pfade enthalten (leer = aktuelles Verzeichnis)
+CACHEABLE_TOOLS: Dict[str, Tuple[str, ...]] = {
+    "read_file": ("path",),
+    "view_file": ("AbsolutePath",),
+    "list_directory": ("path",),
+    "list_dir": ("DirectoryPath",),
+    "view_code_item": ("File",),
+    "grep_search": ("SearchPath",),
+    "find_by_name": ("SearchDirectory",),
+    "codebase_search": ("TargetDirectories",),
+    "analyze_code_complexity": ("file_path",),
+    "detect_security_vulnerabilities": ("file_path",),
+    "validate_architecture": ("project_path",),
+}
+
+# Schreibende Tools und die Argumente mit den Pfaden, die sie verändern
+WRITE_TOOLS: Dict[str, Tuple[str, ...]] = {
+    "write_file": ("path", "file_path"),
+    "edit_file": ("TargetFile",),
+    "write_to_file": ("TargetFile",),
+    "optimize_code": ("file_path",),
+    "refactor_code": ("file_path",),
+    "generate_documentation": ("output_path",),
+    "generate_api_spec": ("output_path",),
+    # Schreibt mit output_format="json" die Datei dependencies.json ins Projekt
+    "analyze_dependencies": ("project_path",),
+}
+
+# Tools ohne Auswirkung auf das Dateisystem des Projekts
+NEUTRAL_TOOLS = frozenset({
+    "ask_user_clarification", "suggested_responses", "create_memory", "search_web",
+    "read_url_content", "view_web_document_content_chunk", "command_status",
+    "check_deploy_status", "read_deployment_config", "browser_preview", "fetch_result_page",
+})
+
+Fingerprint = List[Tuple[str, Optional[int], Optional[int]]]
+
+
+def _normalize(path: str) -> str:
+    return str(Path(path or ".").resolve())
+
+
+def _stat(path: str) -> Tuple[Optional[int], Optional[int]]:
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None, None
+
+
+def _shallow_stat(directory: str) -> Tuple[Optional[int], Optional[int]]:
+    """Jüngste mtime des Verzeichnisses und seiner direkten Einträge sowie deren Anzahl.
+
+    Erfasst neue, gelöschte und umbenannte Einträge auf oberster Ebene sowie Änderungen an
+    Dateien dort und an den Verzeichniseinträgen der Unterverzeichnisse, ohne den Baum zu durchlaufen.
+    """
+    latest, _ = _stat(directory)
+    if latest is None:
+        return None, None
+    count = 0
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                count += 1
+                try:
+                    latest = max(latest, entry.stat(follow_symlinks=False).st_mtime_ns)
+                except OSError:
+                    continue
+    except OSError:
+        return None, None
+    return latest, count
+
+
+def _is_within(path: str, directory: str) -> bool:
+    return path == directory or path.startswith(directory.rstrip(os.sep) + os.sep)
+
+
+class ToolResultCache:
+    """Memoisiert lesende Tool-Aufrufe innerhalb einer Agenten-Sitzung."""
+
+    def __init__(self, max_entries: int = 256, directory_ttl: float = TOOL_CACHE_DIR_TTL):
+        self.max_entries = max_entries
+        self.directory_ttl = directory_ttl
+        # Schlüssel -> (Fingerprint, Ergebnis, Ablaufzeitpunkt oder None)
+        self._entries: "OrderedDict[str, Tuple[Fingerprint, Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @staticmethod
+    def _key(tool_name: str, args: Dict[str, Any]) -> str:
+        return tool_name + ":" + json.dumps(args, sort_keys=True, default=str)
+
+    @staticmethod
+    def _paths(tool_name: str, args: Dict[str, Any]) -> List[str]:
+        paths: List[str] = []
+        for name in CACHEABLE_TOOLS[tool_name]:
+            value = args.get(name)
+            if isinstance(value, list):
+                paths.extend(_normalize(item) for item in value)
+            else:
+                paths.append(_normalize(value))
+        return paths or [_normalize(".")]
+
+    def fingerprint(self, tool_name: str, args: Dict[str, Any]) -> Optional[Fingerprint]:
+        """Stand der betroffenen Pfade (None bei nicht cachebaren Tools).
+
+        Vor dem Tool-Aufruf ermitteln und an set() übergeben, damit Änderungen während des Aufrufs
+        den Eintrag ungültig machen.
+        """
+        if tool_name not in CACHEABLE_TOOLS:
+            return None
+        return [(path, *(_shallow_stat(path) if os.path.isdir(path) else _stat(path))) for path in self._paths(tool_name, args)]
+
+    def lookup(self, tool_name: str, args: Dict[str, Any]) -> Tuple[Optional[Any], Optional[Fingerprint]]:
+        """Liefert (Ergebnis oder None, aktueller Fingerprint); der Fingerprint ist für set() bestimmt."""
+        fingerprint = self.fingerprint(tool_name, args)
+        if fingerprint is None:
+            return None, None
+        key = self._key(tool_name, args)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == fingerprint and (entry[2] is None or time.monotonic() < entry[2]):
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1], fingerprint
+            self.stats["misses"] += 1
+        return None, fingerprint
+
+    def get(self, tool_name: str, args: Dict[str, Any]) -> Optional[Any]:
+        """Liefert ein zwischengespeichertes Ergebnis, sofern sich die betroffenen Pfade nicht geändert haben."""
+        return self.lookup(tool_name, args)[0]
+
+    def set(self, tool_name: str, args: Dict[str, Any], result: Any, fingerprint: Optional[Fingerprint] = None):
+        """Speichert ein Ergebnis; Fehlerergebnisse werden nicht zwischengespeichert.
+
+        fingerprint sollte aus lookup() vor dem Tool-Aufruf stammen; ohne ihn wird der aktuelle Stand verwendet.
+        """
+        if tool_name not in CACHEABLE_TOOLS:
+            return
+        if isinstance(result, dict) and result.get("status") == "error":
+            return
+        if fingerprint is None:
+            fingerprint = self.fingerprint(tool_name, args)
+        # Ergebnisse über Verzeichnissen prüfen nur die oberste Ebene und laufen daher ab
+        expires = time.monotonic() + self.directory_ttl if any(os.path.isdir(path) for path, _, _ in fingerprint) else None
+        key = self._key(tool_name, args)
+        with self._lock:
+            self._entries[key] = (fingerprint, result, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_paths(self, paths: List[str]):
+        """Verwirft alle Einträge, die einen der Pfade lesen oder ein Verzeichnis darüber durchsuchen."""
+        with self._lock:
+            stale = [
+                key for key, (fingerprint, _, _) in self._entries.items()
+                if any(_is_within(path, cached) or _is_within(cached, path) for cached, _, _ in fingerprint for path in paths)
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.stats["invalidations"] += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self.stats["invalidations"] += len(self._entries)
+            self._entries.clear()
+
+    def after_call(self, tool_name: str, args: Dict[str, Any]):
+        """Invalidiert nach einem Tool-Aufruf alles, was dieser verändert haben kann.
+
+        Schreibende Tools verwerfen die betroffenen Pfade; Befehle und unbekannte Tools
+        können beliebige Dateien verändern und leeren daher den gesamten Cache.
+        """
+        if tool_name in CACHEABLE_TOOLS or tool_name in NEUTRAL_TOOLS:
+            return
+        if tool_name in WRITE_TOOLS:
+            paths = [_normalize(args[name]) for name in WRITE_TOOLS[tool_name] if args.get(name)]
+            if paths:
+                self.invalidate_paths(paths)
+                return
+        self.clear()
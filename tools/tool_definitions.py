@@ -5,8 +5,42 @@ Dieses Format ist kompatibel mit der OpenAI/Moonshot Tool-Calling-API.
 
 from typing import List, Dict, Any
 
-def get_tool_definitions() -> List[Dict[str, Any]]:
-    """Gibt eine Liste aller verfügbaren Tool-Definitionen zurück."""
+# Tools, die im Chat-Modus verfügbar sind (nur lesen, analysieren, suchen - keine Bearbeitung/Erstellung)
+CHAT_SAFE_TOOL_NAMES = frozenset({
+    # Nur lesende Tools
+    "list_directory", "read_file", "view_file", "list_dir", "view_code_item",
+
+    # Nur Such-Tools
+    "codebase_search", "grep_search", "find_by_name",
+
+    # Nur Web-Recherche
+    "read_url_content", "view_web_document_content_chunk", "search_web",
+
+    # Fortsetzung gekürzter Ausgaben
+    "fetch_result_page",
+
+    # Nur Analyse-Tools (keine Erstellung)
+    "analyze_code_complexity", "detect_security_vulnerabilities",
+    "analyze_dependencies", "profile_performance", "validate_architecture",
+
+    # Nur Memory (keine Erstellung)
+    "create_memory", "suggested_responses",
+
+    # Nur Benutzer-Interaktion
+    "ask_user_clarification"
+})
+
+def get_tool_definitions(chat_safe: bool = False) -> List[Dict[str, Any]]:
+    """Gibt die Tool-Definitionen zurück (mit chat_safe nur die Chat-sicheren).
+
+    Die Listen werden einmalig beim Import erzeugt und bei jedem Aufruf als dasselbe Objekt
+    geliefert, damit der Prompt-Präfix (System-Prompt + Tools) über alle Schritte byte-identisch
+    bleibt und Provider ihn zwischenspeichern können. Die Listen dürfen nicht verändert werden.
+    """
+    return _CHAT_SAFE_TOOL_DEFINITIONS if chat_safe else _TOOL_DEFINITIONS
+
+def _build_tool_definitions() -> List[Dict[str, Any]]:
+    """Erzeugt die Liste aller verfügbaren Tool-Definitionen."""
     
     tools = [
         # Basic Tools (existing)
@@ -207,6 +241,10 @@ def get_tool_definitions() -> List[Dict[str, Any]]:
                             "type": "array",
                             "items": {"type": "string"},
                             "description": "Liste absoluter Pfade zu Verzeichnissen, in denen gesucht werden soll."
+                        },
+                        "MaxResults": {
+                            "type": "integer",
+                            "description": "Optional: Höchstzahl gelieferter Dateien (Standard 10). Weitere Treffer werden als gekürzt gemeldet."
                         }
                     },
                     "required": ["Query", "TargetDirectories"]
@@ -241,6 +279,18 @@ def get_tool_definitions() -> List[Dict[str, Any]]:
                         "CaseInsensitive": {
                             "type": "boolean",
                             "description": "Ob die Suche Groß-/Kleinschreibung ignorieren soll."
+                        },
+                        "MaxResults": {
+                            "type": "integer",
+                            "description": "Optional: Höchstzahl an Treffern; danach bricht die Suche ab und meldet truncated (0 = unbegrenzt)."
+                        },
+                        "MaxFiles": {
+                            "type": "integer",
+                            "description": "Optional: Höchstzahl an Dateien mit Treffern (0 = unbegrenzt)."
+                        },
+                        "TimeBudgetSeconds": {
+                            "type": "number",
+                            "description": "Optional: Zeitbudget der Suche in Sekunden (0 = unbegrenzt)."
                         }
                     },
                     "required": ["SearchPath", "Query", "MatchPerLine", "Includes", "CaseInsensitive"]
@@ -285,6 +335,14 @@ def get_tool_definitions() -> List[Dict[str, Any]]:
                         "FullPath": {
                             "type": "boolean",
                             "description": "Ob der vollständige Pfad dem Muster entsprechen muss."
+                        },
+                        "MaxResults": {
+                            "type": "integer",
+                            "description": "Optional: Höchstzahl an Ergebnissen; danach bricht die Suche ab und meldet truncated (0 = unbegrenzt)."
+                        },
+                        "TimeBudgetSeconds": {
+                            "type": "number",
+                            "description": "Optional: Zeitbudget der Suche in Sekunden (0 = unbegrenzt)."
                         }
                     },
                     "required": ["SearchDirectory", "Pattern", "Excludes", "Type", "MaxDepth", "Extensions", "FullPath"]
@@ -495,6 +553,27 @@ def get_tool_definitions() -> List[Dict[str, Any]]:
                 }
             }
         },
+        {
+            "type": "function",
+            "function": {
+                "name": "fetch_result_page",
+                "description": "Holt die nächste Seite einer gekürzten Tool-Ausgabe. Verwende das 'handle' und 'next_page' aus dem Feld 'continuation' der gekürzten Ausgabe.",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "handle": {
+                            "type": "string",
+                            "description": "Das Fortsetzungs-Handle der gekürzten Ausgabe."
+                        },
+                        "page": {
+                            "type": "integer",
+                            "description": "Die abzurufende Seite (beginnend bei 1)."
+                        }
+                    },
+                    "required": ["handle", "page"]
+                }
+            }
+        },
         
         # Memory and Interaction
         {
@@ -824,4 +903,7 @@ def get_tool_definitions() -> List[Dict[str, Any]]:
         }
     ]
     
-    return tools 
+    return tools
+
+_TOOL_DEFINITIONS = _build_tool_definitions()
+_CHAT_SAFE_TOOL_DEFINITIONS = [tool for tool in _TOOL_DEFINITIONS if tool["function"]["name"] in CHAT_SAFE_TOOL_NAMES]